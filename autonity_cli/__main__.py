@@ -6,21 +6,79 @@ import sys
 
 from click import group, option, version_option
 
-from .commands import (
-    account,
-    block,
-    contract,
-    governance,
-    node,
-    protocol,
-    token,
-    tx,
-    validator,
-)
+from .daemon import forward_to_daemon
+from .lazy_group import LazyCommand, LazyGroup
 from .logging import enable_logging
 
+# Subcommands of `aut`, imported only when dispatched to.  The help
+# text here is shown by `aut --help` and must be kept in line with the
+# docstring of each command group.
+COMMANDS = {
+    "account": LazyCommand(
+        "autonity_cli.commands.account",
+        "account_group",
+        "Commands related to specific accounts.",
+    ),
+    "block": LazyCommand(
+        "autonity_cli.commands.block",
+        "block_group",
+        "Commands for querying block information.",
+    ),
+    "chain": LazyCommand(
+        "autonity_cli.commands.chain",
+        "chain_group",
+        "Commands for recording chain parameters for offline use.",
+    ),
+    "contract": LazyCommand(
+        "autonity_cli.commands.contract",
+        "contract_group",
+        "Command for interacting with arbitrary contracts.",
+    ),
+    "governance": LazyCommand(
+        "autonity_cli.commands.governance",
+        "governance_group",
+        "Commands that can only be called by the governance operator account.",
+    ),
+    "node": LazyCommand(
+        "autonity_cli.commands.node",
+        "node_group",
+        "Commands related to querying specific Autonity nodes.",
+    ),
+    "protocol": LazyCommand(
+        "autonity_cli.commands.protocol",
+        "protocol_group",
+        "Commands related to Autonity-specific protocol operations.  See "
+        "the Autonity contract reference for details.",
+    ),
+    "serve": LazyCommand(
+        "autonity_cli.commands.serve",
+        "serve_cmd",
+        "Run a local daemon which executes aut commands on behalf of other "
+        "aut invocations.",
+    ),
+    "token": LazyCommand(
+        "autonity_cli.commands.token",
+        "token_group",
+        "Commands for working with ERC20 tokens.",
+    ),
+    "tx": LazyCommand(
+        "autonity_cli.commands.tx",
+        "tx_group",
+        "Commands for transaction creation and processing.",
+    ),
+    "validator": LazyCommand(
+        "autonity_cli.commands.validator",
+        "validator",
+        "Commands related to the validators.",
+    ),
+}
+
 
-@group(context_settings=dict(help_option_names=["-h", "--help"]))
+@group(
+    cls=LazyGroup,
+    lazy_commands=COMMANDS,
+    context_settings=dict(help_option_names=["-h", "--help"]),
+)
 @option("--verbose", "-v", is_flag=True, help="Enable additional output (to stderr)")
 @version_option()
 def aut(verbose: bool) -> None:
@@ -35,12 +93,18 @@ def aut(verbose: bool) -> None:
         sys.tracebacklimit = 0
 
 
-aut.add_command(node.node_group)
-aut.add_command(block.block_group)
-aut.add_command(tx.tx_group)
-aut.add_command(protocol.protocol_group)
-aut.add_command(governance.governance_group)
-aut.add_command(validator.validator)
-aut.add_command(account.account_group)
-aut.add_command(token.token_group)
-aut.add_command(contract.contract_group)
+def main() -> None:
+    """
+    Entry point for the `aut` script.  Forward the command to the `aut
+    serve` daemon if one is running, otherwise run it in this process.
+    """
+
+    exit_code = forward_to_daemon(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+
+    aut()  # pylint: disable=no-value-for-parameter
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+The `aut account agent` key agent, and the client functions used by
+signing commands to delegate to it.
+
+The agent is a long-running process listening on a Unix socket
+(accessible only by the current user).  It holds decrypted private
+keys in memory, so that the (deliberately expensive) keyfile
+decryption is performed once per session rather than once per
+signature.  Keys are dropped when the agent is locked, stopped, or
+has been idle for the configured timeout.
+
+Only the standard library is imported at the top level, so that
+checking for an agent stays cheap.
+"""
+
+import os
+import os.path
+import socket
+from typing import Any, Dict, Optional
+
+from .ipc import Message, connect, recv_message, send_message
+from .logging import log
+
+AGENT_SOCKET_ENV_VAR = "AUT_AGENT_SOCKET"
+DEFAULT_AGENT_SOCKET = "~/.autonity/agent.sock"
+DEFAULT_AGENT_IDLE_TIMEOUT = 3600.0
+
+
+class AgentError(Exception):
+    """
+    Error reported by the agent.
+    """
+
+
+class AgentKeyNotHeld(AgentError):
+    """
+    The agent does not hold the requested key.
+    """
+
+
+def get_agent_socket(socket_path: Optional[str] = None) -> str:
+    """
+    Socket path for the agent.  Use the given path, falling back to
+    the AUT_AGENT_SOCKET env var, then DEFAULT_AGENT_SOCKET.
+    """
+    if socket_path is None:
+        socket_path = os.getenv(AGENT_SOCKET_ENV_VAR, DEFAULT_AGENT_SOCKET)
+
+    return os.path.expanduser(socket_path)
+
+
+def agent_request(request: Message, socket_path: Optional[str] = None) -> Message:
+    """
+    Send a request to the agent and return the response.  Raises
+    OSError if no agent is running, and AgentError if the agent
+    reports an error.
+    """
+    with connect(get_agent_socket(socket_path)) as sock:
+        with sock.makefile("rwb") as sock_f:
+            send_message(sock_f, request)
+            response = recv_message(sock_f)
+
+    if response is None:
+        raise AgentError("agent closed the connection")
+    if "error" in response:
+        if response.get("key_not_held"):
+            raise AgentKeyNotHeld(response["error"])
+        raise AgentError(response["error"])
+
+    return response
+
+
+def sign_with_agent(request: Message) -> Optional[Message]:
+    """
+    Send a signing request to the agent, if one is running.  Returns
+    None if there is no agent, or it does not hold the required key, in
+    which case the caller should sign locally.
+    """
+    if not os.path.exists(get_agent_socket()):
+        return None
+
+    try:
+        response = agent_request(request)
+    except (OSError, AgentKeyNotHeld):
+        return None
+
+    log(f"signed by agent with key {request.get('address')}")
+    return response
+
+
+class _KeyAgent:
+    """
+    Request handlers for the agent process.
+    """
+
+    def __init__(self) -> None:
+        self.keys: Dict[str, Any] = {}
+
+    def handle(self, request: Message) -> Message:
+        """
+        Process a single request, returning the response.
+        """
+        handler = getattr(self, "_op_" + str(request.get("op")), None)
+        if handler is None:
+            return {"error": f"unknown operation: {request.get('op')}"}
+
+        try:
+            return handler(request)
+        except AgentKeyNotHeld as err:
+            return {"error": str(err), "key_not_held": True}
+        except Exception as err:  # pylint: disable=broad-except
+            return {"error": str(err) or type(err).__name__}
+
+    def _private_key(self, address: str) -> Any:
+        private_key = self.keys.get(address)
+        if private_key is None:
+            raise AgentKeyNotHeld(f"no key held for {address}")
+        return private_key
+
+    def _op_add(self, request: Message) -> Message:
+        # pylint: disable=import-outside-toplevel
+        from autonity.utils.keyfile import decrypt_keyfile, get_address_from_keyfile
+
+        keyfile_data = request["keyfile"]
+        address = get_address_from_keyfile(keyfile_data)
+        self.keys[address] = decrypt_keyfile(keyfile_data, request["password"])
+        return {"address": address}
+
+    def _op_list(self, _: Message) -> Message:
+        return {"addresses": list(self.keys)}
+
+    def _op_lock(self, _: Message) -> Message:
+        self.keys.clear()
+        return {}
+
+    def _op_sign_tx(self, request: Message) -> Message:
+        # pylint: disable=import-outside-toplevel
+        import json
+
+        from autonity.utils.tx import sign_tx_with_private_key
+        from web3 import Web3
+
+        signed_tx = sign_tx_with_private_key(
+            request["tx"], self._private_key(request["address"])
+        )
+        return {"signed_tx": json.loads(Web3.to_json(signed_tx._asdict()))}
+
+    def _op_sign_message(self, request: Message) -> Message:
+        # pylint: disable=import-outside-toplevel
+        from eth_account import Account
+        from eth_account.messages import encode_defunct
+
+        signature_data = Account().sign_message(
+            signable_message=encode_defunct(text=request["message"]),
+            private_key=self._private_key(request["address"]),
+        )
+        return {"signature": signature_data["signature"].hex()}
+
+
+def run_agent(
+    socket_path: str, idle_timeout: Optional[float] = DEFAULT_AGENT_IDLE_TIMEOUT
+) -> None:
+    """
+    Listen on `socket_path`, serving requests until asked to stop, or
+    until no request has arrived for `idle_timeout` seconds.
+    """
+
+    from .ipc import private_socket_umask  # pylint: disable=import-outside-toplevel
+
+    if os.path.exists(socket_path):
+        try:
+            connect(socket_path).close()
+        except OSError:
+            log(f"removing stale socket {socket_path}")
+            os.remove(socket_path)
+        else:
+            raise OSError(f"agent already listening on {socket_path}")
+
+    agent = _KeyAgent()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with private_socket_umask(socket_path):
+        server.bind(socket_path)
+
+    try:
+        server.listen()
+        server.settimeout(idle_timeout or None)
+        log(f"agent listening on {socket_path}")
+
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                log("idle timeout reached")
+                break
+
+            conn.settimeout(None)
+            try:
+                with conn, conn.makefile("rwb") as conn_f:
+                    request = recv_message(conn_f)
+                    if request is None:
+                        continue
+                    if request.get("op") == "stop":
+                        send_message(conn_f, {})
+                        break
+                    send_message(conn_f, agent.handle(request))
+            except (OSError, ValueError) as err:
+                log(f"failed to process request: {err}")
+
+    finally:
+        agent.keys.clear()
+        server.close()
+        os.remove(socket_path)
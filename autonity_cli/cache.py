@@ -0,0 +1,300 @@
+"""
+Persistent cache of chain data, used to avoid re-fetching values which
+cannot change (or rarely change) once written on chain.  Each chain
+has its own sqlite database in the cache directory (see
+`config.get_cache_directory`), identified by chain id and genesis hash
+so that a chain which is reset with the same chain id (as is common
+for local networks) does not see the data of its predecessor.  Values are stored as compressed JSON,
+and the least recently used entries are evicted once the database
+exceeds a maximum size.
+
+Failure to read or write the cache is never fatal.  It is logged, and
+callers fall back to querying the node.
+"""
+
+import json
+import os
+import os.path
+import sqlite3
+import time
+import zlib
+from typing import Any, Dict, Iterable, Mapping, Optional
+from weakref import WeakKeyDictionary
+
+from web3 import Web3
+
+from .config import get_cache_directory, get_cache_max_size
+from .logging import log
+from .rpc_batch import RPCBatch
+
+_SCHEMA_VERSION = 1
+_SCHEMA = """
+CREATE TABLE entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX entries_accessed ON entries (accessed);
+"""
+
+# Keep well below the default SQLITE_MAX_VARIABLE_NUMBER.
+_MAX_QUERY_KEYS = 500
+
+# The chain id and genesis hash of an RPC endpoint are recorded for this
+# many seconds, so that one-shot commands can open the cache without
+# querying the node.
+ENDPOINT_CHAIN_ID_TTL = 3600.0
+
+# On eviction, remove entries until the size drops below this
+# fraction of the maximum, so that eviction does not run on every
+# write.
+_EVICTION_TARGET = 0.8
+
+
+class ChainCache:
+    """
+    Key-value store for a single chain.  Entries are grouped into
+    namespaces, and values are JSON-serializable python objects.
+    Entries may be given a time-to-live in seconds, otherwise they are
+    kept until explicitly cleared or evicted.  The total size of the
+    stored values is kept below `max_size` bytes.
+    """
+
+    def __init__(self, path: str, max_size: Optional[int] = None):
+        self.path = path
+        self.max_size = max_size
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """
+        Return the value for `key`, or None if not present.
+        """
+        return self.get_many(namespace, [key]).get(key)
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Return a dictionary holding the values of any of `keys` present
+        in the cache.
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        now = time.time()
+        rows = []
+        try:
+            conn = self._connect()
+            with conn:
+                for start in range(0, len(keys), _MAX_QUERY_KEYS):
+                    chunk = keys[start : start + _MAX_QUERY_KEYS]
+                    placeholders = ", ".join("?" * len(chunk))
+                    rows.extend(
+                        conn.execute(
+                            "SELECT key, value FROM entries WHERE namespace = ? "
+                            f"AND key IN ({placeholders}) "
+                            "AND (expires IS NULL OR expires > ?)",
+                            [namespace, *chunk, now],
+                        ).fetchall()
+                    )
+                    conn.execute(
+                        "UPDATE entries SET accessed = ? WHERE namespace = ? "
+                        f"AND key IN ({placeholders})",
+                        [now, namespace, *chunk],
+                    )
+        except (OSError, sqlite3.Error) as err:
+            log(f"failed to read cache {self.path}: {err}")
+            return {}
+
+        return {key: json.loads(zlib.decompress(value)) for key, value in rows}
+
+    def set(
+        self, namespace: str, key: str, value: Any, ttl: Optional[float] = None
+    ) -> None:
+        """
+        Store a single value.
+        """
+        self.set_many(namespace, {key: value}, ttl)
+
+    def set_many(
+        self, namespace: str, items: Mapping[str, Any], ttl: Optional[float] = None
+    ) -> None:
+        """
+        Store several values in a single transaction.
+        """
+        if not items:
+            return
+
+        now = time.time()
+        expires = None if ttl is None else now + ttl
+        rows = []
+        for key, value in items.items():
+            data = zlib.compress(json.dumps(value, separators=(",", ":")).encode())
+            rows.append((namespace, key, data, len(data), expires, now))
+
+        try:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+                if self.max_size is not None:
+                    self._evict(conn)
+        except (OSError, sqlite3.Error) as err:
+            log(f"failed to write cache {self.path}: {err}")
+
+    def remove(self, namespace: str, key: str) -> None:
+        """
+        Remove a single entry, if present.
+        """
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "DELETE FROM entries WHERE namespace = ? AND key = ?",
+                    (namespace, key),
+                )
+        except (OSError, sqlite3.Error) as err:
+            log(f"failed to write cache {self.path}: {err}")
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """
+        Remove all entries in `namespace`, or all entries if no
+        namespace is given.
+        """
+        try:
+            conn = self._connect()
+            with conn:
+                if namespace is None:
+                    conn.execute("DELETE FROM entries")
+                else:
+                    conn.execute(
+                        "DELETE FROM entries WHERE namespace = ?", (namespace,)
+                    )
+        except (OSError, sqlite3.Error) as err:
+            log(f"failed to write cache {self.path}: {err}")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            cache_dir = os.path.dirname(self.path)
+            if cache_dir:
+                os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+
+            conn = sqlite3.connect(self.path, timeout=5.0)
+
+            # The cache only holds data which can be re-fetched, so on
+            # any schema change it is simply recreated.
+            (version,) = conn.execute("PRAGMA user_version").fetchone()
+            if version != _SCHEMA_VERSION:
+                log(f"creating cache {self.path}")
+                with conn:
+                    conn.execute("DROP TABLE IF EXISTS entries")
+                    conn.executescript(_SCHEMA)
+                    conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+            self._conn = conn
+
+        return self._conn
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """
+        If the total size exceeds `max_size`, remove the least recently
+        used entries.
+        """
+        assert self.max_size is not None
+        (total_size,) = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if total_size <= self.max_size:
+            return
+
+        excess = total_size - int(self.max_size * _EVICTION_TARGET)
+        evicted = []
+        for rowid, size in conn.execute(
+            "SELECT rowid, size FROM entries ORDER BY accessed"
+        ):
+            evicted.append((rowid,))
+            excess -= size
+            if excess <= 0:
+                break
+
+        log(f"evicting {len(evicted)} entries from cache {self.path}")
+        conn.executemany("DELETE FROM entries WHERE rowid = ?", evicted)
+
+
+# Chain keys (see `_get_chain_key`) of Web3 objects, and caches by path,
+# already opened in this process.
+_CHAIN_KEYS: "WeakKeyDictionary[Web3, str]" = WeakKeyDictionary()
+_CACHES: Dict[str, ChainCache] = {}
+
+
+def _get_cache(path: str) -> ChainCache:
+    cache = _CACHES.get(path)
+    if cache is None:
+        log(f"using cache {path}")
+        cache = ChainCache(path, get_cache_max_size())
+        _CACHES[path] = cache
+
+    return cache
+
+
+def _endpoint_uri(w3: Web3) -> Optional[str]:
+    provider = w3.provider
+    uri = getattr(provider, "endpoint_uri", None) or getattr(provider, "ipc_path", None)
+    return str(uri) if uri else None
+
+
+def _fetch_chain_key(w3: Web3) -> str:
+    """
+    Query the chain id and genesis hash of `w3` (in a single batch),
+    giving a key of the form <chain-id>-<genesis-hash-prefix>.
+    """
+
+    batch = RPCBatch(w3)
+    batch.add("eth_chainId", [])
+    batch.add("eth_getBlockByNumber", ["0x0", False], lambda block: block["hash"])
+    chain_id, genesis_hash = batch.execute()
+    return f"{chain_id}-{genesis_hash[2:18]}"
+
+
+def _get_chain_key(w3: Web3, cache_dir: str) -> str:
+    """
+    The chain key of `w3`, from the record of endpoints in `cache_dir`
+    if present, otherwise from the node.
+    """
+
+    chain_key = _CHAIN_KEYS.get(w3)
+    if chain_key is not None:
+        return chain_key
+
+    endpoints = _get_cache(os.path.join(cache_dir, "endpoints.sqlite"))
+    uri = _endpoint_uri(w3)
+    if uri:
+        chain_key = endpoints.get("chain-key", uri)
+
+    if chain_key is None:
+        chain_key = _fetch_chain_key(w3)
+        if uri:
+            endpoints.set("chain-key", uri, chain_key, ENDPOINT_CHAIN_ID_TTL)
+
+    _CHAIN_KEYS[w3] = chain_key
+    return chain_key
+
+
+def chain_cache(w3: Web3) -> Optional[ChainCache]:
+    """
+    Return the cache for the chain that `w3` is connected to, or None
+    if caching is disabled.  The chain id and genesis hash of each
+    endpoint are recorded for ENDPOINT_CHAIN_ID_TTL seconds, so that
+    they are not queried by every process.
+    """
+
+    cache_dir = get_cache_directory()
+    if cache_dir is None:
+        return None
+
+    chain_key = _get_chain_key(w3, cache_dir)
+    return _get_cache(os.path.join(cache_dir, f"chain-{chain_key}.sqlite"))
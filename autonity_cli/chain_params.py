@@ -0,0 +1,127 @@
+"""
+Chain parameters for offline transaction creation.  `aut chain
+sync-params` (run on a connected host) records the chain id, current
+fees, token metadata and the nonces of accounts in a JSON file, which
+can be copied to a host without network access.  `aut tx make
+--offline` then creates transactions from these values, using a Web3
+object which refuses to make any request.
+"""
+
+import json
+import os
+import os.path
+from typing import Any, Dict, Optional, TypedDict, cast
+
+from click import ClickException
+from web3 import Web3
+from web3.providers import BaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+from .config import get_chain_params_file
+from .logging import log
+
+PLAIN_TRANSFER_GAS = 21000
+"""
+Gas used by a transfer of Auton to an account (with no data).
+"""
+
+
+class TokenParams(TypedDict, total=False):
+    """
+    Metadata of a token, and the gas used by a transfer (if it could be
+    estimated).
+    """
+
+    name: Optional[str]
+    symbol: Optional[str]
+    decimals: int
+    transfer_gas: int
+
+
+class ChainParams(TypedDict):
+    """
+    Parameters of a single chain.  Addresses are checksummed.
+    """
+
+    chain_id: int
+    synced_at_block: int
+    max_fee_per_gas: int
+    max_priority_fee_per_gas: int
+    tokens: Dict[str, TokenParams]
+    nonces: Dict[str, int]
+
+
+class OfflineProvider(BaseProvider):
+    """
+    A provider which raises an error for any request, so that values
+    missing in offline mode are reported rather than silently fetched.
+    """
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        raise ClickException(
+            f"{method} requires network access (give the value explicitly, "
+            "or run `aut chain sync-params` on a connected host)"
+        )
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return False
+
+
+def offline_web3() -> Web3:
+    """
+    A Web3 object which refuses to make any request.
+    """
+    return Web3(OfflineProvider())
+
+
+def _load_all(path: str) -> Dict[str, ChainParams]:
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, encoding="utf8") as params_f:
+        return cast(Dict[str, ChainParams], json.load(params_f))
+
+
+def load_chain_params(chain_id: Optional[int] = None) -> ChainParams:
+    """
+    Load the parameters of the given chain.  If no chain id is given,
+    the file must hold parameters of exactly one chain.
+    """
+
+    path = get_chain_params_file()
+    all_params = _load_all(path)
+    if chain_id is not None:
+        params = all_params.get(str(chain_id))
+        if params is None:
+            raise ClickException(f"no parameters for chain {chain_id} in {path}")
+        return params
+
+    if len(all_params) != 1:
+        raise ClickException(
+            f"{path} holds parameters for {len(all_params)} chains (use --chain-id)"
+        )
+
+    return next(iter(all_params.values()))
+
+
+def save_chain_params(params: ChainParams) -> str:
+    """
+    Store the parameters of a chain, replacing any previous parameters
+    of the same chain.  Returns the file path.
+    """
+
+    path = get_chain_params_file()
+    all_params = _load_all(path)
+    all_params[str(params["chain_id"])] = params
+
+    params_dir = os.path.dirname(path)
+    if params_dir:
+        os.makedirs(params_dir, mode=0o700, exist_ok=True)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf8") as params_f:
+        json.dump(all_params, params_f, indent=2)
+    os.replace(tmp_path, path)
+
+    log(f"wrote chain parameters to {path}")
+    return path
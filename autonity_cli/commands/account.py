@@ -3,7 +3,11 @@ The `account` command group.
 """
 
 import json
-from typing import Dict, List, Optional
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import eth_account
 from autonity.autonity import Autonity
@@ -14,22 +18,36 @@ from autonity.utils.denominations import (
     format_quantity,
 )
 from autonity.utils.keyfile import (
+    EncryptedKeyData,
     PrivateKey,
     create_keyfile_from_private_key,
     decrypt_keyfile,
     get_address_from_keyfile,
 )
-from autonity.utils.tx import sign_tx
-from click import ClickException, Path, argument, command, group, option
+from autonity.utils.tx import sign_tx, sign_tx_with_private_key
+from click import ClickException, IntRange, Path, argument, command, group, option
 from eth_account import Account
 from eth_account.messages import encode_defunct
 from hexbytes import HexBytes
 from web3 import Web3
-from web3.types import BlockIdentifier
 
 from .. import config
+from ..agent import (
+    AGENT_SOCKET_ENV_VAR,
+    DEFAULT_AGENT_IDLE_TIMEOUT,
+    AgentError,
+    agent_request,
+    get_agent_socket,
+    run_agent,
+    sign_with_agent,
+)
+from ..daemon import require_terminal
+from ..keystore_index import write_keyfile, write_keyfiles
 from ..logging import log
 from ..options import (
+    batch_size_option,
+    block_option,
+    concurrency_option,
     from_option,
     keyfile_and_password_options,
     keyfile_option,
@@ -37,10 +55,19 @@ from ..options import (
     newton_or_token_option,
     rpc_endpoint_option,
 )
-from ..user import get_account_stats
+from ..user import (
+    call_functions,
+    get_account_stats,
+    get_lntn_balances,
+    get_token_metadata,
+    get_validator_addresses,
+)
 from ..utils import (
     address_keyfile_dict,
+    block_from_option,
     from_address_from_argument_optional,
+    geth_keyfile_name,
+    iter_lines_from_file_or_stdin,
     load_from_file_or_stdin,
     load_from_file_or_stdin_line,
     new_keyfile_from_options,
@@ -83,16 +110,18 @@ account_group.add_command(list_cmd)
 @command()
 @rpc_endpoint_option
 @keyfile_option()
-@option(
-    "--asof",
-    help="state as of TAG, one of block number, 'latest', 'earliest', or 'pending'.",
-)
+@block_option
+# (Older name of --block)
+@option("--asof", hidden=True)
+@batch_size_option
 @argument("accounts", nargs=-1)
 def info(
     rpc_endpoint: Optional[str],
     keyfile: Optional[str],
     accounts: List[str],
-    asof: Optional[BlockIdentifier],
+    block_str: Optional[str],
+    asof: Optional[str],
+    batch_size: int,
 ) -> None:
     """
     Print some information about the given account (falling back to
@@ -106,9 +135,10 @@ def info(
         accounts = [account]
 
     addresses = [Web3.to_checksum_address(act) for act in accounts]
+    block = block_from_option(block_str or asof)
 
     w3 = web3_from_endpoint_arg(None, rpc_endpoint)
-    account_stats = get_account_stats(w3, addresses, asof)
+    account_stats = get_account_stats(w3, addresses, block, batch_size)
     print(to_json(account_stats, pretty=True))
 
 
@@ -117,18 +147,20 @@ account_group.add_command(info)
 
 @command()
 @rpc_endpoint_option
+@block_option
 @newton_or_token_option
 @keyfile_option()
 @argument("account_str", metavar="ACCOUNT", default="")
 def balance(
     rpc_endpoint: Optional[str],
+    block_str: Optional[str],
     account_str: Optional[str],
     keyfile: Optional[str],
     ntn: bool,
     token: Optional[str],
 ) -> None:
     """
-    Print the current balance of the given account.
+    Print the balance of the given account.
     """
 
     account_addr = from_address_from_argument_optional(account_str, keyfile)
@@ -138,6 +170,7 @@ def balance(
         )
 
     token_addresss = newton_or_token_to_address(ntn, token)
+    block = block_from_option(block_str)
 
     w3 = web3_from_endpoint_arg(None, rpc_endpoint)
 
@@ -146,16 +179,21 @@ def balance(
 
     if ntn:
         autonity = Autonity(w3)
-        print(format_newton_quantity(autonity.balance_of(account_addr)))
+        bal = call_functions(
+            w3, [autonity.contract.functions.balanceOf(account_addr)], block
+        )[0]
+        print(format_newton_quantity(bal))
 
     elif token_addresss is not None:
         token_contract = ERC20(w3, token_addresss)
-        decimals = token_contract.decimals()
-        bal = token_contract.balance_of(account_addr)
+        decimals = get_token_metadata(w3, token_addresss)["decimals"]
+        bal = call_functions(
+            w3, [token_contract.contract.functions.balanceOf(account_addr)], block
+        )[0]
         print(format_quantity(bal, decimals))
 
     else:
-        print(format_auton_quantity(w3.eth.get_balance(account_addr)))
+        print(format_auton_quantity(w3.eth.get_balance(account_addr, block)))
 
 
 account_group.add_command(balance)
@@ -164,39 +202,110 @@ account_group.add_command(balance)
 @command()
 @rpc_endpoint_option
 @keyfile_option()
-@argument("account_str", metavar="ACCOUNT", default="")
+@batch_size_option
+@concurrency_option
+@argument("accounts", metavar="ACCOUNTS", nargs=-1)
 def lntn_balances(
-    rpc_endpoint: Optional[str], account_str: Optional[str], keyfile: Optional[str]
+    rpc_endpoint: Optional[str],
+    keyfile: Optional[str],
+    batch_size: int,
+    concurrency: int,
+    accounts: Tuple[str, ...],
 ) -> None:
     """
-    Print all Liquid Newton balances of the given account.
+    Print all Liquid Newton balances of the given accounts.  If no
+    accounts are given, the keyfile address is used.  For a single
+    account, the balances are keyed by validator.  For several
+    accounts, they are keyed by account, then by validator.
     """
 
-    account_addr = from_address_from_argument_optional(account_str, keyfile)
-    if not account_addr:
-        raise ClickException(
-            "could not determine account address from argument or keyfile"
-        )
+    if accounts:
+        account_addrs = [Web3.to_checksum_address(acct) for acct in accounts]
+    else:
+        account_addr = from_address_from_argument_optional(None, keyfile)
+        if not account_addr:
+            raise ClickException(
+                "could not determine account address from argument or keyfile"
+            )
+        account_addrs = [account_addr]
 
     w3 = web3_from_endpoint_arg(None, rpc_endpoint)
-    aut = Autonity(w3)
-    validator_addrs = aut.get_validators()
-    validators = [aut.get_validator(vaddr) for vaddr in validator_addrs]
 
-    balances: Dict[str, str] = {}
-    for validator in validators:
-        log(f"computing holdings for validators {validator['node_address']}")
-        lntn = ERC20(w3, validator["liquid_contract"])
-        bal = lntn.balance_of(account_addr)
-        if bal:
-            balances[validator["node_address"]] = format_newton_quantity(bal)
+    # Pin all queries to the same block, so that results are consistent
+    # across batches.
+    block_number = w3.eth.block_number
+    validator_addrs = (
+        Autonity(w3)
+        .contract.functions.getValidators()
+        .call(block_identifier=block_number)
+    )
+    log(f"querying {len(validator_addrs)} validators at block {block_number}")
+    addresses = get_validator_addresses(w3, validator_addrs, batch_size, concurrency)
+    validators = [addresses[vaddr] for vaddr in validator_addrs]
+    balances = get_lntn_balances(
+        w3, account_addrs, validators, block_number, batch_size, concurrency
+    )
 
-    print(to_json(balances, pretty=True))
+    formatted: Dict[str, Dict[str, str]] = {
+        acct: {node: format_newton_quantity(bal) for node, bal in acct_balances.items()}
+        for acct, acct_balances in balances.items()
+    }
+    if len(accounts) <= 1:
+        print(to_json(formatted[account_addrs[0]], pretty=True))
+    else:
+        print(to_json(formatted, pretty=True))
 
 
 account_group.add_command(lntn_balances)
 
 
+# Password and extra entropy used by `_generate_keyfile_task` in process
+# pool workers.
+_new_key_params: Optional[Tuple[str, str]] = None
+
+
+def _set_new_key_params(entropy: str, password: str) -> None:
+    global _new_key_params  # pylint: disable=global-statement
+    _new_key_params = (entropy, password)
+
+
+def _generate_keyfile(entropy: str, password: str) -> EncryptedKeyData:
+    account = eth_account.Account.create(entropy)
+    keyfile_data = create_keyfile_from_private_key(account.key, password)
+    keyfile_addr = get_address_from_keyfile(keyfile_data)
+    if account.address != keyfile_addr:
+        raise ClickException(
+            f"internal error (address-mismatch) {account.address} != {keyfile_addr}"
+        )
+
+    return keyfile_data
+
+
+def _generate_keyfile_task(_: int) -> EncryptedKeyData:
+    assert _new_key_params is not None
+    return _generate_keyfile(*_new_key_params)
+
+
+def _generate_keyfiles(
+    count: int, entropy: str, password: str, processes: int
+) -> Iterator[EncryptedKeyData]:
+    """
+    Generate `count` new keys, yielding the encrypted keyfile data as
+    each is created.  The (deliberately expensive) encryption is
+    performed in `processes` worker processes.
+    """
+
+    if processes == 1:
+        for _ in range(count):
+            yield _generate_keyfile(entropy, password)
+        return
+
+    with ProcessPoolExecutor(
+        processes, initializer=_set_new_key_params, initargs=(entropy, password)
+    ) as executor:
+        yield from executor.map(_generate_keyfile_task, range(count))
+
+
 @command()
 @keystore_option()
 @keyfile_option(required=False, output=True)
@@ -210,23 +319,45 @@ account_group.add_command(lntn_balances)
     is_flag=True,
     help="Echo password input to the terminal",
 )
+@option(
+    "--count",
+    type=IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of keys to create (in the keystore, with the same password).",
+)
+@option(
+    "--processes",
+    type=IntRange(min=1),
+    help="Number of processes used to create keys (with --count).  "
+    "[default: number of CPUs]",
+)
 def new(
     keystore: Optional[str],
     keyfile: Optional[str],
     extra_entropy: Optional[str],
     show_password: bool,
+    count: int,
+    processes: Optional[int],
 ) -> None:
     """
     Create a new key and write it to a keyfile.  If no keyfile is
     specified, a default name is used (consistent with GETH keyfiles)
     in the keystore.
+
+    With --count, several keys are created in parallel, and the address
+    and keyfile of each is printed (one per line) as it is written.
     """
 
+    if count > 1 and keyfile:
+        raise ClickException("--keyfile cannot be used with --count")
+
     # Ask for extra entropy, if requested.
 
     entropy: str = ""
     if extra_entropy:
         if extra_entropy == "-":
+            require_terminal()
             entropy = input("Random string (press ENTER to finish): ")
         else:
             # Use ascii so that binary data is not reinterpreted.
@@ -237,20 +368,36 @@ def new(
     # match.
 
     password = prompt_for_new_password(show_password)
+
+    if count > 1:
+        keystore = config.get_keystore_directory(keystore)
+        os.makedirs(keystore, exist_ok=True)
+        processes = min(processes or os.cpu_count() or 1, count)
+        log(f"Generating {count} private keys ({processes} processes) ...")
+
+        def new_keyfiles() -> Iterator[Tuple[str, EncryptedKeyData]]:
+            assert keystore is not None
+            for keyfile_data in _generate_keyfiles(count, entropy, password, processes):
+                keyfile_addr = get_address_from_keyfile(keyfile_data)
+                new_keyfile = os.path.join(
+                    keystore,
+                    geth_keyfile_name(datetime.now(timezone.utc), keyfile_addr),
+                )
+                yield new_keyfile, keyfile_data
+                # (Resumed once the keyfile has been written.)
+                print(f"{keyfile_addr}  {new_keyfile}", flush=True)
+
+        write_keyfiles(keystore, new_keyfiles())
+        return
+
     log("Generating private key ...")
-    account = eth_account.Account.create(entropy)
-    keyfile_data = create_keyfile_from_private_key(account.key, password)
+    keyfile_data = _generate_keyfile(entropy, password)
     keyfile_addr = get_address_from_keyfile(keyfile_data)
-    if account.address != keyfile_addr:
-        raise ClickException(
-            f"internal error (address-mismatch) {account.address} != {keyfile_addr}"
-        )
 
     # If keyfile was not given, generate a new keyfile based on
     # keystore and the new key details.
     keyfile = new_keyfile_from_options(keystore, keyfile, keyfile_addr)
-    with open(keyfile, "w", encoding="utf8") as key_f:
-        json.dump(keyfile_data, key_f)
+    write_keyfile(keyfile, keyfile_data)
 
     log(f"Encrypted key written to {keyfile}")
 
@@ -292,8 +439,7 @@ def import_private_key(
     keyfile_addr = get_address_from_keyfile(keyfile_data)
 
     keyfile = new_keyfile_from_options(keystore, keyfile, keyfile_addr)
-    with open(keyfile, "w", encoding="utf8") as key_f:
-        json.dump(keyfile_data, key_f)
+    write_keyfile(keyfile, keyfile_data)
 
     log(f"Encrypted key written to {keyfile}")
 
@@ -304,30 +450,128 @@ def import_private_key(
 account_group.add_command(import_private_key)
 
 
+# Number of transactions passed to the process pool at a time, when
+# signing a stream.
+_SIGN_CHUNK_SIZE = 1024
+
+# Private key used by `_sign_tx_line` in process pool workers.
+_signing_key: Optional[PrivateKey] = None
+
+
+def _set_signing_key(private_key: PrivateKey) -> None:
+    global _signing_key  # pylint: disable=global-statement
+    _signing_key = private_key
+
+
+def _sign_tx_line(line: str) -> str:
+    assert _signing_key is not None
+    return to_json(sign_tx_with_private_key(json.loads(line), _signing_key)._asdict())
+
+
+def _sign_tx_stream(
+    lines: Iterable[str], private_key: PrivateKey, processes: int
+) -> Iterator[str]:
+    """
+    Sign a stream of JSON transactions with a single decrypted key,
+    yielding the signed transactions in order.
+    """
+
+    _set_signing_key(private_key)
+    if processes == 1:
+        yield from map(_sign_tx_line, lines)
+        return
+
+    lines = iter(lines)
+    with ProcessPoolExecutor(
+        processes, initializer=_set_signing_key, initargs=(private_key,)
+    ) as executor:
+        while chunk := list(islice(lines, _SIGN_CHUNK_SIZE)):
+            yield from executor.map(
+                _sign_tx_line, chunk, chunksize=max(1, len(chunk) // processes)
+            )
+
+
 @command()
 @keyfile_and_password_options()
+@option(
+    "--ndjson",
+    is_flag=True,
+    help="Read one transaction per line, writing one signed transaction per line.",
+)
+@option(
+    "--processes",
+    type=IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of processes used to sign (with --ndjson).",
+)
 @argument(
     "tx-file",
     type=Path(),
     required=True,
 )
-def signtx(keyfile: Optional[str], password: Optional[str], tx_file: str) -> None:
+def signtx(
+    keyfile: Optional[str],
+    password: Optional[str],
+    ndjson: bool,
+    processes: int,
+    tx_file: str,
+) -> None:
     """
     Sign a transaction using the given keyfile.  Use '-' to read from
     stdin instead of a file.
 
     If password is not given, the env variable 'KEYFILEPWD' is used.
     If that is not set, the user is prompted.
-    """
 
-    # Read tx
-    tx = json.loads(load_from_file_or_stdin(tx_file))
+    With --ndjson, TX_FILE holds newline-delimited transactions, and
+    one signed transaction is written per line as each is signed.  The
+    keyfile is decrypted once for the whole stream.
+    """
 
     # Read keyfile
     keyfile = config.get_keyfile(keyfile)
     log(f"using key file: {keyfile}")
     with open(keyfile, encoding="ascii") as key_f:
         encrypted_key = json.load(key_f)
+    address = get_address_from_keyfile(encrypted_key)
+
+    if ndjson:
+        lines = iter_lines_from_file_or_stdin(tx_file)
+
+        # Use the key agent if it holds the key, otherwise decrypt once.
+        first_line = next(lines, None)
+        if first_line is None:
+            return
+        response = sign_with_agent(
+            {"op": "sign_tx", "address": address, "tx": json.loads(first_line)}
+        )
+        if response is not None:
+            print(to_json(response["signed_tx"]), flush=True)
+            for line in lines:
+                response = agent_request(
+                    {"op": "sign_tx", "address": address, "tx": json.loads(line)}
+                )
+                print(to_json(response["signed_tx"]), flush=True)
+            return
+
+        private_key = decrypt_keyfile(
+            encrypted_key, config.get_keyfile_password(password)
+        )
+        for signed_line in _sign_tx_stream(
+            chain([first_line], lines), private_key, processes
+        ):
+            print(signed_line, flush=True)
+        return
+
+    # Read tx
+    tx = json.loads(load_from_file_or_stdin(tx_file))
+
+    # Use the key agent if it holds the key
+    response = sign_with_agent({"op": "sign_tx", "address": address, "tx": tx})
+    if response is not None:
+        print(to_json(response["signed_tx"]))
+        return
 
     # Read password
     password = config.get_keyfile_password(password)
@@ -378,15 +622,24 @@ def sign_message(
     with open(keyfile, encoding="ascii") as key_f:
         encrypted_key = json.load(key_f)
 
-    # Read password
-    password = config.get_keyfile_password(password)
-    private_key = decrypt_keyfile(encrypted_key, password)
-
-    # Sign the message
-    signature_data = Account().sign_message(
-        signable_message=encode_defunct(text=message), private_key=private_key
+    # Use the key agent if it holds the key, otherwise decrypt the key
+    # and sign the message
+    response = sign_with_agent(
+        {
+            "op": "sign_message",
+            "address": get_address_from_keyfile(encrypted_key),
+            "message": message,
+        }
     )
-    signature = signature_data["signature"].hex()
+    if response is not None:
+        signature = response["signature"]
+    else:
+        password = config.get_keyfile_password(password)
+        private_key = decrypt_keyfile(encrypted_key, password)
+        signature_data = Account().sign_message(
+            signable_message=encode_defunct(text=message), private_key=private_key
+        )
+        signature = signature_data["signature"].hex()
 
     # Optionally write to the output file
     if signature_file:
@@ -399,6 +652,85 @@ def sign_message(
 account_group.add_command(sign_message)
 
 
+@command()
+@keyfile_and_password_options()
+@option(
+    "--socket",
+    "socket_path",
+    metavar="PATH",
+    help=f"Unix socket of the agent (falls back to {AGENT_SOCKET_ENV_VAR} env var "
+    "or ~/.autonity/agent.sock).",
+)
+@option(
+    "--idle-timeout",
+    type=float,
+    default=DEFAULT_AGENT_IDLE_TIMEOUT,
+    show_default=True,
+    help="Exit (dropping all keys) after this many seconds without a request.",
+)
+@option("--add", is_flag=True, help="Decrypt the keyfile and add it to the agent.")
+@option("--list", "list_keys", is_flag=True, help="List the keys held by the agent.")
+@option("--lock", is_flag=True, help="Drop all keys held by the agent.")
+@option("--stop", is_flag=True, help="Stop the running agent.")
+def agent(
+    keyfile: Optional[str],
+    password: Optional[str],
+    socket_path: Optional[str],
+    idle_timeout: float,
+    add: bool,
+    list_keys: bool,
+    lock: bool,
+    stop: bool,
+) -> None:
+    """
+    Run a key agent, which holds decrypted keys in memory for signing
+    commands.
+
+    Without flags, the agent runs in the foreground until stopped, or
+    until it has been idle for the given timeout.  Use --add (in
+    another process) to decrypt a keyfile and add the key to the
+    agent.  While the agent holds the key for a keyfile, `account
+    signtx`, `account sign-message` and `tx sign` delegate signing to
+    it, and no password is required.
+    """
+
+    socket_path = get_agent_socket(socket_path)
+
+    if add or list_keys or lock or stop:
+        if add:
+            keyfile = config.get_keyfile(keyfile)
+            with open(keyfile, encoding="ascii") as key_f:
+                keyfile_data = json.load(key_f)
+            request = {
+                "op": "add",
+                "keyfile": keyfile_data,
+                "password": config.get_keyfile_password(password, keyfile),
+            }
+        else:
+            request = {"op": "list" if list_keys else "lock" if lock else "stop"}
+
+        try:
+            response = agent_request(request, socket_path)
+        except OSError as err:
+            raise ClickException(f"no agent listening on {socket_path}") from err
+        except AgentError as err:
+            raise ClickException(str(err)) from err
+
+        if add:
+            log(f"added key for {response['address']}")
+        for address in response.get("addresses", []):
+            print(address)
+        return
+
+    try:
+        run_agent(socket_path, idle_timeout)
+    except OSError as err:
+        raise ClickException(str(err)) from err
+
+
+account_group.add_command(agent)
+
+
 @command()
 @keyfile_option()
 @from_option
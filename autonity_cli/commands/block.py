@@ -4,10 +4,10 @@ The "block" command group
 
 from typing import Optional
 
-from click import argument, command, group
+from click import ClickException, IntRange, argument, command, group, option
 
-from ..options import rpc_endpoint_option
-from ..user import get_block
+from ..options import batch_size_option, concurrency_option, rpc_endpoint_option
+from ..user import get_block, iter_blocks
 from ..utils import to_json, validate_block_identifier, web3_from_endpoint_arg
 
 
@@ -36,6 +36,48 @@ def get(rpc_endpoint: Optional[str], identifier: str) -> None:
 block_group.add_command(get)
 
 
+@command(name="range")
+@rpc_endpoint_option
+@batch_size_option
+@concurrency_option
+@option(
+    "--full-transactions",
+    "-f",
+    is_flag=True,
+    help="Include full transaction data (by default only hashes are included).",
+)
+@argument("start", type=IntRange(min=0))
+@argument("end", type=IntRange(min=0))
+def range_(
+    rpc_endpoint: Optional[str],
+    batch_size: int,
+    concurrency: int,
+    full_transactions: bool,
+    start: int,
+    end: int,
+) -> None:
+    """
+    Print the blocks from START to END (inclusive), in order, as one
+    JSON object per line.
+    """
+
+    if end < start:
+        raise ClickException("END must not be less than START")
+
+    w3 = web3_from_endpoint_arg(None, rpc_endpoint)
+    block_height = w3.eth.block_number
+    if end > block_height:
+        raise ClickException(f"END exceeds current block height {block_height}")
+
+    for block_data in iter_blocks(
+        w3, start, end, full_transactions, batch_size, concurrency
+    ):
+        print(to_json(block_data))
+
+
+block_group.add_command(range_)
+
+
 @command()
 @rpc_endpoint_option
 def height(rpc_endpoint: Optional[str]) -> None:
@@ -0,0 +1,161 @@
+"""
+The `chain` command group.
+"""
+
+import os
+from typing import Dict, List, Optional, Sequence
+
+from autonity import Autonity
+from autonity.erc20 import ERC20
+from click import Choice, command, group, option
+from web3 import Web3
+from web3.types import ChecksumAddress, TxParams
+
+from .. import config
+from ..chain_params import ChainParams, TokenParams, save_chain_params
+from ..fees import FEE_STRATEGIES, estimate_fees
+from ..logging import log
+from ..options import from_option, keyfile_option, rpc_endpoint_option
+from ..rpc_batch import RPCBatch
+from ..user import estimate_gas_many, get_token_metadata
+from ..utils import (
+    from_address_from_argument_optional,
+    to_checksum_address,
+    web3_from_endpoint_arg,
+)
+
+# pylint: disable=too-many-arguments
+
+
+@group(name="chain")
+def chain_group() -> None:
+    """
+    Commands for recording chain parameters for offline use.
+    """
+
+
+def _estimate_transfer_gas(
+    w3: Web3, sender: ChecksumAddress, tokens: Sequence[ChecksumAddress]
+) -> List[Optional[int]]:
+    """
+    Estimate the gas used by a transfer of each token from `sender` to
+    an address with no balance (the most expensive case), plus the
+    configured gas estimate margin.  Estimates which fail (for example
+    if `sender` holds none of the token) are returned as None.
+    """
+
+    recipient = Web3.to_checksum_address(os.urandom(20))
+    txs: List[TxParams] = []
+    for token in tokens:
+        function = ERC20(w3, token).transfer(recipient, 1)
+        # pylint: disable=protected-access
+        txs.append(
+            {"from": sender, "to": token, "data": function._encode_transaction_data()}
+        )
+
+    margin = config.get_gas_cache_margin()
+    estimates: List[Optional[int]] = []
+    for token, estimate in zip(tokens, estimate_gas_many(w3, txs)):
+        if isinstance(estimate, Exception):
+            log(f"failed to estimate transfer gas for {token}: {estimate}")
+            estimates.append(None)
+        else:
+            estimates.append(int(estimate * (100 + margin) / 100))
+
+    return estimates
+
+
+@command()
+@rpc_endpoint_option
+@keyfile_option()
+@from_option
+@option(
+    "--account",
+    "-a",
+    "accounts",
+    multiple=True,
+    help="Record the pending nonce of this account (may be repeated).",
+)
+@option(
+    "--token",
+    "-t",
+    "tokens",
+    multiple=True,
+    help="Record metadata of this ERC20 token (may be repeated).  NTN is "
+    "always included.",
+)
+@option(
+    "--fee-strategy",
+    type=Choice(list(FEE_STRATEGIES)),
+    default="normal",
+    show_default=True,
+    help="strategy used to compute the recorded fees.",
+)
+def sync_params(
+    rpc_endpoint: Optional[str],
+    keyfile: Optional[str],
+    from_str: Optional[str],
+    accounts: Sequence[str],
+    tokens: Sequence[str],
+    fee_strategy: str,
+) -> None:
+    """
+    Record the chain id, current fees, token metadata and account
+    nonces, for use by `aut tx make --offline`.  The parameters are
+    written to the chain parameters file (see the `chain_params` config
+    entry), which can be copied to a host without network access.
+
+    The account given by --from or --keyfile (if any) is included in
+    the accounts, and is used to estimate the gas of token transfers.
+    """
+
+    w3 = web3_from_endpoint_arg(None, rpc_endpoint)
+    from_addr = from_address_from_argument_optional(from_str, keyfile)
+
+    addresses = [to_checksum_address(account) for account in accounts]
+    if from_addr and from_addr not in addresses:
+        addresses.insert(0, from_addr)
+
+    token_addresses = [Autonity.address()]
+    for token in tokens:
+        token_address = to_checksum_address(token)
+        if token_address not in token_addresses:
+            token_addresses.append(token_address)
+
+    # Chain id, block number and pending nonces in a single batch.
+    batch = RPCBatch(w3)
+    batch.add("eth_chainId", [])
+    batch.add("eth_blockNumber", [])
+    for address in addresses:
+        batch.add("eth_getTransactionCount", [address, "pending"])
+    chain_id, block_number, *pending_counts = batch.execute()
+
+    max_fee, priority_fee = estimate_fees(w3, fee_strategy)
+
+    token_params: Dict[str, TokenParams] = {}
+    for token_address in token_addresses:
+        metadata = get_token_metadata(w3, token_address)
+        token_params[token_address] = {
+            "name": metadata["name"],
+            "symbol": metadata["symbol"],
+            "decimals": metadata["decimals"],
+        }
+
+    if from_addr:
+        transfer_gas = _estimate_transfer_gas(w3, from_addr, token_addresses)
+        for token_address, gas in zip(token_addresses, transfer_gas):
+            if gas is not None:
+                token_params[token_address]["transfer_gas"] = gas
+
+    params: ChainParams = {
+        "chain_id": chain_id,
+        "synced_at_block": block_number,
+        "max_fee_per_gas": max_fee,
+        "max_priority_fee_per_gas": priority_fee,
+        "tokens": token_params,
+        "nonces": dict(zip(addresses, pending_counts)),
+    }
+    save_chain_params(params)
+
+
+chain_group.add_command(sync_params)
@@ -16,6 +16,7 @@ from web3.contract.contract import ContractFunction
 
 from ..logging import log
 from ..options import (
+    block_option,
     contract_options,
     from_option,
     keyfile_option,
@@ -23,7 +24,9 @@ from ..options import (
     tx_aux_options,
     tx_value_option,
 )
+from ..user import call_functions
 from ..utils import (
+    block_from_option,
     contract_address_and_abi_from_args,
     create_contract_tx_from_args,
     finalize_tx_from_args,
@@ -102,6 +105,7 @@ def deploy_cmd(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     value: Optional[str],
     chain_id: Optional[int],
@@ -139,6 +143,7 @@ def deploy_cmd(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -154,11 +159,13 @@ contract_group.add_command(deploy_cmd)
 
 @command(name="call")
 @rpc_endpoint_option
+@block_option
 @contract_options
 @argument("method")
 @argument("parameters", nargs=-1)
 def call_cmd(
     rpc_endpoint: Optional[str],
+    block_str: Optional[str],
     contract_address_str: Optional[str],
     contract_abi_path: Optional[str],
     method: str,
@@ -168,7 +175,7 @@ def call_cmd(
     Execute a contract call on the connected node, and print the result.
     """
 
-    function, abi_fn, _ = function_call_from_args(
+    function, abi_fn, w3 = function_call_from_args(
         rpc_endpoint,
         contract_address_str,
         contract_abi_path,
@@ -176,7 +183,7 @@ def call_cmd(
         parameters,
     )
 
-    result = function.call()
+    result = call_functions(w3, [function], block_from_option(block_str))[0]
     parsed_result = parse_return_value(abi_fn, result)
     print(to_json(parsed_result))
 
@@ -206,6 +213,7 @@ def tx_cmd(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     value: Optional[str],
     chain_id: Optional[int],
@@ -236,6 +244,7 @@ def tx_cmd(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
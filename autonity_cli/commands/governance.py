@@ -40,6 +40,7 @@ def set_max_bond_applied_gas(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     gas_value_str: str,
@@ -61,6 +62,7 @@ def set_max_bond_applied_gas(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -85,6 +87,7 @@ def set_max_unbond_applied_gas(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     gas_value_str: str,
@@ -106,6 +109,7 @@ def set_max_unbond_applied_gas(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -130,6 +134,7 @@ def set_max_unbond_released_gas(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     gas_value_str: str,
@@ -151,6 +156,7 @@ def set_max_unbond_released_gas(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -175,6 +181,7 @@ def set_max_rewards_distribution_gas(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     gas_value_str: str,
@@ -196,6 +203,7 @@ def set_max_rewards_distribution_gas(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -220,6 +228,7 @@ def set_staking_gas_price(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     gas_value_str: str,
@@ -241,6 +250,7 @@ def set_staking_gas_price(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -265,6 +275,7 @@ def set_minimum_base_fee(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     base_fee_str: str,
@@ -286,6 +297,7 @@ def set_minimum_base_fee(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -310,6 +322,7 @@ def set_committee_size(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     committee_size: int,
@@ -330,6 +343,7 @@ def set_committee_size(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -354,6 +368,7 @@ def set_unbonding_period(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     unbonding_period: int,
@@ -374,6 +389,7 @@ def set_unbonding_period(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -398,6 +414,7 @@ def set_epoch_period(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     epoch_period: int,
@@ -418,6 +435,7 @@ def set_epoch_period(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -442,6 +460,7 @@ def set_operator_account(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     operator_address_str: str,
@@ -463,6 +482,7 @@ def set_operator_account(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -487,6 +507,7 @@ def set_treasury_account(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     treasury_address_str: str,
@@ -508,6 +529,7 @@ def set_treasury_account(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -532,6 +554,7 @@ def set_treasury_fee(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     treasury_fee_str: str,
@@ -553,6 +576,7 @@ def set_treasury_fee(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -577,6 +601,7 @@ def set_accountability_contract(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     contract_address_str: str,
@@ -598,6 +623,7 @@ def set_accountability_contract(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -622,6 +648,7 @@ def set_oracle_contract(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     contract_address_str: str,
@@ -643,6 +670,7 @@ def set_oracle_contract(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -667,6 +695,7 @@ def set_acu_contract(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     contract_address_str: str,
@@ -688,6 +717,7 @@ def set_acu_contract(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -712,6 +742,7 @@ def set_supply_control_contract(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     contract_address_str: str,
@@ -733,6 +764,7 @@ def set_supply_control_contract(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -757,6 +789,7 @@ def set_stabilization_contract(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     contract_address_str: str,
@@ -778,6 +811,7 @@ def set_stabilization_contract(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -802,6 +836,7 @@ def set_inflation_controller_contract(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     contract_address_str: str,
@@ -823,6 +858,7 @@ def set_inflation_controller_contract(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -847,6 +883,7 @@ def set_upgrade_manager_contract(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     contract_address_str: str,
@@ -868,6 +905,7 @@ def set_upgrade_manager_contract(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -892,6 +930,7 @@ def set_non_stakable_vesting_contract(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     contract_address_str: str,
@@ -913,6 +952,7 @@ def set_non_stakable_vesting_contract(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -938,6 +978,7 @@ def mint(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     amount_str: str,
@@ -964,6 +1005,7 @@ def mint(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -989,6 +1031,7 @@ def burn(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     amount_str: str,
@@ -1014,6 +1057,7 @@ def burn(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
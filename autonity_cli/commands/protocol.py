@@ -2,13 +2,24 @@
 The `protocol` command group.
 """
 
-from typing import Any, Optional, Sequence
+from typing import Any, Optional, Sequence, Tuple
 
 from autonity.autonity import AUTONITY_CONTRACT_ADDRESS, Autonity
-from click import argument, command, echo, group
-
-from ..options import rpc_endpoint_option
-from ..utils import autonity_from_endpoint_arg, to_json, web3_from_endpoint_arg
+from click import BadParameter, Context, Parameter, argument, command, echo, group
+
+from ..options import (
+    batch_size_option,
+    block_option,
+    concurrency_option,
+    rpc_endpoint_option,
+)
+from ..user import (
+    PROTOCOL_GETTERS,
+    call_functions,
+    get_protocol_snapshot,
+    get_protocol_values,
+)
+from ..utils import block_from_option, to_json, web3_from_endpoint_arg
 
 # pylint: disable=too-many-arguments
 # pylint: disable=too-many-locals
@@ -31,14 +42,39 @@ def _show_json(value: Any) -> str:
     return to_json(value, pretty=True)
 
 
+def _get(rpc_endpoint: Optional[str], block_str: Optional[str], getter: str) -> Any:
+    """
+    Evaluate a getter (see PROTOCOL_GETTERS) at the given block.
+    """
+    w3 = web3_from_endpoint_arg(None, rpc_endpoint)
+    return get_protocol_values(w3, [getter], block_from_option(block_str))[getter]
+
+
+def _call(
+    rpc_endpoint: Optional[str],
+    block_str: Optional[str],
+    function_name: str,
+    *args: Any,
+) -> Any:
+    """
+    Call a function of the Autonity contract at the given block.
+    """
+    w3 = web3_from_endpoint_arg(None, rpc_endpoint)
+    function = getattr(Autonity(w3).contract.functions, function_name)(*args)
+    return call_functions(w3, [function], block_from_option(block_str))[0]
+
+
 @command()
 @rpc_endpoint_option
-def commission_rate_precision(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def commission_rate_precision(
+    rpc_endpoint: Optional[str], block_str: Optional[str]
+) -> None:
     """
     Precision of validator commission rate values
     """
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).commission_rate_precision())
+    print(_get(rpc_endpoint, block_str, "commission_rate_precision"))
 
 
 protocol_group.add_command(commission_rate_precision)
@@ -46,12 +82,13 @@ protocol_group.add_command(commission_rate_precision)
 
 @command()
 @rpc_endpoint_option
-def max_bond_applied_gas(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def max_bond_applied_gas(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """
     Max allowed gas for notifying delegator about bonding
     """
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).max_bond_applied_gas())
+    print(_get(rpc_endpoint, block_str, "max_bond_applied_gas"))
 
 
 protocol_group.add_command(max_bond_applied_gas)
@@ -59,12 +96,15 @@ protocol_group.add_command(max_bond_applied_gas)
 
 @command()
 @rpc_endpoint_option
-def max_unbond_applied_gas(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def max_unbond_applied_gas(
+    rpc_endpoint: Optional[str], block_str: Optional[str]
+) -> None:
     """
     Max allowed gas for notifying delegator about unbonding
     """
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).max_unbond_applied_gas())
+    print(_get(rpc_endpoint, block_str, "max_unbond_applied_gas"))
 
 
 protocol_group.add_command(max_unbond_applied_gas)
@@ -72,12 +112,15 @@ protocol_group.add_command(max_unbond_applied_gas)
 
 @command()
 @rpc_endpoint_option
-def max_unbond_released_gas(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def max_unbond_released_gas(
+    rpc_endpoint: Optional[str], block_str: Optional[str]
+) -> None:
     """
     Max allowed gas for notifying delegator about bond being released
     """
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).max_unbond_released_gas())
+    print(_get(rpc_endpoint, block_str, "max_unbond_released_gas"))
 
 
 protocol_group.add_command(max_unbond_released_gas)
@@ -85,12 +128,15 @@ protocol_group.add_command(max_unbond_released_gas)
 
 @command()
 @rpc_endpoint_option
-def max_rewards_distribution_gas(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def max_rewards_distribution_gas(
+    rpc_endpoint: Optional[str], block_str: Optional[str]
+) -> None:
     """
     Max allowed gas for notifying delegator about rewards being distributed
     """
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).max_rewards_distribution_gas())
+    print(_get(rpc_endpoint, block_str, "max_rewards_distribution_gas"))
 
 
 protocol_group.add_command(max_rewards_distribution_gas)
@@ -98,12 +144,13 @@ protocol_group.add_command(max_rewards_distribution_gas)
 
 @command()
 @rpc_endpoint_option
-def config(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def config(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """
     Print the Autonity contract config
     """
 
-    print(_show_json(autonity_from_endpoint_arg(rpc_endpoint).config()))
+    print(_show_json(_get(rpc_endpoint, block_str, "config")))
 
 
 protocol_group.add_command(config)
@@ -111,12 +158,13 @@ protocol_group.add_command(config)
 
 @command()
 @rpc_endpoint_option
-def epoch_id(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def epoch_id(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """
     ID of current epoch
     """
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).epoch_id())
+    print(_get(rpc_endpoint, block_str, "epoch_id"))
 
 
 protocol_group.add_command(epoch_id)
@@ -124,12 +172,13 @@ protocol_group.add_command(epoch_id)
 
 @command()
 @rpc_endpoint_option
-def last_epoch_time(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def last_epoch_time(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """
     Timestamp of the last epoch
     """
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).last_epoch_time())
+    print(_get(rpc_endpoint, block_str, "last_epoch_time"))
 
 
 protocol_group.add_command(last_epoch_time)
@@ -137,12 +186,15 @@ protocol_group.add_command(last_epoch_time)
 
 @command()
 @rpc_endpoint_option
-def epoch_total_bonded_stake(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def epoch_total_bonded_stake(
+    rpc_endpoint: Optional[str], block_str: Optional[str]
+) -> None:
     """
     Total stake bonded this epoch
     """
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).epoch_total_bonded_stake())
+    print(_get(rpc_endpoint, block_str, "epoch_total_bonded_stake"))
 
 
 protocol_group.add_command(epoch_total_bonded_stake)
@@ -150,12 +202,15 @@ protocol_group.add_command(epoch_total_bonded_stake)
 
 @command()
 @rpc_endpoint_option
-def atn_total_redistributed(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def atn_total_redistributed(
+    rpc_endpoint: Optional[str], block_str: Optional[str]
+) -> None:
     """
     Total fees redistributed
     """
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).atn_total_redistributed())
+    print(_get(rpc_endpoint, block_str, "atn_total_redistributed"))
 
 
 protocol_group.add_command(atn_total_redistributed)
@@ -163,12 +218,13 @@ protocol_group.add_command(atn_total_redistributed)
 
 @command()
 @rpc_endpoint_option
-def epoch_reward(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def epoch_reward(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """
     Reward for this epoch
     """
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).epoch_reward())
+    print(_get(rpc_endpoint, block_str, "epoch_reward"))
 
 
 protocol_group.add_command(epoch_reward)
@@ -176,12 +232,13 @@ protocol_group.add_command(epoch_reward)
 
 @command()
 @rpc_endpoint_option
-def staking_gas_price(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def staking_gas_price(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """
     The gas price to notify the delegator about the staking operation at epoch end
     """
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).staking_gas_price())
+    print(_get(rpc_endpoint, block_str, "staking_gas_price"))
 
 
 protocol_group.add_command(staking_gas_price)
@@ -189,12 +246,13 @@ protocol_group.add_command(staking_gas_price)
 
 @command()
 @rpc_endpoint_option
-def inflation_reserve(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def inflation_reserve(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """
     The inflation reserve
     """
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).inflation_reserve())
+    print(_get(rpc_endpoint, block_str, "inflation_reserve"))
 
 
 protocol_group.add_command(inflation_reserve)
@@ -202,12 +260,13 @@ protocol_group.add_command(inflation_reserve)
 
 @command()
 @rpc_endpoint_option
-def deployer(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def deployer(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """
     Contract deployer
     """
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).deployer())
+    print(_get(rpc_endpoint, block_str, "deployer"))
 
 
 protocol_group.add_command(deployer)
@@ -215,10 +274,11 @@ protocol_group.add_command(deployer)
 
 @command()
 @rpc_endpoint_option
-def epoch_period(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def epoch_period(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """Epoch period in blocks"""
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).get_epoch_period())
+    print(_get(rpc_endpoint, block_str, "epoch_period"))
 
 
 protocol_group.add_command(epoch_period)
@@ -226,10 +286,11 @@ protocol_group.add_command(epoch_period)
 
 @command()
 @rpc_endpoint_option
-def block_period(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def block_period(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """Block period in seconds"""
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).get_block_period())
+    print(_get(rpc_endpoint, block_str, "block_period"))
 
 
 protocol_group.add_command(block_period)
@@ -237,10 +298,11 @@ protocol_group.add_command(block_period)
 
 @command()
 @rpc_endpoint_option
-def unbonding_period(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def unbonding_period(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """Unbonding period in blocks"""
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).get_unbonding_period())
+    print(_get(rpc_endpoint, block_str, "unbonding_period"))
 
 
 protocol_group.add_command(unbonding_period)
@@ -248,12 +310,13 @@ protocol_group.add_command(unbonding_period)
 
 @command()
 @rpc_endpoint_option
-def last_epoch_block(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def last_epoch_block(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """
     Block number of the last epoch
     """
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).get_last_epoch_block())
+    print(_get(rpc_endpoint, block_str, "last_epoch_block"))
 
 
 protocol_group.add_command(last_epoch_block)
@@ -261,10 +324,11 @@ protocol_group.add_command(last_epoch_block)
 
 @command()
 @rpc_endpoint_option
-def version(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def version(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """Contract version"""
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).get_version())
+    print(_get(rpc_endpoint, block_str, "version"))
 
 
 protocol_group.add_command(version)
@@ -272,12 +336,13 @@ protocol_group.add_command(version)
 
 @command()
 @rpc_endpoint_option
-def committee(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def committee(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """
     Get current committee
     """
 
-    print(_show_json(autonity_from_endpoint_arg(rpc_endpoint).get_committee()))
+    print(_show_json(_get(rpc_endpoint, block_str, "committee")))
 
 
 protocol_group.add_command(committee)
@@ -285,10 +350,11 @@ protocol_group.add_command(committee)
 
 @command()
 @rpc_endpoint_option
-def validators(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def validators(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """Get current validators"""
 
-    print(_show_sequence(autonity_from_endpoint_arg(rpc_endpoint).get_validators()))
+    print(_show_sequence(_get(rpc_endpoint, block_str, "validators")))
 
 
 protocol_group.add_command(validators)
@@ -296,10 +362,11 @@ protocol_group.add_command(validators)
 
 @command()
 @rpc_endpoint_option
-def treasury_account(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def treasury_account(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """Treasury account address"""
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).get_treasury_account())
+    print(_get(rpc_endpoint, block_str, "treasury_account"))
 
 
 protocol_group.add_command(treasury_account)
@@ -307,10 +374,11 @@ protocol_group.add_command(treasury_account)
 
 @command()
 @rpc_endpoint_option
-def treasury_fee(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def treasury_fee(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """Treasury fee"""
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).get_treasury_fee())
+    print(_get(rpc_endpoint, block_str, "treasury_fee"))
 
 
 protocol_group.add_command(treasury_fee)
@@ -318,10 +386,11 @@ protocol_group.add_command(treasury_fee)
 
 @command()
 @rpc_endpoint_option
-def max_committee_size(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def max_committee_size(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """Maximum committee size"""
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).get_max_committee_size())
+    print(_get(rpc_endpoint, block_str, "max_committee_size"))
 
 
 protocol_group.add_command(max_committee_size)
@@ -329,10 +398,11 @@ protocol_group.add_command(max_committee_size)
 
 @command()
 @rpc_endpoint_option
-def committee_enodes(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def committee_enodes(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """Enodes in current committee"""
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).get_committee_enodes())
+    print(_get(rpc_endpoint, block_str, "committee_enodes"))
 
 
 protocol_group.add_command(committee_enodes)
@@ -340,10 +410,11 @@ protocol_group.add_command(committee_enodes)
 
 @command()
 @rpc_endpoint_option
-def minimum_base_fee(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def minimum_base_fee(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """Minimum base fee"""
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).get_minimum_base_fee())
+    print(_get(rpc_endpoint, block_str, "minimum_base_fee"))
 
 
 protocol_group.add_command(minimum_base_fee)
@@ -351,10 +422,11 @@ protocol_group.add_command(minimum_base_fee)
 
 @command()
 @rpc_endpoint_option
-def operator(rpc_endpoint: Optional[str]) -> None:
+@block_option
+def operator(rpc_endpoint: Optional[str], block_str: Optional[str]) -> None:
     """The governance operator"""
 
-    print(autonity_from_endpoint_arg(rpc_endpoint).get_operator())
+    print(_get(rpc_endpoint, block_str, "operator"))
 
 
 protocol_group.add_command(operator)
@@ -362,15 +434,17 @@ protocol_group.add_command(operator)
 
 @command()
 @rpc_endpoint_option
+@block_option
 @argument("height", type=int, nargs=1)
 @argument("round_", metavar="ROUND", type=int, nargs=1)
-def proposer(rpc_endpoint: Optional[str], height: int, round_: int) -> None:
+def proposer(
+    rpc_endpoint: Optional[str], block_str: Optional[str], height: int, round_: int
+) -> None:
     """
     Proposer at the given height and round
     """
 
-    aut = Autonity(web3_from_endpoint_arg(None, rpc_endpoint))
-    print(aut.get_proposer(height, round_))
+    print(_call(rpc_endpoint, block_str, "getProposer", height, round_))
 
 
 protocol_group.add_command(proposer)
@@ -392,14 +466,16 @@ protocol_group.add_command(proposer)
 
 @command()
 @rpc_endpoint_option
+@block_option
 @argument("unbonding_id", type=int, nargs=1)
-def reverting_amount(rpc_endpoint: Optional[str], unbonding_id: int) -> None:
+def reverting_amount(
+    rpc_endpoint: Optional[str], block_str: Optional[str], unbonding_id: int
+) -> None:
     """
     Get the amount of LNTN or NTN bonded when the released unbonding was reverted
     """
 
-    aut = Autonity(web3_from_endpoint_arg(None, rpc_endpoint))
-    print(aut.get_reverting_amount(unbonding_id))
+    print(_call(rpc_endpoint, block_str, "getRevertingAmount", unbonding_id))
 
 
 protocol_group.add_command(reverting_amount)
@@ -407,12 +483,14 @@ protocol_group.add_command(reverting_amount)
 
 @command()
 @rpc_endpoint_option
+@block_option
 @argument("block", type=int, nargs=1)
-def epoch_from_block(rpc_endpoint: Optional[str], block: int) -> None:
+def epoch_from_block(
+    rpc_endpoint: Optional[str], block_str: Optional[str], block: int
+) -> None:
     """Get the epoch of the given block"""
 
-    aut = Autonity(web3_from_endpoint_arg(None, rpc_endpoint))
-    print(aut.get_epoch_from_block(block))
+    print(_call(rpc_endpoint, block_str, "getEpochFromBlock", block))
 
 
 protocol_group.add_command(epoch_from_block)
@@ -428,3 +506,54 @@ def contract_address() -> None:
 
 
 protocol_group.add_command(contract_address)
+
+
+def _validate_getters(
+    _ctx: Context, _param: Parameter, getters: Tuple[str, ...]
+) -> Tuple[str, ...]:
+    # Accept the command names (epoch-id) as well as the JSON keys
+    # (epoch_id).
+    getters = tuple(getter.replace("-", "_") for getter in getters)
+    for getter in getters:
+        if getter not in PROTOCOL_GETTERS:
+            raise BadParameter(
+                f"unknown getter {getter} (choose from {', '.join(PROTOCOL_GETTERS)})"
+            )
+    return getters
+
+
+@command()
+@rpc_endpoint_option
+@block_option
+@batch_size_option
+@concurrency_option
+@argument("getters", metavar="GETTER...", nargs=-1, callback=_validate_getters)
+def snapshot(
+    rpc_endpoint: Optional[str],
+    block_str: Optional[str],
+    batch_size: int,
+    concurrency: int,
+    getters: Tuple[str, ...],
+) -> None:
+    """
+    Print the values of all (or the given) getters of the Autonity
+    contract, as a single JSON document.  Getters are named as the
+    commands in this group (for example, epoch-id or minimum-base-fee),
+    and are evaluated with batched requests at a single block.
+    """
+
+    w3 = web3_from_endpoint_arg(None, rpc_endpoint)
+    print(
+        _show_json(
+            get_protocol_snapshot(
+                w3,
+                getters or list(PROTOCOL_GETTERS),
+                block_from_option(block_str),
+                batch_size,
+                concurrency,
+            )
+        )
+    )
+
+
+protocol_group.add_command(snapshot)
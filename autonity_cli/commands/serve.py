@@ -0,0 +1,51 @@
+"""
+The `serve` command.
+"""
+
+from typing import Optional
+
+from click import ClickException, command, option
+
+from ..daemon import DAEMON_SOCKET_ENV_VAR, get_daemon_socket, serve, stop_daemon
+
+
+@command(name="serve")
+@option(
+    "--socket",
+    "socket_path",
+    metavar="PATH",
+    help=f"Unix socket to listen on (falls back to {DAEMON_SOCKET_ENV_VAR} env var "
+    "or ~/.autonity/aut.sock).",
+)
+@option(
+    "--idle-timeout",
+    type=float,
+    help="Exit after this many seconds without a request.",
+)
+@option("--stop", is_flag=True, help="Stop the running daemon and exit.")
+def serve_cmd(
+    socket_path: Optional[str], idle_timeout: Optional[float], stop: bool
+) -> None:
+    """
+    Run a local daemon which executes aut commands on behalf of other
+    aut invocations.
+
+    While the daemon is running, aut commands are forwarded to it,
+    avoiding the startup cost of each process.  Each command runs in a
+    process forked from the daemon, reusing its loaded modules and
+    contracts.  Commands which
+    need to prompt for input (e.g. passwords) are still run locally.
+    Set AUT_NO_DAEMON=1 to disable forwarding.
+    """
+
+    socket_path = get_daemon_socket(socket_path)
+
+    if stop:
+        if not stop_daemon(socket_path):
+            raise ClickException(f"no daemon listening on {socket_path}")
+        return
+
+    try:
+        serve(socket_path, idle_timeout)
+    except OSError as err:
+        raise ClickException(str(err)) from err
@@ -6,19 +6,24 @@ from typing import Optional
 
 from autonity.erc20 import ERC20
 from autonity.utils.denominations import format_quantity
-from click import ClickException, argument, command, group
+from click import ClickException, argument, command, group, option
 from web3 import Web3
 
+from ..cache import chain_cache
 from ..options import (
+    block_option,
     from_option,
     keyfile_option,
     newton_or_token_option,
     rpc_endpoint_option,
     tx_aux_options,
 )
+from ..user import TOKEN_METADATA_NAMESPACE, call_functions, get_token_metadata
 from ..utils import (
+    block_from_option,
     create_contract_tx_from_args,
     from_address_from_argument,
+    newton_or_token_to_address,
     newton_or_token_to_address_require,
     parse_token_value_representation,
     to_json,
@@ -46,8 +51,7 @@ def name(rpc_endpoint: Optional[str], ntn: bool, token: Optional[str]) -> None:
 
     token_addresss = newton_or_token_to_address_require(ntn, token)
     w3 = web3_from_endpoint_arg(None, rpc_endpoint)
-    erc = ERC20(w3, token_addresss)
-    token_name = erc.name()
+    token_name = get_token_metadata(w3, token_addresss)["name"]
     if token_name is None:
         raise ValueError("Token does not implement the name call")
     print(token_name)
@@ -66,8 +70,7 @@ def symbol(rpc_endpoint: Optional[str], ntn: bool, token: Optional[str]) -> None
 
     token_addresss = newton_or_token_to_address_require(ntn, token)
     w3 = web3_from_endpoint_arg(None, rpc_endpoint)
-    erc = ERC20(w3, token_addresss)
-    token_symbol = erc.symbol()
+    token_symbol = get_token_metadata(w3, token_addresss)["symbol"]
     if token_symbol is None:
         raise ClickException("Token does not implement the symbol call")
     print(token_symbol)
@@ -86,8 +89,7 @@ def decimals(rpc_endpoint: Optional[str], ntn: bool, token: Optional[str]) -> No
 
     token_addresss = newton_or_token_to_address_require(ntn, token)
     w3 = web3_from_endpoint_arg(None, rpc_endpoint)
-    erc = ERC20(w3, token_addresss)
-    print(erc.decimals())
+    print(get_token_metadata(w3, token_addresss)["decimals"])
 
 
 token_group.add_command(decimals)
@@ -95,8 +97,14 @@ token_group.add_command(decimals)
 
 @command()
 @rpc_endpoint_option
+@block_option
 @newton_or_token_option
-def total_supply(rpc_endpoint: Optional[str], ntn: bool, token: Optional[str]) -> None:
+def total_supply(
+    rpc_endpoint: Optional[str],
+    block_str: Optional[str],
+    ntn: bool,
+    token: Optional[str],
+) -> None:
     """
     Total supply (in units of whole Tokens).
     """
@@ -104,8 +112,10 @@ def total_supply(rpc_endpoint: Optional[str], ntn: bool, token: Optional[str]) -
     token_addresss = newton_or_token_to_address_require(ntn, token)
     w3 = web3_from_endpoint_arg(None, rpc_endpoint)
     erc = ERC20(w3, token_addresss)
-    token_decimals = erc.decimals()
-    token_total_supply = erc.total_supply()
+    token_decimals = get_token_metadata(w3, token_addresss)["decimals"]
+    token_total_supply = call_functions(
+        w3, [erc.contract.functions.totalSupply()], block_from_option(block_str)
+    )[0]
     print(format_quantity(token_total_supply, token_decimals))
 
 
@@ -114,11 +124,13 @@ token_group.add_command(total_supply)
 
 @command()
 @rpc_endpoint_option
+@block_option
 @newton_or_token_option
 @keyfile_option()
 @argument("account_str", metavar="ACCOUNT", required=False)
 def balance_of(
     rpc_endpoint: Optional[str],
+    block_str: Optional[str],
     ntn: bool,
     token: Optional[str],
     keyfile: Optional[str],
@@ -134,8 +146,12 @@ def balance_of(
 
     w3 = web3_from_endpoint_arg(None, rpc_endpoint)
     erc = ERC20(w3, token_addresss)
-    balance = erc.balance_of(account_addr)
-    token_decimals = erc.decimals()
+    balance = call_functions(
+        w3,
+        [erc.contract.functions.balanceOf(account_addr)],
+        block_from_option(block_str),
+    )[0]
+    token_decimals = get_token_metadata(w3, token_addresss)["decimals"]
     print(format_quantity(balance, token_decimals))
 
 
@@ -144,12 +160,14 @@ token_group.add_command(balance_of)
 
 @command()
 @rpc_endpoint_option
+@block_option
 @newton_or_token_option
 @keyfile_option()
 @from_option
 @argument("owner")
 def allowance(
     rpc_endpoint: Optional[str],
+    block_str: Optional[str],
     ntn: bool,
     token: Optional[str],
     keyfile: Optional[str],
@@ -167,8 +185,12 @@ def allowance(
 
     w3 = web3_from_endpoint_arg(None, rpc_endpoint)
     erc = ERC20(w3, token_addresss)
-    token_allowance = erc.allowance(owner_addr, from_addr)
-    token_decimals = erc.decimals()
+    token_allowance = call_functions(
+        w3,
+        [erc.contract.functions.allowance(owner_addr, from_addr)],
+        block_from_option(block_str),
+    )[0]
+    token_decimals = get_token_metadata(w3, token_addresss)["decimals"]
     print(format_quantity(token_allowance, token_decimals))
 
 
@@ -194,6 +216,7 @@ def transfer(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     recipient_str: str,
@@ -211,7 +234,7 @@ def transfer(
     w3 = web3_from_endpoint_arg(None, rpc_endpoint)
     erc = ERC20(w3, token_addresss)
 
-    token_decimals = erc.decimals()
+    token_decimals = get_token_metadata(w3, token_addresss)["decimals"]
     amount = parse_token_value_representation(amount_str, token_decimals)
 
     function_call = erc.transfer(recipient_addr, amount)
@@ -223,6 +246,7 @@ def transfer(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -252,6 +276,7 @@ def approve(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     spender_str: str,
@@ -270,7 +295,7 @@ def approve(
     w3 = web3_from_endpoint_arg(None, rpc_endpoint)
     erc = ERC20(w3, token_addresss)
 
-    token_decimals = erc.decimals()
+    token_decimals = get_token_metadata(w3, token_addresss)["decimals"]
     amount = parse_token_value_representation(amount_str, token_decimals)
 
     function_call = erc.approve(spender, amount)
@@ -282,6 +307,7 @@ def approve(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -312,6 +338,7 @@ def transfer_from(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     spender_str: str,
@@ -333,7 +360,7 @@ def transfer_from(
     w3 = web3_from_endpoint_arg(None, rpc_endpoint)
     erc = ERC20(w3, token_addresss)
 
-    token_decimals = erc.decimals()
+    token_decimals = get_token_metadata(w3, token_addresss)["decimals"]
     amount = parse_token_value_representation(amount_str, token_decimals)
 
     function_call = erc.transfer_from(spender, recipient, amount)
@@ -345,6 +372,7 @@ def transfer_from(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -353,3 +381,41 @@ def transfer_from(
 
 
 token_group.add_command(transfer_from)
+
+
+@command()
+@rpc_endpoint_option
+@newton_or_token_option
+@option(
+    "--clear",
+    is_flag=True,
+    help="Remove the cached metadata of the token (or all tokens if none is given).",
+)
+def cache(
+    rpc_endpoint: Optional[str], ntn: bool, token: Optional[str], clear: bool
+) -> None:
+    """
+    Manage the cached token metadata (name, symbol and decimals).  By
+    default, re-fetch the metadata of the given token, update the
+    cache and print the result.
+    """
+
+    w3 = web3_from_endpoint_arg(None, rpc_endpoint)
+
+    if clear:
+        token_cache = chain_cache(w3)
+        if token_cache is None:
+            raise ClickException("cache is disabled")
+
+        token_address = newton_or_token_to_address(ntn, token)
+        if token_address:
+            token_cache.remove(TOKEN_METADATA_NAMESPACE, token_address)
+        else:
+            token_cache.clear(TOKEN_METADATA_NAMESPACE)
+        return
+
+    token_address = newton_or_token_to_address_require(ntn, token)
+    print(to_json(get_token_metadata(w3, token_address, refresh=True), pretty=True))
+
+
+token_group.add_command(cache)
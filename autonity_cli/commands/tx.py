@@ -2,35 +2,80 @@
 The `tx` command group.
 """
 
-import asyncio
+import csv
 import json
-from typing import Optional
+import time
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Optional, Sequence, Tuple, cast
 
+from autonity import Autonity
 from autonity.erc20 import ERC20
-from autonity.utils.tx import send_tx, wait_for_tx
-from click import ClickException, Path, argument, command, group, option
+from autonity.utils.keyfile import decrypt_keyfile, get_address_from_keyfile
+from autonity.utils.tx import send_tx, sign_tx_with_private_key
+from click import (
+    ClickException,
+    IntRange,
+    Path,
+    argument,
+    command,
+    echo,
+    group,
+    option,
+)
+from eth_account import Account
 from eth_account.account import SignedTransaction
 from web3 import Web3
-from web3.types import HexBytes, HexStr
+from web3.types import (
+    AccessList,
+    ChecksumAddress,
+    HexBytes,
+    HexStr,
+    Nonce,
+    TxData,
+    TxParams,
+)
 
 from .account import signtx
+from .. import config
+from ..chain_params import PLAIN_TRANSFER_GAS, load_chain_params, offline_web3
+from ..fees import DEFAULT_PRICE_BUMP, get_next_base_fee, replacement_fees
 from ..logging import log
 from ..options import (
+    batch_size_option,
+    concurrency_option,
     from_option,
+    keyfile_and_password_options,
     keyfile_option,
     newton_or_token_option,
     rpc_endpoint_option,
     tx_aux_options,
     tx_value_option,
 )
+from ..nonces import get_nonce_status, nonce_store
+from ..rpc_batch import encode_call, supports_concurrent_requests
+from ..subscription import new_blocks
+from ..user import (
+    DEFAULT_TX_WAIT_TIMEOUT,
+    estimate_gas_many,
+    fetch_receipts,
+    get_pending_transaction_hashes,
+    get_token_metadata,
+    get_transactions,
+    send_raw_transactions,
+    wait_for_receipts,
+)
 from ..utils import (
     create_contract_tx_from_args,
     create_tx_from_args,
     finalize_tx_from_args,
+    from_address_from_argument,
     from_address_from_argument_optional,
+    iter_lines_from_file_or_stdin,
     load_from_file_or_stdin,
     newton_or_token_to_address,
     parse_token_value_representation,
+    parse_wei_representation,
     to_json,
     validate_32byte_hash_string,
     web3_from_endpoint_arg,
@@ -67,6 +112,12 @@ tx_group.add_command(signtx, name="sign")
     is_flag=True,
     help="if set, tx type is 0x0 (pre-EIP1559), otherwise type is 0x2.",
 )
+@option(
+    "--offline",
+    is_flag=True,
+    help="do not connect to a node.  Values not given are taken from the "
+    "chain parameters file (see `aut chain sync-params`).",
+)
 def make(
     rpc_endpoint: Optional[str],
     ntn: bool,
@@ -79,22 +130,26 @@ def make(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     value: str,
     data: Optional[str],
     chain_id: Optional[int],
     legacy: bool,
+    offline: bool,
 ) -> None:
     """
     Create a transaction given the parameters passed in.
-    """
 
-    # TODO: Add a flag which results in only unconnected Web3
-    # instances being created.  Callers who do not want to connect to
-    # a node will then receive an error if they do not specify all
-    # required values (rather than having Web3.py silently connect).
+    With --offline, no connection is made.  The chain id, fees, token
+    decimals and token transfer gas are taken from the chain parameters
+    file, and nonces are allocated locally, never below the nonce
+    recorded by `aut chain sync-params`.  Any other required value
+    (such as --gas for transactions with data) must be given.
+    """
 
     # Potentially used in multiple places, so avoid re-initializing.
+    # In offline mode, this is a Web3 which refuses all requests.
     w3: Optional[Web3] = None
 
     # If from_str is not set, take the address from a keyfile instead
@@ -111,6 +166,51 @@ def make(
 
     token_addresss = newton_or_token_to_address(ntn, token)
 
+    token_decimals: Optional[int] = None
+    if offline:
+        if fee_factor or fee_strategy:
+            raise ClickException(
+                "--fee-factor and --fee-strategy cannot be used with --offline"
+            )
+        if not from_addr:
+            raise ClickException("from address not given")
+
+        w3 = offline_web3()
+        params = load_chain_params(chain_id)
+        chain_id = params["chain_id"]
+
+        if gas_price is None:
+            if max_fee_per_gas is None:
+                max_fee_per_gas = f"{params['max_fee_per_gas']}wei"
+            if max_priority_fee_per_gas is None:
+                max_priority_fee_per_gas = f"{params['max_priority_fee_per_gas']}wei"
+
+        if token_addresss:
+            token_params = params["tokens"].get(token_addresss)
+            if token_params is None:
+                raise ClickException(
+                    f"no parameters for token {token_addresss} (use "
+                    "`aut chain sync-params --token`)"
+                )
+            token_decimals = token_params["decimals"]
+            if gas is None:
+                if "transfer_gas" not in token_params:
+                    raise ClickException(
+                        "--gas is required for --offline transfers of "
+                        f"{token_addresss} (no transfer gas recorded)"
+                    )
+                gas = f"{token_params['transfer_gas']}wei"
+        elif gas is None:
+            if data:
+                raise ClickException("--gas is required for --offline txs with data")
+            gas = f"{PLAIN_TRANSFER_GAS}wei"
+
+        if nonce is None and from_addr not in params["nonces"]:
+            raise ClickException(
+                f"no nonce recorded for {from_addr} (use --nonce or "
+                "`aut chain sync-params --account`)"
+            )
+
     # If --fee-factor was given, we must do some computation up-front
 
     # If this is a token call, fill in the "to" and "data" fields
@@ -123,19 +223,40 @@ def make(
 
         w3 = web3_from_endpoint_arg(w3, rpc_endpoint)
         erc = ERC20(w3, token_addresss)
-        token_units = parse_token_value_representation(value, erc.decimals())
+        if token_decimals is None:
+            token_decimals = get_token_metadata(w3, token_addresss)["decimals"]
+        token_units = parse_token_value_representation(value, token_decimals)
         function = erc.transfer(recipient=to_addr, amount=token_units)
-        tx = create_contract_tx_from_args(
-            function=function,
-            from_addr=from_addr,
-            gas=gas,
-            gas_price=gas_price,
-            max_fee_per_gas=max_fee_per_gas,
-            max_priority_fee_per_gas=max_priority_fee_per_gas,
-            fee_factor=fee_factor,
-            nonce=nonce,
-            chain_id=chain_id,
-        )
+        if offline:
+            # Building a contract tx would query the nonce, which in
+            # offline mode is allocated last (see below), so create a
+            # plain tx with the call data instead.
+            tx, w3 = create_tx_from_args(
+                w3,
+                rpc_endpoint,
+                from_addr=from_addr,
+                to_addr=token_addresss,
+                data=encode_call(function)["data"],
+                gas=gas,
+                gas_price=gas_price,
+                max_fee_per_gas=max_fee_per_gas,
+                max_priority_fee_per_gas=max_priority_fee_per_gas,
+                nonce=nonce,
+                chain_id=chain_id,
+            )
+        else:
+            tx = create_contract_tx_from_args(
+                function=function,
+                from_addr=from_addr,
+                gas=gas,
+                gas_price=gas_price,
+                max_fee_per_gas=max_fee_per_gas,
+                max_priority_fee_per_gas=max_priority_fee_per_gas,
+                fee_factor=fee_factor,
+                fee_strategy=fee_strategy,
+                nonce=nonce,
+                chain_id=chain_id,
+            )
 
     else:
         if not from_addr:
@@ -156,10 +277,23 @@ def make(
             max_fee_per_gas=max_fee_per_gas,
             max_priority_fee_per_gas=max_priority_fee_per_gas,
             fee_factor=fee_factor,
+            fee_strategy=fee_strategy,
             nonce=nonce,
             chain_id=chain_id,
         )
 
+    # In offline mode, allocate the nonce only once the tx has been
+    # created, so that nonces are not allocated to txs which fail (as
+    # for allocate_local_nonce).  The recorded nonce is a lower bound,
+    # since allocations made before the last sync-params may be behind
+    # the chain.
+
+    if offline and nonce is None:
+        recorded_nonce = params["nonces"][from_addr]
+        tx["nonce"] = nonce_store(params["chain_id"]).allocate(
+            from_addr, lambda: recorded_nonce, min_nonce=recorded_nonce
+        )
+
     # Fill in any missing values.
 
     tx = finalize_tx_from_args(w3, rpc_endpoint, tx, from_addr)
@@ -176,20 +310,275 @@ def make(
 tx_group.add_command(make)
 
 
+def _parse_batch_row(line: str) -> Tuple[str, str, Optional[str]]:
+    """
+    Parse a (to, value[, token]) row, given as CSV or a JSON object.
+    """
+
+    if line.startswith("{"):
+        row = json.loads(line)
+        fields = [row.get("to"), row.get("value"), row.get("token")]
+    else:
+        fields = next(csv.reader([line])) + [None]
+
+    to_str, value, token = (str(f).strip() if f else None for f in fields[:3])
+    if not to_str or not value:
+        raise ValueError("'to' and 'value' are required")
+
+    return to_str, value, token
+
+
+_BatchRow = Tuple[int, str, str, Optional[str]]
+
+
+def _read_batch_rows(rows_file: str) -> List[_BatchRow]:
+    """
+    Read the (line number, to, value, token) rows of a `tx batch` file.
+    """
+
+    rows = []
+    for line_num, line in enumerate(iter_lines_from_file_or_stdin(rows_file), 1):
+        try:
+            to_str, value, row_token = _parse_batch_row(line)
+        except ValueError as err:
+            raise ClickException(f"line {line_num}: {err}") from err
+        if line_num == 1 and to_str.lower() == "to":
+            continue
+        rows.append((line_num, to_str, value, row_token))
+
+    if not rows:
+        raise ClickException("no transfers given")
+
+    return rows
+
+
+def _make_transfers(
+    w3: Web3,
+    rows: Sequence[_BatchRow],
+    from_addr: ChecksumAddress,
+    default_token: Optional[ChecksumAddress],
+    gas: Optional[str],
+    gas_price: Optional[str],
+    max_fee_per_gas: Optional[str],
+    max_priority_fee_per_gas: Optional[str],
+    fee_factor: Optional[float],
+    fee_strategy: Optional[str],
+    nonce: Optional[int],
+    chain_id: Optional[int],
+    batch_size: int,
+    concurrency: int,
+) -> List[TxParams]:
+    """
+    Create the transfer transactions for `tx batch` rows, with
+    sequential nonces.
+    """
+
+    if chain_id is None:
+        chain_id = w3.eth.chain_id
+
+    # Fees are shared by all transactions.
+    if not (gas_price or max_fee_per_gas or max_priority_fee_per_gas or fee_factor):
+        fee_strategy = fee_strategy or "normal"
+    base_tx, _ = create_tx_from_args(
+        w3,
+        None,
+        from_addr=from_addr,
+        gas=gas,
+        gas_price=gas_price,
+        max_fee_per_gas=max_fee_per_gas,
+        max_priority_fee_per_gas=max_priority_fee_per_gas,
+        fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
+        chain_id=chain_id,
+    )
+
+    txs: List[TxParams] = []
+    token_contracts: Dict[ChecksumAddress, Tuple[ERC20, int]] = {}
+    for line_num, to_str, value, row_token in rows:
+        try:
+            to_addr = Web3.to_checksum_address(to_str)
+            if row_token is None:
+                token_addr = default_token
+            elif row_token.lower() == "ntn":
+                token_addr = Autonity.address()
+            else:
+                token_addr = Web3.to_checksum_address(row_token)
+
+            tx = cast(TxParams, dict(base_tx))
+            if token_addr is None:
+                tx["to"] = to_addr
+                tx["value"] = parse_wei_representation(value)
+            else:
+                if token_addr not in token_contracts:
+                    token_contracts[token_addr] = (
+                        ERC20(w3, token_addr),
+                        get_token_metadata(w3, token_addr)["decimals"],
+                    )
+                erc, decimals = token_contracts[token_addr]
+                function = erc.transfer(
+                    recipient=to_addr,
+                    amount=parse_token_value_representation(value, decimals),
+                )
+                tx["to"] = token_addr
+                # pylint: disable=protected-access
+                tx["data"] = function._encode_transaction_data()
+        except ValueError as err:
+            raise ClickException(f"line {line_num}: {err}") from err
+        txs.append(tx)
+
+    if "gas" not in base_tx:
+        estimates = estimate_gas_many(w3, txs, batch_size, concurrency)
+        for (line_num, *_), tx, estimate in zip(rows, txs, estimates):
+            if isinstance(estimate, Exception):
+                raise ClickException(f"line {line_num}: {estimate}")
+            tx["gas"] = estimate
+
+    if nonce is None:
+        if config.get_local_nonces():
+            nonce = nonce_store(chain_id).allocate(
+                from_addr,
+                lambda: w3.eth.get_transaction_count(from_addr, "pending"),
+                count=len(txs),
+            )
+        else:
+            nonce = w3.eth.get_transaction_count(from_addr, "pending")
+
+    for idx, tx in enumerate(txs):
+        tx["nonce"] = Nonce(nonce + idx)
+
+    return txs
+
+
 @command()
 @rpc_endpoint_option
+@newton_or_token_option
+@keyfile_option()
+@from_option
+@tx_aux_options
+@batch_size_option
+@concurrency_option
+@argument("rows-file", type=Path())
+def batch(
+    rpc_endpoint: Optional[str],
+    ntn: bool,
+    token: Optional[str],
+    keyfile: Optional[str],
+    from_str: Optional[str],
+    gas: Optional[str],
+    gas_price: Optional[str],
+    max_priority_fee_per_gas: Optional[str],
+    max_fee_per_gas: Optional[str],
+    fee_factor: Optional[float],
+    fee_strategy: Optional[str],
+    nonce: Optional[int],
+    chain_id: Optional[int],
+    batch_size: int,
+    concurrency: int,
+    rows_file: str,
+) -> None:
+    """
+    Create transfer transactions from a file of (to, value[, token])
+    rows, one per line ('-' for stdin), writing one unsigned transaction
+    per line.  Rows are either CSV (with an optional "to,value,token"
+    header) or JSON objects with "to", "value" and (optionally) "token"
+    fields.
+
+    The token of each row is a token address or "ntn", falling back to
+    --token/--ntn, then to Auton.  Transactions use sequential nonces
+    (starting at --nonce, if given).  Fees are determined once for all
+    transactions (using --fee-strategy normal if no fee option is
+    given), and gas estimates are made in JSON-RPC batches.
+    """
+
+    default_token = newton_or_token_to_address(ntn, token)
+    from_addr = from_address_from_argument(from_str, keyfile)
+
+    rows = _read_batch_rows(rows_file)
+    w3 = web3_from_endpoint_arg(None, rpc_endpoint)
+    txs = _make_transfers(
+        w3,
+        rows,
+        from_addr,
+        default_token,
+        gas=gas,
+        gas_price=gas_price,
+        max_fee_per_gas=max_fee_per_gas,
+        max_priority_fee_per_gas=max_priority_fee_per_gas,
+        fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
+        nonce=nonce,
+        chain_id=chain_id,
+        batch_size=batch_size,
+        concurrency=concurrency,
+    )
+    for tx in txs:
+        print(to_json(tx))
+
+
+tx_group.add_command(batch)
+
+
+@command()
+@rpc_endpoint_option
+@option(
+    "--ndjson",
+    is_flag=True,
+    help="Read one signed transaction per line, writing one result per line.",
+)
+@batch_size_option
+@concurrency_option
 @argument("tx-file", type=Path())
-def send(rpc_endpoint: Optional[str], tx_file: str) -> None:
+def send(
+    rpc_endpoint: Optional[str],
+    ndjson: bool,
+    batch_size: int,
+    concurrency: int,
+    tx_file: str,
+) -> None:
     """
     Send raw transaction (as generated by signtx) contained in the
     given file.  Use '-' to read from stdin instead of a file.
     Outputs the transaction hash if it is successfully sent.
+
+    With --ndjson, TX_FILE holds newline-delimited signed transactions,
+    which are submitted in JSON-RPC batches.  For each transaction, a
+    JSON object holding the "hash" (and an "error" if it was rejected)
+    is written, in input order.  For HTTP endpoints, up to --concurrency
+    senders are submitted concurrently (each sender's transactions
+    remain in order), which requires recovering the sender of each
+    transaction.
     """
 
-    signed_tx = SignedTransaction(**json.loads(load_from_file_or_stdin(tx_file)))
+    if not ndjson:
+        signed_tx = SignedTransaction(**json.loads(load_from_file_or_stdin(tx_file)))
+        w3 = web3_from_endpoint_arg(None, rpc_endpoint)
+        tx_hash = send_tx(w3, signed_tx)
+        print(Web3.to_hex(tx_hash))
+        return
+
     w3 = web3_from_endpoint_arg(None, rpc_endpoint)
-    tx_hash = send_tx(w3, signed_tx)
-    print(Web3.to_hex(tx_hash))
+    recover_senders = concurrency > 1 and supports_concurrent_requests(w3)
+    lines = iter_lines_from_file_or_stdin(tx_file)
+    num_failed = 0
+    while chunk := list(islice(lines, batch_size * concurrency)):
+        signed_txs = [SignedTransaction(**json.loads(line)) for line in chunk]
+        raw_txs = [HexBytes(tx.rawTransaction) for tx in signed_txs]
+        senders = (
+            [Account.recover_transaction(raw_tx) for raw_tx in raw_txs]
+            if recover_senders
+            else None
+        )
+        results = send_raw_transactions(w3, raw_txs, senders, batch_size, concurrency)
+        for signed_tx, result in zip(signed_txs, results):
+            if isinstance(result, Exception):
+                num_failed += 1
+                output = {"hash": Web3.to_hex(signed_tx.hash), "error": str(result)}
+            else:
+                output = {"hash": Web3.to_hex(result)}
+            print(to_json(output), flush=True)
+
+    if num_failed:
+        raise ClickException(f"{num_failed} transactions were rejected")
 
 
 tx_group.add_command(send)
@@ -197,6 +586,8 @@ tx_group.add_command(send)
 
 @command()
 @rpc_endpoint_option
+@batch_size_option
+@concurrency_option
 @option("--quiet", "-q", is_flag=True, help="Do not dump the full transaction receipt.")
 @option(
     "--timeout",
@@ -204,33 +595,446 @@ tx_group.add_command(send)
     type=float,
     help="Wait up to some (non-whole) number of seconds.",
 )
-@argument("tx-hash", required=True)
+@option(
+    "--file",
+    "hashes_file",
+    type=Path(),
+    help="File containing transaction hashes, one per line ('-' for stdin).",
+)
+@argument("tx-hashes", metavar="TX_HASH...", nargs=-1)
 def wait(
-    rpc_endpoint: Optional[str], quiet: bool, timeout: Optional[float], tx_hash: str
+    rpc_endpoint: Optional[str],
+    batch_size: int,
+    concurrency: int,
+    quiet: bool,
+    timeout: Optional[float],
+    hashes_file: Optional[str],
+    tx_hashes: Tuple[str, ...],
 ) -> None:
     """
-    Wait for a transaction with a specific hash, and dump the receipt.
-    The command will return exit code 0 if the transaction
-    succeeded, or non-zero otherwise.
+    Wait for transactions with specific hashes, and dump each receipt
+    (one per line) as it becomes available.  The command will return
+    exit code 0 if all transactions succeeded, or non-zero otherwise.
 
     Timeouts also result in a non-zero exit code.
     """
 
-    hash_bytes = HexBytes(validate_32byte_hash_string(tx_hash))
+    hash_strs = list(tx_hashes)
+    if hashes_file:
+        hash_strs.extend(load_from_file_or_stdin(hashes_file).split())
+    if not hash_strs:
+        raise ClickException("no transaction hashes given")
 
-    try:
-        w3 = web3_from_endpoint_arg(None, rpc_endpoint)
-        tx_receipt = wait_for_tx(w3, hash_bytes, timeout=timeout)
-        if not quiet:
-            print(to_json(tx_receipt))
+    hashes = [HexBytes(validate_32byte_hash_string(h)) for h in hash_strs]
 
+    w3 = web3_from_endpoint_arg(None, rpc_endpoint)
+    failed = []
+    pending = {h.hex(): h for h in hashes}
+    for tx_hash, tx_receipt in wait_for_receipts(
+        w3, hashes, timeout, batch_size, concurrency
+    ):
+        del pending[tx_hash.hex()]
+        if not quiet:
+            print(to_json(tx_receipt), flush=True)
         if tx_receipt["status"] == 0:
+            failed.append(tx_hash)
+
+    if len(hashes) == 1:
+        if pending:
+            raise ClickException(f"Tx {hash_strs[0]} timed out")
+        if failed:
             raise ClickException("Transaction failed")
+        return
 
-    except asyncio.TimeoutError:
-        raise ClickException(  # pylint: disable=raise-missing-from
-            "Tx {tx_hash} timed out"
+    for tx_hash in failed:
+        echo(f"failed: {tx_hash.hex()}", err=True)
+    for tx_hash in pending.values():
+        echo(f"timed out: {tx_hash.hex()}", err=True)
+    if failed or pending:
+        raise ClickException(
+            f"{len(failed)} transactions failed, {len(pending)} timed out"
         )
 
 
 tx_group.add_command(wait)
+
+
+@command(name="nonce")
+@rpc_endpoint_option
+@keyfile_option()
+@from_option
+@option(
+    "--reset",
+    is_flag=True,
+    help="Set the next local nonce to the pending transaction count.",
+)
+@option("--set", "set_nonce", type=int, help="Set the next local nonce.")
+def nonce_status(
+    rpc_endpoint: Optional[str],
+    keyfile: Optional[str],
+    from_str: Optional[str],
+    reset: bool,
+    set_nonce: Optional[int],
+) -> None:
+    """
+    Show and reconcile the locally allocated nonces of an account.
+
+    Local nonce allocation is enabled by the AUT_LOCAL_NONCES env var or
+    the `local_nonces` config file entry.  Transaction creation commands
+    then allocate nonces from a persistent local store, without querying
+    the node.
+
+    The next local nonce is compared with the account's mined and
+    pending transaction counts.  If transactions have been sent by other
+    means, the next local nonce is advanced.  Any "gap" (allocated
+    nonces not known to the node, which will block later transactions)
+    is reported, along with whether pending transactions appear to be
+    "stuck" (none of the account's transactions have been mined in the
+    last 10 blocks).
+    """
+
+    from_addr = from_address_from_argument(from_str, keyfile)
+    w3 = web3_from_endpoint_arg(None, rpc_endpoint)
+    if set_nonce is not None:
+        nonce_store(w3.eth.chain_id).set(from_addr, set_nonce)
+
+    status = get_nonce_status(w3, from_addr, reset)
+    gap = status["gap"]
+    print(
+        to_json(
+            {
+                **status,
+                "gap": None if gap is None else [gap.start, gap.stop],
+            }
+        )
+    )
+
+
+tx_group.add_command(nonce_status)
+
+
+def _replacement_tx(tx: TxData, next_base_fee: int, price_bump: int) -> TxParams:
+    """
+    Copy of a pending transaction (without the chain id), with fees
+    increased as described in `bump`.
+    """
+
+    replacement: TxParams = {
+        "from": tx["from"],
+        "nonce": tx["nonce"],
+        "gas": tx["gas"],
+        "value": tx["value"],
+    }
+    if tx.get("to"):
+        replacement["to"] = tx["to"]
+    if tx.get("input"):
+        replacement["data"] = Web3.to_hex(tx["input"])
+    if "accessList" in tx:
+        replacement["accessList"] = cast(
+            AccessList,
+            [
+                {
+                    "address": entry["address"],
+                    "storageKeys": [
+                        HexBytes(key).hex() for key in entry["storageKeys"]
+                    ],
+                }
+                for entry in tx["accessList"]
+            ],
+        )
+
+    if "maxFeePerGas" in tx:
+        max_fee, priority_fee = replacement_fees(
+            tx["maxFeePerGas"],
+            tx["maxPriorityFeePerGas"],
+            next_base_fee,
+            price_bump,
+        )
+        assert max_fee is not None
+        replacement["maxFeePerGas"] = max_fee
+        replacement["maxPriorityFeePerGas"] = priority_fee
+    else:
+        _, replacement["gasPrice"] = replacement_fees(
+            None, tx["gasPrice"], next_base_fee, price_bump
+        )
+
+    return replacement
+
+
+@command()
+@rpc_endpoint_option
+@keyfile_option()
+@from_option
+@option(
+    "--price-bump",
+    type=IntRange(min=0),
+    default=DEFAULT_PRICE_BUMP,
+    show_default=True,
+    help="percentage by which fees are increased.",
+)
+@batch_size_option
+@argument("tx-hashes", metavar="[TX_HASH]...", nargs=-1)
+def bump(
+    rpc_endpoint: Optional[str],
+    keyfile: Optional[str],
+    from_str: Optional[str],
+    price_bump: int,
+    batch_size: int,
+    tx_hashes: Tuple[str, ...],
+) -> None:
+    """
+    Create replacements for pending transactions, with increased fees
+    and otherwise identical, writing one unsigned transaction per line.
+    If no transaction hashes are given, all pending transactions of the
+    sender (given by --from or --keyfile) are replaced, using the node's
+    transaction pool.
+
+    Each fee is increased by at least --price-bump percent (the minimum
+    increase accepted by nodes), and maxFeePerGas by enough to cover the
+    base fee of the next block.  Sign and send the results to replace
+    the original transactions.
+    """
+
+    w3 = web3_from_endpoint_arg(None, rpc_endpoint)
+    if tx_hashes:
+        hashes = [HexBytes(validate_32byte_hash_string(h)) for h in tx_hashes]
+    else:
+        from_addr = from_address_from_argument(from_str, keyfile)
+        try:
+            hashes = get_pending_transaction_hashes(w3, from_addr)
+        except ValueError as err:
+            raise ClickException(
+                f"failed to query the transaction pool (give TX_HASH instead): {err}"
+            ) from err
+        if not hashes:
+            log(f"no pending transactions from {from_addr}")
+            return
+
+    next_base_fee = get_next_base_fee(w3)
+    for tx_hash, tx in zip(hashes, get_transactions(w3, hashes, batch_size)):
+        if tx is None:
+            raise ClickException(f"transaction {tx_hash.hex()} not found")
+        if tx.get("blockNumber") is not None:
+            echo(f"already included: {tx_hash.hex()}", err=True)
+            continue
+
+        replacement = _replacement_tx(tx, next_base_fee, price_bump)
+        replacement["chainId"] = tx.get("chainId") or w3.eth.chain_id
+        print(to_json(replacement))
+
+
+tx_group.add_command(bump)
+
+
+def _latency_summary(latencies: Sequence[float]) -> Dict[str, float]:
+    """
+    Mean, median, 90th percentile and maximum of some latencies.
+    """
+
+    if not latencies:
+        return {}
+
+    ordered = sorted(latencies)
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p90": ordered[min(len(ordered) - 1, (len(ordered) * 9) // 10)],
+        "max": ordered[-1],
+    }
+
+
+@command()
+@rpc_endpoint_option
+@newton_or_token_option
+@keyfile_and_password_options()
+@tx_aux_options
+@batch_size_option
+@concurrency_option
+@option(
+    "--depth",
+    type=IntRange(min=1),
+    default=64,
+    show_default=True,
+    help="maximum number of transactions sent but not yet included.",
+)
+@option(
+    "--timeout",
+    type=float,
+    default=DEFAULT_TX_WAIT_TIMEOUT,
+    show_default=True,
+    help="give up once no transaction has been included for this many seconds.",
+)
+@option("--quiet", "-q", is_flag=True, help="Do not dump the transaction receipts.")
+@argument("rows-file", type=Path())
+def pipeline(
+    rpc_endpoint: Optional[str],
+    ntn: bool,
+    token: Optional[str],
+    keyfile: Optional[str],
+    password: Optional[str],
+    gas: Optional[str],
+    gas_price: Optional[str],
+    max_priority_fee_per_gas: Optional[str],
+    max_fee_per_gas: Optional[str],
+    fee_factor: Optional[float],
+    fee_strategy: Optional[str],
+    nonce: Optional[int],
+    chain_id: Optional[int],
+    batch_size: int,
+    concurrency: int,
+    depth: int,
+    timeout: float,
+    quiet: bool,
+    rows_file: str,
+) -> None:
+    """
+    Create, sign, send and wait for transfers in a single process.
+    ROWS_FILE holds (to, value[, token]) rows, as for `tx batch`.
+
+    Transactions are created as for `tx batch`, signed with the keyfile
+    (decrypted once), and sent in JSON-RPC batches, keeping up to
+    --depth transactions in flight.  Receipts are checked at each new
+    block, and dumped (one per line) as they become available.  On
+    completion, the time spent in each stage is reported on stderr.
+
+    If a transaction is rejected, no further transactions are sent, and
+    those not yet sent are reported as "blocked".  --timeout bounds the
+    time without progress, including while waiting for new blocks.  The command
+    returns a non-zero exit code unless all transactions succeeded.
+    """
+
+    default_token = newton_or_token_to_address(ntn, token)
+    keyfile = config.get_keyfile(keyfile)
+    with open(keyfile, encoding="ascii") as key_f:
+        encrypted_key = json.load(key_f)
+    from_addr = get_address_from_keyfile(encrypted_key)
+    rows = _read_batch_rows(rows_file)
+    private_key = decrypt_keyfile(
+        encrypted_key, config.get_keyfile_password(password, keyfile)
+    )
+
+    start_time = time.monotonic()
+    w3 = web3_from_endpoint_arg(None, rpc_endpoint)
+    txs = _make_transfers(
+        w3,
+        rows,
+        from_addr,
+        default_token,
+        gas=gas,
+        gas_price=gas_price,
+        max_fee_per_gas=max_fee_per_gas,
+        max_priority_fee_per_gas=max_priority_fee_per_gas,
+        fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
+        nonce=nonce,
+        chain_id=chain_id,
+        batch_size=batch_size,
+        concurrency=concurrency,
+    )
+    make_time = time.monotonic() - start_time
+
+    unsent = deque(txs)
+    in_flight: Dict[str, float] = {}
+    sign_latencies: List[float] = []
+    send_latencies: List[float] = []
+    confirm_latencies: List[float] = []
+    num_rejected = num_failed = 0
+
+    def send_next() -> None:
+        nonlocal num_rejected
+        to_send = [
+            unsent.popleft() for _ in range(min(len(unsent), depth - len(in_flight)))
+        ]
+        if not to_send:
+            return
+
+        signed_txs = []
+        for tx in to_send:
+            sign_start = time.monotonic()
+            signed_txs.append(sign_tx_with_private_key(tx, private_key))
+            sign_latencies.append(time.monotonic() - sign_start)
+
+        send_start = time.monotonic()
+        results = send_raw_transactions(
+            w3, [HexBytes(tx.rawTransaction) for tx in signed_txs], None, batch_size
+        )
+        sent_time = time.monotonic()
+        send_latencies.append(sent_time - send_start)
+
+        for tx, result in zip(to_send, results):
+            if isinstance(result, Exception):
+                echo(f"rejected (nonce {tx['nonce']}): {result}", err=True)
+                num_rejected += 1
+            else:
+                # Accepted transactions are tracked even after a
+                # rejection, since they have been sent.
+                in_flight[result.hex()] = sent_time
+
+        # Later nonces cannot be included after a rejection.
+        if num_rejected:
+            unsent.clear()
+
+    send_next()
+    last_progress = time.monotonic()
+
+    # The timeout is counted from the last progress, so is passed to
+    # new_blocks afresh on each iteration.  This also bounds the wait
+    # for the next block, if the chain or the subscription stalls.
+    blocks = new_blocks(w3, timeout)
+    try:
+        block_number = next(blocks)
+        while True:
+            if in_flight:
+                log(f"checking {len(in_flight)} receipts at block {block_number}")
+                hashes = [HexBytes(h) for h in in_flight]
+                landed = fetch_receipts(w3, hashes, batch_size, concurrency)
+                now = time.monotonic()
+                for tx_hash in hashes:
+                    receipt = landed.get(tx_hash.hex())
+                    if receipt is None:
+                        continue
+                    confirm_latencies.append(now - in_flight.pop(tx_hash.hex()))
+                    last_progress = now
+                    if not quiet:
+                        print(to_json(receipt), flush=True)
+                    if receipt["status"] == 0:
+                        num_failed += 1
+
+            if not in_flight and not unsent:
+                break
+            remaining = last_progress + timeout - time.monotonic()
+            if remaining <= 0:
+                break
+
+            send_next()
+            block_number = blocks.send(remaining)
+
+    except TimeoutError:
+        log("timed out waiting for new blocks")
+    finally:
+        blocks.close()
+
+    num_timed_out = len(in_flight)
+    num_blocked = len(txs) - num_rejected - len(confirm_latencies) - num_timed_out
+    report = {
+        "transactions": len(txs),
+        "included": len(confirm_latencies),
+        "failed": num_failed,
+        "rejected": num_rejected,
+        "blocked": num_blocked,
+        "timed_out": num_timed_out,
+        "elapsed": time.monotonic() - start_time,
+        "stages": {
+            "make": {"total": make_time},
+            "sign": {"total": sum(sign_latencies), **_latency_summary(sign_latencies)},
+            "send": {"total": sum(send_latencies), **_latency_summary(send_latencies)},
+            "confirm": _latency_summary(confirm_latencies),
+        },
+    }
+    echo(to_json(report, pretty=True), err=True)
+
+    if num_failed or num_rejected or num_blocked or num_timed_out:
+        raise ClickException("not all transactions succeeded")
+
+
+tx_group.add_command(pipeline)
@@ -3,28 +3,41 @@ The `validator` command group.
 """
 
 import sys
-from typing import Optional
+from decimal import Decimal
+from typing import Optional, Sequence
 from urllib import parse as urlparse
 
-from autonity.autonity import Autonity
+from autonity.liquid_newton import LiquidNewton
 from autonity.utils.denominations import format_auton_quantity, format_newton_quantity
-from autonity.validator import OracleAddress, Validator
-from click import argument, command, echo, group, option
+from autonity.validator import NodeAddress, OracleAddress, ValidatorState
+from click import ClickException, Choice, argument, command, echo, group, option
 from web3 import Web3
-from web3.types import HexBytes
+from web3.types import ChecksumAddress, HexBytes
 
 from .protocol import protocol_group
 from ..config import get_node_address
 from ..constants import UnixExitStatus
+from ..logging import log
 from ..options import (
+    batch_size_option,
+    block_option,
+    concurrency_option,
     from_option,
     keyfile_option,
     rpc_endpoint_option,
     tx_aux_options,
     validator_option,
 )
+from ..user import (
+    call_functions,
+    get_protocol_values,
+    get_validator_addresses,
+    get_validator_descriptors,
+    get_validator_overview,
+)
 from ..utils import (
     autonity_from_endpoint_arg,
+    block_from_option,
     create_contract_tx_from_args,
     from_address_from_argument,
     parse_commission_rate,
@@ -40,7 +53,17 @@ from ..utils import (
 # pylint: disable=too-many-arguments
 # pylint: disable=too-many-locals
 
-# TODO: consider caching the LNTN addresses of Validators
+
+def _get_liquid_contract(w3: Web3, validator_addr: NodeAddress) -> ChecksumAddress:
+    """
+    Address of the Liquid Newton contract of a validator (from the
+    persistent cache if available).
+    """
+    addresses = get_validator_addresses(w3, [validator_addr])
+    if validator_addr not in addresses:
+        raise ClickException(f"{validator_addr} is not a registered validator")
+
+    return addresses[validator_addr]["liquid_contract"]
 
 
 @group()
@@ -58,15 +81,20 @@ validator.add_command(
 
 @command()
 @rpc_endpoint_option
+@block_option
 @validator_option
-def info(rpc_endpoint: Optional[str], validator_addr_str: str) -> None:
+def info(
+    rpc_endpoint: Optional[str], block_str: Optional[str], validator_addr_str: str
+) -> None:
     """
     Get information about a validator.
     """
 
     validator_addr = get_node_address(validator_addr_str)
-    aut = autonity_from_endpoint_arg(rpc_endpoint)
-    validator_data = aut.get_validator(validator_addr)
+    w3 = web3_from_endpoint_arg(None, rpc_endpoint)
+    validator_data = get_validator_descriptors(
+        w3, [validator_addr], block_from_option(block_str)
+    )[0]
     if (
         validator_data is None
         or validator_data.get("node_address", "") != validator_addr
@@ -76,12 +104,109 @@ def info(rpc_endpoint: Optional[str], validator_addr_str: str) -> None:
             err=True,
         )
         sys.exit(UnixExitStatus.WEB3_RESOURCE_NOT_FOUND)
-    echo(to_json(aut.get_validator(validator_addr), pretty=True))
+    echo(to_json(validator_data, pretty=True))
 
 
 validator.add_command(info)
 
 
+_OVERVIEW_SORT_KEYS = {
+    "bonded-stake": "bonded_stake",
+    "self-bonded-stake": "self_bonded_stake",
+    "commission-rate": "commission_rate",
+    "voting-power": "voting_power",
+}
+
+
+def _format_table(headers: Sequence[str], rows: Sequence[Sequence[str]]) -> str:
+    """
+    Format rows as left-aligned columns, separated by two spaces.
+    """
+    widths = [max(len(row[i]) for row in [headers, *rows]) for i in range(len(headers))]
+    return "\n".join(
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+        for row in [headers, *rows]
+    )
+
+
+@command()
+@rpc_endpoint_option
+@block_option
+@batch_size_option
+@concurrency_option
+@option(
+    "--sort",
+    type=Choice(list(_OVERVIEW_SORT_KEYS)),
+    default="bonded-stake",
+    show_default=True,
+    help="order validators by this value, largest first.",
+)
+@option("--ascending", is_flag=True, help="order validators smallest first.")
+@option(
+    "--ndjson",
+    is_flag=True,
+    help="print each validator as a full JSON object, one per line.",
+)
+def overview(
+    rpc_endpoint: Optional[str],
+    block_str: Optional[str],
+    batch_size: int,
+    concurrency: int,
+    sort: str,
+    ascending: bool,
+    ndjson: bool,
+) -> None:
+    """
+    Print the stake, commission, state and committee membership of all
+    registered validators.  All validators are queried at a single
+    block, using batched requests.  The voting power is shown only for
+    members of the current committee.
+    """
+
+    w3 = web3_from_endpoint_arg(None, rpc_endpoint)
+    block, validators = get_validator_overview(
+        w3, block_from_option(block_str), batch_size, concurrency
+    )
+    log(f"queried {len(validators)} validators at block {block!r}")
+
+    sort_key = _OVERVIEW_SORT_KEYS[sort]
+    validators.sort(key=lambda v: v[sort_key] or 0, reverse=not ascending)  # type: ignore
+
+    if ndjson:
+        for vdesc in validators:
+            print(to_json(vdesc))
+        return
+
+    precision = get_protocol_values(w3, ["commission_rate_precision"], block)[
+        "commission_rate_precision"
+    ]
+    headers = [
+        "NODE ADDRESS",
+        "STATE",
+        "BONDED (NTN)",
+        "SELF-BONDED (NTN)",
+        "COMMISSION",
+        "VOTING POWER",
+        "JAIL RELEASE",
+    ]
+    rows = [
+        [
+            vdesc["node_address"],
+            ValidatorState(vdesc["state"]).name.lower(),
+            format_newton_quantity(vdesc["bonded_stake"]),
+            format_newton_quantity(vdesc["self_bonded_stake"]),
+            f"{Decimal(100 * vdesc['commission_rate']) / precision}%",
+            "-" if vdesc["voting_power"] is None else str(vdesc["voting_power"]),
+            str(vdesc["jail_release_block"] or "-"),
+        ]
+        for vdesc in validators
+    ]
+    print(_format_table(headers, rows))
+
+
+validator.add_command(overview)
+
+
 @command()
 @argument("enode")
 def compute_address(
@@ -116,6 +241,7 @@ def bond(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     validator_addr_str: Optional[str],
@@ -139,6 +265,7 @@ def bond(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -164,6 +291,7 @@ def unbond(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     validator_addr_str: Optional[str],
@@ -187,6 +315,7 @@ def unbond(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -214,6 +343,7 @@ def register(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     enode: str,
@@ -242,6 +372,7 @@ def register(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -266,6 +397,7 @@ def pause(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     validator_addr_str: Optional[str],
@@ -288,6 +420,7 @@ def pause(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -312,6 +445,7 @@ def activate(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     validator_addr_str: Optional[str],
@@ -334,6 +468,7 @@ def activate(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -359,6 +494,7 @@ def change_commission_rate(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     validator_addr_str: Optional[str],
@@ -386,6 +522,7 @@ def change_commission_rate(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -397,12 +534,14 @@ validator.add_command(change_commission_rate)
 
 @command()
 @rpc_endpoint_option
+@block_option
 @keyfile_option()
 @validator_option
 @option("--ntn", is_flag=True, help="Check Newton (NTN) instead of Auton")
 @option("--account", help="Delegator account to check")
 def unclaimed_rewards(
     rpc_endpoint: Optional[str],
+    block_str: Optional[str],
     keyfile: Optional[str],
     ntn: bool,
     validator_addr_str: Optional[str],
@@ -415,10 +554,13 @@ def unclaimed_rewards(
     validator_addr = get_node_address(validator_addr_str)
     account = from_address_from_argument(account, keyfile)
 
-    aut = autonity_from_endpoint_arg(rpc_endpoint)
-    vdesc = aut.get_validator(validator_addr)
-    val = Validator(aut.contract.w3, vdesc)
-    unclaimed_atn, unclaimed_ntn = val.unclaimed_rewards(account)
+    w3 = web3_from_endpoint_arg(None, rpc_endpoint)
+    lntn = LiquidNewton(w3, _get_liquid_contract(w3, validator_addr))
+    unclaimed_atn, unclaimed_ntn = call_functions(
+        w3,
+        [lntn.contract.functions.unclaimedRewards(account)],
+        block_from_option(block_str),
+    )[0]
     print(
         format_newton_quantity(unclaimed_ntn)
         if ntn
@@ -444,6 +586,7 @@ def claim_rewards(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     validator_addr_str: Optional[str],
@@ -456,18 +599,17 @@ def claim_rewards(
     from_addr = from_address_from_argument(from_str, keyfile)
 
     w3 = web3_from_endpoint_arg(None, rpc_endpoint)
-    aut = Autonity(w3)
-    vdesc = aut.get_validator(validator_addr)
-    val = Validator(w3, vdesc)
+    lntn = LiquidNewton(w3, _get_liquid_contract(w3, validator_addr))
 
     tx = create_contract_tx_from_args(
-        function=val.claim_rewards(),
+        function=lntn.claim_rewards(),
         from_addr=from_addr,
         gas=gas,
         gas_price=gas_price,
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -493,6 +635,7 @@ def update_enode(
     max_priority_fee_per_gas: Optional[str],
     max_fee_per_gas: Optional[str],
     fee_factor: Optional[float],
+    fee_strategy: Optional[str],
     nonce: Optional[int],
     chain_id: Optional[int],
     validator_addr_str: Optional[str],
@@ -519,6 +662,7 @@ def update_enode(
         max_fee_per_gas=max_fee_per_gas,
         max_priority_fee_per_gas=max_priority_fee_per_gas,
         fee_factor=fee_factor,
+        fee_strategy=fee_strategy,
         nonce=nonce,
         chain_id=chain_id,
     )
@@ -14,9 +14,25 @@ from click import ClickException
 from web3 import Web3
 
 from .config_file import CONFIG_FILE_NAME, get_config_file
+from .daemon import require_terminal
 from .logging import log
 
 DEFAULT_KEYFILE_DIRECTORY = "~/.autonity/keystore"
+DEFAULT_CACHE_DIRECTORY = "~/.autonity/cache"
+DEFAULT_CACHE_MAX_SIZE_MB = 256
+CACHE_DIRECTORY_ENV_VAR = "AUT_CACHE_DIR"
+CACHE_MAX_SIZE_ENV_VAR = "AUT_CACHE_MAX_SIZE"
+NO_CACHE_ENV_VAR = "AUT_NO_CACHE"
+DEFAULT_NONCE_DIRECTORY = "~/.autonity/nonces"
+DEFAULT_CHAIN_PARAMS_FILE = "~/.autonity/chain-params.json"
+CHAIN_PARAMS_FILE_ENV_VAR = "AUT_CHAIN_PARAMS"
+NONCE_DIRECTORY_ENV_VAR = "AUT_NONCE_DIR"
+LOCAL_NONCES_ENV_VAR = "AUT_LOCAL_NONCES"
+DEFAULT_GAS_CACHE_MARGIN = 20.0
+DEFAULT_GAS_CACHE_TTL = 3600.0
+GAS_CACHE_ENV_VAR = "AUT_GAS_CACHE"
+GAS_CACHE_MARGIN_ENV_VAR = "AUT_GAS_CACHE_MARGIN"
+GAS_CACHE_TTL_ENV_VAR = "AUT_GAS_CACHE_TTL"
 KEYFILE_DIRECTORY_ENV_VAR = "KEYFILEDIR"
 KEYFILE_ENV_VAR = "KEYFILE"
 KEYFILE_PASSWORD_ENV_VAR = "KEYFILEPWD"
@@ -42,6 +58,133 @@ def get_keystore_directory(keystore_directory: Optional[str]) -> str:
     return keystore_directory
 
 
+def get_cache_directory() -> Optional[str]:
+    """
+    Get the directory holding the persistent chain data cache.  Use
+    the env var, falling back to the config file, then to
+    DEFAULT_CACHE_DIRECTORY.  Returns None if caching has been
+    disabled via the AUT_NO_CACHE env var.
+    """
+    if os.getenv(NO_CACHE_ENV_VAR):
+        return None
+
+    cache_directory = os.getenv(CACHE_DIRECTORY_ENV_VAR)
+    if cache_directory is None:
+        cache_directory = get_config_file().get_path("cache_dir")
+        if cache_directory is None:
+            cache_directory = DEFAULT_CACHE_DIRECTORY
+
+    return os.path.expanduser(cache_directory)
+
+
+def get_cache_max_size() -> int:
+    """
+    Get the maximum size in bytes of the cache for each chain.  The env
+    var and config file entry `cache_max_size` give the size in MB,
+    falling back to DEFAULT_CACHE_MAX_SIZE_MB.
+    """
+    max_size_mb = os.getenv(CACHE_MAX_SIZE_ENV_VAR)
+    if max_size_mb is None:
+        max_size_mb = get_config_file().get("cache_max_size")
+
+    if max_size_mb is None:
+        return DEFAULT_CACHE_MAX_SIZE_MB * 1024 * 1024
+
+    try:
+        return int(float(max_size_mb) * 1024 * 1024)
+    except ValueError as err:
+        raise ClickException(f"invalid cache size: {max_size_mb}") from err
+
+
+def get_nonce_directory() -> str:
+    """
+    Get the directory holding locally managed nonces.  Use the env var,
+    falling back to the config file, then to DEFAULT_NONCE_DIRECTORY.
+    """
+    nonce_directory = os.getenv(NONCE_DIRECTORY_ENV_VAR)
+    if nonce_directory is None:
+        nonce_directory = get_config_file().get_path("nonce_dir")
+        if nonce_directory is None:
+            nonce_directory = DEFAULT_NONCE_DIRECTORY
+
+    return os.path.expanduser(nonce_directory)
+
+
+def get_chain_params_file() -> str:
+    """
+    Get the file holding chain parameters for offline transaction
+    creation.  Use the env var, falling back to the `chain_params`
+    config file entry, then to DEFAULT_CHAIN_PARAMS_FILE.
+    """
+    chain_params_file = os.getenv(CHAIN_PARAMS_FILE_ENV_VAR)
+    if chain_params_file is None:
+        chain_params_file = get_config_file().get_path("chain_params")
+        if chain_params_file is None:
+            chain_params_file = DEFAULT_CHAIN_PARAMS_FILE
+
+    return os.path.expanduser(chain_params_file)
+
+
+def get_local_nonces() -> bool:
+    """
+    Whether nonces of new transactions should be allocated locally
+    (see `nonces.py`) rather than queried from the node.  Use the env
+    var, falling back to the `local_nonces` config file entry.
+    Disabled by default.
+    """
+    return _get_flag(LOCAL_NONCES_ENV_VAR, "local_nonces")
+
+
+def get_gas_cache() -> bool:
+    """
+    Whether gas estimates of contract calls should be cached (see
+    `user.get_gas_estimate`).  Use the env var, falling back to the
+    `gas_cache` config file entry.  Disabled by default.
+    """
+    return _get_flag(GAS_CACHE_ENV_VAR, "gas_cache")
+
+
+def get_gas_cache_margin() -> float:
+    """
+    Percentage added to cached gas estimates.  Use the env var, falling
+    back to the `gas_cache_margin` config file entry, then to
+    DEFAULT_GAS_CACHE_MARGIN.
+    """
+    margin = _get_float(GAS_CACHE_MARGIN_ENV_VAR, "gas_cache_margin")
+    return DEFAULT_GAS_CACHE_MARGIN if margin is None else margin
+
+
+def get_gas_cache_ttl() -> float:
+    """
+    Time (in seconds) for which gas estimates are cached.  Use the env
+    var, falling back to the `gas_cache_ttl` config file entry, then to
+    DEFAULT_GAS_CACHE_TTL.
+    """
+    ttl = _get_float(GAS_CACHE_TTL_ENV_VAR, "gas_cache_ttl")
+    return DEFAULT_GAS_CACHE_TTL if ttl is None else ttl
+
+
+def _get_flag(env_var: str, config_entry: str) -> bool:
+    value = os.getenv(env_var)
+    if value is None:
+        value = get_config_file().get(config_entry)
+
+    return (value or "").lower() in ("1", "true", "yes", "on")
+
+
+def _get_float(env_var: str, config_entry: str) -> Optional[float]:
+    value = os.getenv(env_var)
+    if value is None:
+        value = get_config_file().get(config_entry)
+    if value is None:
+        return None
+
+    try:
+        return float(value)
+    except ValueError as err:
+        raise ClickException(f"invalid {config_entry}: {value}") from err
+
+
 def get_keyfile_optional(keyfile: Optional[str]) -> Optional[str]:
     """
     Get the keyfile configuration if available.
@@ -79,6 +222,7 @@ def get_keyfile_password(password: Optional[str], keyfile: Optional[str] = None)
     if password is None:
         password = os.getenv(KEYFILE_PASSWORD_ENV_VAR)
         if password is None:
+            require_terminal()
             password = getpass(
                 f"(consider using '{KEYFILE_PASSWORD_ENV_VAR}' env var).\n"
                 + "Enter passphrase "
@@ -132,3 +132,19 @@ def get_config_file() -> ConfigFile:
         CONFIG_FILE_CACHED = True
 
     return CONFIG_FILE_DATA
+
+
+def reset_config_file() -> None:
+    """
+    Drop the cached config file, so that it is searched for again on
+    the next call to `get_config_file`.  Used by long-running
+    processes whose working directory may change.
+    """
+
+    global CONFIG_FILE_DIR
+    global CONFIG_FILE_DATA
+    global CONFIG_FILE_CACHED
+
+    CONFIG_FILE_DIR = "."
+    CONFIG_FILE_DATA = ConfigFile({})
+    CONFIG_FILE_CACHED = False
@@ -0,0 +1,517 @@
+"""
+The (opt-in) `aut serve` daemon, and the client logic used to forward
+invocations of `aut` to it.
+
+The daemon is a long-running process listening on a Unix socket,
+which keeps the imported modules and loaded contract ABIs warm.  Each
+forwarded command runs in a child process forked from the daemon, with
+the working directory, environment and standard streams of the client,
+so that long-running commands (such as `tx wait`) do not hold up
+others.  Stdin is streamed from the client as it is read, and the
+command is interrupted if the client goes away (e.g. on Ctrl-C).
+
+This module only imports the standard library at the top level, so
+that the client path stays cheap.
+"""
+
+import io
+import os
+import os.path
+import signal
+import socket
+import sys
+import threading
+import traceback
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, TextIO
+
+from .ipc import connect, recv_message, send_message
+
+DAEMON_SOCKET_ENV_VAR = "AUT_DAEMON_SOCKET"
+NO_DAEMON_ENV_VAR = "AUT_NO_DAEMON"
+DEFAULT_DAEMON_SOCKET = "~/.autonity/aut.sock"
+
+IN_DAEMON = False
+"""
+Set when commands are being executed inside the daemon.
+"""
+
+_client_gone = threading.Event()
+"""
+Set (in a child process of the daemon) when the client has disconnected.
+"""
+
+
+class InteractiveInputRequired(Exception):
+    """
+    Raised when a command running inside the daemon needs to prompt
+    the user.  The client then runs the command locally instead.
+    """
+
+
+def require_terminal() -> None:
+    """
+    To be called before prompting the user for input on the terminal.
+    """
+    if IN_DAEMON:
+        raise InteractiveInputRequired()
+
+
+def get_daemon_socket(socket_path: Optional[str] = None) -> str:
+    """
+    Socket path for the daemon.  Use the given path, falling back to
+    the AUT_DAEMON_SOCKET env var, then DEFAULT_DAEMON_SOCKET.
+    """
+    if socket_path is None:
+        socket_path = os.getenv(DAEMON_SOCKET_ENV_VAR, DEFAULT_DAEMON_SOCKET)
+
+    return os.path.expanduser(socket_path)
+
+
+class _StdinForwarder(io.TextIOBase):
+    """
+    Forwards the lines of stdin to the daemon as they are read (in a
+    background thread).  The lines are also kept, so that if the
+    command is handed back to the client, this object can be used as
+    stdin for the local run, replaying lines already forwarded.
+    """
+
+    def __init__(self, stdin: TextIO, wfile: BinaryIO):
+        super().__init__()
+        self._stdin = stdin
+        self._wfile = wfile
+        self._lines: List[str] = []
+        self._pos = 0
+        self._eof = False
+        self._forwarding = True
+        self._cond = threading.Condition()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop_forwarding(self) -> None:
+        """
+        Stop sending lines to the daemon.
+        """
+        with self._cond:
+            self._forwarding = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readline(self, size: Optional[int] = -1) -> str:  # type: ignore[override]
+        # pylint: disable=unused-argument
+        with self._cond:
+            while self._pos == len(self._lines) and not self._eof:
+                self._cond.wait()
+            if self._pos == len(self._lines):
+                return ""
+            self._pos += 1
+            return self._lines[self._pos - 1]
+
+    def read(self, size: Optional[int] = -1) -> str:
+        if size is not None and size >= 0:
+            raise io.UnsupportedOperation("only full reads are supported")
+        return "".join(iter(self.readline, ""))
+
+    def _send(self, msg: Dict[str, Any]) -> None:
+        if self._forwarding:
+            try:
+                send_message(self._wfile, msg)  # type: ignore
+            except OSError:
+                self._forwarding = False
+
+    def _run(self) -> None:
+        try:
+            for line in iter(self._stdin.readline, ""):
+                with self._cond:
+                    self._lines.append(line)
+                    self._cond.notify_all()
+                    self._send({"stdin": line})
+        finally:
+            with self._cond:
+                self._eof = True
+                self._cond.notify_all()
+                self._send({"stdin_eof": True})
+
+
+def forward_to_daemon(argv: List[str]) -> Optional[int]:
+    """
+    If a daemon is listening, run the command given by `argv` there,
+    writing its output to stdout and stderr.  Returns the exit code,
+    or None if the command should be run in this process (no daemon is
+    running, or the command requires interaction with the user).
+    """
+
+    if os.getenv(NO_DAEMON_ENV_VAR) or (argv and argv[0] == "serve"):
+        return None
+
+    # Commands only read stdin when given the '-' argument.  Input typed
+    # at a terminal may be interleaved with prompts, so is read locally.
+    read_stdin = "-" in argv
+    if read_stdin and sys.stdin.isatty():
+        return None
+
+    socket_path = get_daemon_socket()
+    if not os.path.exists(socket_path):
+        return None
+
+    try:
+        sock = connect(socket_path)
+    except OSError:
+        return None
+
+    with sock, sock.makefile("rb") as rfile, sock.makefile("wb") as wfile:
+        send_message(
+            wfile,
+            {
+                "argv": argv,
+                "cwd": os.getcwd(),
+                "env": dict(os.environ),
+                "stdin": read_stdin,
+            },
+        )
+
+        # Stdin is kept in case the command ends up running locally.
+        stdin_forwarder: Optional[_StdinForwarder] = None
+        if read_stdin:
+            stdin_forwarder = _StdinForwarder(sys.stdin, wfile)  # type: ignore
+
+        output_written = False
+        try:
+            while True:
+                msg = recv_message(rfile)  # type: ignore
+                if msg is None:
+                    if output_written:
+                        sys.stderr.write("aut: connection to daemon lost\n")
+                        return 1
+                    msg = {"fallback": True}
+
+                if "stdout" in msg:
+                    sys.stdout.write(msg["stdout"])
+                    sys.stdout.flush()
+                    output_written = True
+                elif "stderr" in msg:
+                    sys.stderr.write(msg["stderr"])
+                    output_written = True
+                elif "fallback" in msg:
+                    if stdin_forwarder:
+                        stdin_forwarder.stop_forwarding()
+                        sys.stdin = stdin_forwarder
+                    return None
+                elif "exit" in msg:
+                    return int(msg["exit"])
+
+        except KeyboardInterrupt:
+            # Closing the connection interrupts the command in the daemon.
+            sys.stderr.write("\nAborted!\n")
+            return 1
+
+
+def stop_daemon(socket_path: str) -> bool:
+    """
+    Ask the daemon listening at `socket_path` to exit.  Returns False
+    if no daemon is running.
+    """
+    try:
+        sock = connect(socket_path)
+    except OSError:
+        return False
+
+    with sock, sock.makefile("rwb") as sock_f:
+        send_message(sock_f, {"stop": True})  # type: ignore
+        recv_message(sock_f)  # type: ignore
+
+    return True
+
+
+class _ForwardedStream(io.TextIOBase):
+    """
+    Text stream which forwards everything written to it to the client.
+    """
+
+    def __init__(self, wfile: BinaryIO, name: str):
+        super().__init__()
+        self._wfile = wfile
+        self._name = name
+        self.written = False
+
+    @property
+    def encoding(self) -> str:  # type: ignore
+        return "utf-8"
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        # Reject bytes, so that click does not mistake this for a
+        # binary stream.
+        if not isinstance(s, str):
+            raise TypeError(f"write() argument must be str, not {type(s).__name__}")
+
+        if s:
+            send_message(self._wfile, {self._name: s})  # type: ignore
+            self.written = True
+        return len(s)
+
+
+def _receive_stdin(rfile: BinaryIO, stdin_w: Optional[int]) -> None:
+    """
+    Write stdin forwarded by the client to the pipe `stdin_w` (if
+    any), then wait for the client to disconnect.  Runs in a background
+    thread of the child process.  The command is interrupted if the
+    client goes away before it completes.
+    """
+
+    stdin_f = os.fdopen(stdin_w, "w", encoding="utf8") if stdin_w is not None else None
+    while True:
+        msg = recv_message(rfile)  # type: ignore
+        if msg is None:
+            break
+
+        if stdin_f is None:
+            continue
+        try:
+            if "stdin" in msg:
+                stdin_f.write(msg["stdin"])
+                stdin_f.flush()
+            elif "stdin_eof" in msg:
+                stdin_f.close()
+                stdin_f = None
+        except OSError:
+            # The command closed stdin.  Later data is discarded.
+            stdin_f = None
+
+    _client_gone.set()
+    os.kill(os.getpid(), signal.SIGINT)
+
+
+@contextmanager
+def _client_context(
+    request: Dict[str, Any],
+    stdin: TextIO,
+    stdout: _ForwardedStream,
+    stderr: _ForwardedStream,
+) -> Iterator[None]:
+    """
+    Switch the working directory, environment and standard streams of
+    this process to those of the client, restoring them on exit.
+    """
+
+    # pylint: disable=import-outside-toplevel
+    from . import config_file
+    from . import logging as aut_logging
+
+    saved_cwd = os.getcwd()
+    saved_env = dict(os.environ)
+    saved_streams = (sys.stdin, sys.stdout, sys.stderr)
+    saved_tracebacklimit = getattr(sys, "tracebacklimit", None)
+    saved_logging = aut_logging.LOGGING_ENABLED
+
+    try:
+        aut_logging.LOGGING_ENABLED = False
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        config_file.reset_config_file()
+        sys.stdin = stdin
+        sys.stdout = stdout
+        sys.stderr = stderr
+        yield
+
+    finally:
+        sys.stdin, sys.stdout, sys.stderr = saved_streams
+        os.environ.clear()
+        os.environ.update(saved_env)
+        os.chdir(saved_cwd)
+        aut_logging.LOGGING_ENABLED = saved_logging
+        if saved_tracebacklimit is None:
+            if hasattr(sys, "tracebacklimit"):
+                del sys.tracebacklimit
+        else:
+            sys.tracebacklimit = saved_tracebacklimit
+
+
+def _run_command(argv: List[str]) -> int:
+    """
+    Run `aut` in this process and return its exit code.
+    """
+
+    # pylint: disable=import-outside-toplevel
+    from .__main__ import aut
+
+    try:
+        aut.main(args=argv, prog_name="aut", standalone_mode=True)
+    except SystemExit as exc:
+        if exc.code is None:
+            return 0
+        if isinstance(exc.code, int):
+            return exc.code
+        sys.stderr.write(f"{exc.code}\n")
+        return 1
+    except InteractiveInputRequired:
+        raise
+    except Exception:  # pylint: disable=broad-except
+        traceback.print_exc()
+        return 1
+
+    return 0
+
+
+def _run_request(request: Dict[str, Any], rfile: BinaryIO, wfile: BinaryIO) -> None:
+    """
+    Run a forwarded command, in a child process.
+    """
+
+    stdin: TextIO = io.StringIO("")
+    stdin_w: Optional[int] = None
+    if request.get("stdin"):
+        stdin_r, stdin_w = os.pipe()
+        stdin = os.fdopen(stdin_r, "r", encoding="utf8")
+    threading.Thread(target=_receive_stdin, args=(rfile, stdin_w), daemon=True).start()
+
+    stdout = _ForwardedStream(wfile, "stdout")
+    stderr = _ForwardedStream(wfile, "stderr")
+    try:
+        with _client_context(request, stdin, stdout, stderr):
+            exit_code = _run_command(request["argv"])
+    except InteractiveInputRequired:
+        if not (stdout.written or stderr.written):
+            send_message(wfile, {"fallback": True})  # type: ignore
+            return
+
+        stderr.write("aut: command requires a terminal\n")
+        exit_code = 1
+
+    send_message(wfile, {"exit": exit_code})  # type: ignore
+
+
+def _handle_connection(server: socket.socket, conn: socket.socket) -> Optional[int]:
+    """
+    Read a request, and fork a child process to run it.  Returns the
+    pid of the child, 0 if the daemon should exit, or None if there is
+    nothing to run.
+    """
+
+    with conn, conn.makefile("rb") as rfile, conn.makefile("wb") as wfile:
+        request = recv_message(rfile)  # type: ignore
+        if request is None:
+            return None
+
+        if request.get("stop"):
+            send_message(wfile, {"exit": 0})  # type: ignore
+            return 0
+
+        pid = os.fork()
+        if pid:
+            return pid
+
+        # Child process.  Never return to the accept loop.
+        exit_code = 0
+        try:
+            server.close()
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            _run_request(request, rfile, wfile)  # type: ignore
+        except BaseException:  # pylint: disable=broad-except
+            # Errors writing to a client which has gone away are expected.
+            if not _client_gone.is_set():
+                traceback.print_exc()
+            exit_code = 1
+        finally:
+            os._exit(exit_code)  # pylint: disable=protected-access
+
+
+def _reap_children(children: Set[int]) -> None:
+    """
+    Collect child processes which have exited.
+    """
+    for pid in list(children):
+        try:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            done = pid
+        if done:
+            children.discard(pid)
+
+
+def _warm_up() -> None:
+    """
+    Import all command modules and load the protocol contract ABIs, so
+    that the first forwarded command does not pay for them.
+    """
+
+    # pylint: disable=import-outside-toplevel
+    from importlib import import_module
+
+    from autonity.abi_manager import ABIManager
+
+    from .__main__ import COMMANDS
+
+    for entry in COMMANDS.values():
+        import_module(entry.module)
+
+    for abi_name in ["Autonity", "IERC20", "Liquid"]:
+        ABIManager.load_abi(abi_name)
+
+
+def serve(socket_path: str, idle_timeout: Optional[float] = None) -> None:
+    """
+    Listen on `socket_path`, running forwarded commands until asked
+    to stop, or until no request has arrived (and no command has been
+    running) for `idle_timeout` seconds.  Commands still running when
+    the daemon exits are allowed to complete.
+    """
+
+    # pylint: disable=import-outside-toplevel
+    from .ipc import private_socket_umask
+    from .logging import log
+
+    global IN_DAEMON  # pylint: disable=global-statement
+
+    if os.path.exists(socket_path):
+        try:
+            connect(socket_path).close()
+        except OSError:
+            log(f"removing stale socket {socket_path}")
+            os.remove(socket_path)
+        else:
+            raise OSError(f"daemon already listening on {socket_path}")
+
+    _warm_up()
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with private_socket_umask(socket_path):
+        server.bind(socket_path)
+
+    try:
+        server.listen()
+        server.settimeout(idle_timeout or None)
+        IN_DAEMON = True
+        log(f"listening on {socket_path}")
+
+        children: Set[int] = set()
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                _reap_children(children)
+                if children:
+                    continue
+                log("idle timeout reached")
+                break
+
+            conn.settimeout(None)
+            try:
+                pid = _handle_connection(server, conn)
+            except OSError as err:
+                log(f"lost connection to client: {err}")
+                pid = None
+
+            _reap_children(children)
+            if pid == 0:
+                break
+            if pid:
+                children.add(pid)
+
+    finally:
+        IN_DAEMON = False
+        server.close()
+        os.remove(socket_path)
@@ -0,0 +1,151 @@
+"""
+Fee estimation based on `eth_feeHistory`.  A single (small) request
+gives the base fee of recent blocks and of the next block, along with
+percentiles of the priority fees paid in each block.  The result is
+held in the persistent cache for a few seconds, so that commands run
+in quick succession share it.
+"""
+
+from statistics import median
+from typing import Dict, List, NamedTuple, Optional, Tuple, TypedDict, cast
+
+from web3 import Web3
+from web3.types import Wei
+
+from .cache import chain_cache
+from .logging import log
+
+FEE_HISTORY_NAMESPACE = "fee-history"
+
+FEE_HISTORY_BLOCKS = 10
+"""
+Number of recent blocks considered.
+"""
+
+FEE_HISTORY_TTL = 5.0
+"""
+Time (in seconds) for which fee history is cached.
+"""
+
+DEFAULT_PRICE_BUMP = 10
+"""
+Minimum percentage increase of fees required (by default) for a node to
+accept a replacement transaction.
+"""
+
+
+class FeeStrategy(NamedTuple):
+    """
+    The percentile of recent priority fees to pay, and the multiple of
+    the next base fee allowed for in maxFeePerGas (giving headroom for
+    base fee increases before inclusion).
+    """
+
+    priority_fee_percentile: int
+    base_fee_multiplier: float
+
+
+FEE_STRATEGIES: Dict[str, FeeStrategy] = {
+    "slow": FeeStrategy(10, 1.25),
+    "normal": FeeStrategy(50, 2.0),
+    "fast": FeeStrategy(90, 3.0),
+}
+
+_PERCENTILES = sorted({s.priority_fee_percentile for s in FEE_STRATEGIES.values()})
+
+
+class FeeHistory(TypedDict):
+    """
+    Base fees of recent blocks (the last entry being that of the next
+    block), and the priority fee percentiles (see _PERCENTILES) paid in
+    each block.
+    """
+
+    baseFeePerGas: List[int]
+    reward: List[List[int]]
+
+
+def get_fee_history(w3: Web3) -> FeeHistory:
+    """
+    Fee history of the last FEE_HISTORY_BLOCKS blocks, possibly from
+    the cache.
+    """
+
+    cache = chain_cache(w3)
+    if cache:
+        cached = cache.get(FEE_HISTORY_NAMESPACE, "latest")
+        if cached is not None:
+            log("fee history found in cache")
+            return cast(FeeHistory, cached)
+
+    fee_history = w3.eth.fee_history(
+        FEE_HISTORY_BLOCKS, "latest", [float(p) for p in _PERCENTILES]
+    )
+    result: FeeHistory = {
+        "baseFeePerGas": [int(fee) for fee in fee_history["baseFeePerGas"]],
+        "reward": [
+            [int(fee) for fee in rewards] for rewards in fee_history.get("reward", [])
+        ],
+    }
+    if cache:
+        cache.set(FEE_HISTORY_NAMESPACE, "latest", result, ttl=FEE_HISTORY_TTL)
+
+    return result
+
+
+def get_latest_base_fee(w3: Web3) -> Wei:
+    """
+    The base fee of the latest block.
+    """
+    base_fees = get_fee_history(w3)["baseFeePerGas"]
+    return Wei(base_fees[-2] if len(base_fees) > 1 else base_fees[-1])
+
+
+def get_next_base_fee(w3: Web3) -> Wei:
+    """
+    The base fee of the next block.
+    """
+    return Wei(get_fee_history(w3)["baseFeePerGas"][-1])
+
+
+def estimate_fees(w3: Web3, strategy: str) -> Tuple[Wei, Wei]:
+    """
+    Return (maxFeePerGas, maxPriorityFeePerGas) for the named strategy
+    (see FEE_STRATEGIES).  The priority fee is the median, over recent
+    blocks, of the strategy's percentile of priority fees paid.
+    """
+
+    fee_strategy = FEE_STRATEGIES[strategy]
+    fee_history = get_fee_history(w3)
+    percentile_idx = _PERCENTILES.index(fee_strategy.priority_fee_percentile)
+    rewards = [rewards[percentile_idx] for rewards in fee_history["reward"]]
+    priority_fee = int(median(rewards)) if rewards else 0
+    next_base_fee = fee_history["baseFeePerGas"][-1]
+    max_fee = int(next_base_fee * fee_strategy.base_fee_multiplier) + priority_fee
+    log(f"fees ({strategy}): max fee {max_fee}, priority fee {priority_fee}")
+    return Wei(max_fee), Wei(priority_fee)
+
+
+def replacement_fees(
+    max_fee: Optional[int],
+    priority_fee: int,
+    next_base_fee: int,
+    price_bump: int = DEFAULT_PRICE_BUMP,
+) -> Tuple[Optional[Wei], Wei]:
+    """
+    The minimal fees for a transaction replacing one with the given
+    (maxFeePerGas, maxPriorityFeePerGas), or (None, gasPrice) for legacy
+    transactions.  Both fees are increased by `price_bump` percent, and
+    maxFeePerGas covers at least the next base fee plus the priority
+    fee.
+    """
+
+    def bump(fee: int) -> int:
+        return max(fee + 1, -(-fee * (100 + price_bump) // 100))
+
+    new_priority_fee = bump(priority_fee)
+    if max_fee is None:
+        return None, Wei(max(new_priority_fee, next_base_fee))
+
+    new_max_fee = max(bump(max_fee), next_base_fee + new_priority_fee)
+    return Wei(new_max_fee), Wei(new_priority_fee)
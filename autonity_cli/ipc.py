@@ -0,0 +1,75 @@
+"""
+Helpers for local inter-process communication over Unix sockets.
+Messages are JSON objects, one per line.
+
+Only the standard library is imported here, so that clients can
+connect to a local service without paying the import cost of web3.
+"""
+
+import json
+import os
+import os.path
+import socket
+from contextlib import contextmanager
+from io import BufferedIOBase
+from typing import Any, Dict, Iterator, Optional
+
+Message = Dict[str, Any]
+
+
+def send_message(wfile: BufferedIOBase, msg: Message) -> None:
+    """
+    Write a single message and flush the stream.
+    """
+    wfile.write(json.dumps(msg).encode("utf8") + b"\n")
+    wfile.flush()
+
+
+def recv_message(rfile: BufferedIOBase) -> Optional[Message]:
+    """
+    Read a single message.  Returns None if the peer closed the
+    connection.
+    """
+    line = rfile.readline()
+    if not line:
+        return None
+
+    msg = json.loads(line)
+    if not isinstance(msg, dict):
+        raise ValueError("malformed message")
+
+    return msg
+
+
+def connect(socket_path: str, timeout: Optional[float] = None) -> socket.socket:
+    """
+    Connect to the Unix socket at `socket_path`.  Raises OSError if
+    nothing is listening there.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        raise
+
+    return sock
+
+
+@contextmanager
+def private_socket_umask(socket_path: str) -> Iterator[None]:
+    """
+    Ensure the directory holding `socket_path` exists, and that any
+    socket bound within this context is only accessible by the current
+    user.
+    """
+    socket_dir = os.path.dirname(socket_path)
+    if socket_dir and not os.path.exists(socket_dir):
+        os.makedirs(socket_dir, mode=0o700)
+
+    old_umask = os.umask(0o177)
+    try:
+        yield
+    finally:
+        os.umask(old_umask)
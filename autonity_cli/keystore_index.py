@@ -0,0 +1,166 @@
+"""
+An index of the keyfiles in a keystore directory, mapping file names to
+addresses, so that listing a large keystore does not require every
+keyfile to be parsed.
+
+The index is held in a hidden file in the keystore (ignored by geth and
+by the index itself), along with the size and modification time of each
+file.  On each use, the directory is scanned (which requires only a
+stat of each file), and only files which are new or whose size or
+modification time has changed are parsed.  This detects keyfiles which
+are rewritten in place (for example, re-encrypted), which do not change
+the modification time of the directory.  Keyfiles written by
+`write_keyfiles` are added to the index directly.
+"""
+
+import json
+import os
+import os.path
+from typing import Dict, Iterable, Optional, Tuple, TypedDict
+
+from autonity.utils.keyfile import EncryptedKeyData, get_address_from_keyfile
+from web3 import Web3
+from web3.types import ChecksumAddress
+
+from .logging import log
+
+INDEX_FILE_NAME = ".aut-keystore-index.json"
+
+_INDEX_VERSION = 2
+
+
+class _IndexEntry(TypedDict):
+    address: Optional[ChecksumAddress]
+    mtime_ns: int
+    size: int
+
+
+def _read_address(keyfile_path: str) -> Optional[ChecksumAddress]:
+    try:
+        with open(keyfile_path, "r", encoding="utf8") as keyfile_f:
+            return Web3.to_checksum_address(json.load(keyfile_f)["address"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+class KeystoreIndex:
+    """
+    Index of the keyfiles in a single keystore directory.  Files which
+    are not keyfiles are also recorded (with no address), so that they
+    are not parsed again.
+    """
+
+    def __init__(self, keystore_dir: str):
+        self.keystore_dir = keystore_dir
+        self.path = os.path.join(keystore_dir, INDEX_FILE_NAME)
+        self._files: Dict[str, _IndexEntry] = {}
+        self._by_address: Optional[Dict[ChecksumAddress, str]] = None
+        self._load()
+
+    def keyfiles(self) -> Dict[ChecksumAddress, str]:
+        """
+        Map addresses to keyfile paths (in file name order).
+        """
+        self.refresh()
+        if self._by_address is None:
+            self._by_address = {
+                entry["address"]: os.path.join(self.keystore_dir, name)
+                for name, entry in sorted(self._files.items())
+                if entry["address"]
+            }
+        return self._by_address
+
+    def refresh(self) -> None:
+        """
+        Rescan the keystore directory, parsing only new or modified
+        files, and save the index if it has changed.
+        """
+
+        files: Dict[str, _IndexEntry] = {}
+        with os.scandir(self.keystore_dir) as dir_entries:
+            for dir_entry in dir_entries:
+                if dir_entry.name.startswith(".") or not dir_entry.is_file():
+                    continue
+
+                stat = dir_entry.stat()
+                entry = self._files.get(dir_entry.name)
+                if (
+                    entry is None
+                    or entry["mtime_ns"] != stat.st_mtime_ns
+                    or entry["size"] != stat.st_size
+                ):
+                    entry = {
+                        "address": _read_address(dir_entry.path),
+                        "mtime_ns": stat.st_mtime_ns,
+                        "size": stat.st_size,
+                    }
+                files[dir_entry.name] = entry
+
+        if files == self._files and os.path.exists(self.path):
+            return
+
+        log(f"updating keystore index {self.path}")
+        self._files = files
+        self._by_address = None
+        self._save()
+
+    def write_keyfiles(self, keyfiles: Iterable[Tuple[str, EncryptedKeyData]]) -> None:
+        """
+        Write new keyfiles to the keystore directory, adding them to the
+        index, which is saved once all have been written.
+        """
+
+        try:
+            for keyfile, keyfile_data in keyfiles:
+                with open(keyfile, "w", encoding="utf8") as key_f:
+                    json.dump(keyfile_data, key_f)
+
+                stat = os.stat(keyfile)
+                self._files[os.path.basename(keyfile)] = {
+                    "address": get_address_from_keyfile(keyfile_data),
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                }
+                self._by_address = None
+
+        finally:
+            # Only keystores which have already been listed are indexed.
+            if os.path.exists(self.path):
+                self._save()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf8") as index_f:
+                index = json.load(index_f)
+            if index.get("version") == _INDEX_VERSION:
+                self._files = index["files"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            # Missing or corrupt index (for example, partially written by
+            # a concurrent process).  All files will be parsed.
+            self._files = {}
+
+    def _save(self) -> None:
+        try:
+            index_fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(index_fd, "w", encoding="utf8") as index_f:
+                json.dump({"version": _INDEX_VERSION, "files": self._files}, index_f)
+        except OSError as err:
+            log(f"failed to write keystore index {self.path}: {err}")
+
+
+def write_keyfiles(
+    keystore_dir: str, keyfiles: Iterable[Tuple[str, EncryptedKeyData]]
+) -> None:
+    """
+    Write new keyfiles (which must be in `keystore_dir`), updating the
+    index of the keystore (if there is one) in a single pass.
+    """
+    KeystoreIndex(keystore_dir).write_keyfiles(keyfiles)
+
+
+def write_keyfile(keyfile: str, keyfile_data: EncryptedKeyData) -> None:
+    """
+    Write a new keyfile, updating the index of its directory (if
+    there is one).
+    """
+    write_keyfiles(os.path.dirname(keyfile) or ".", [(keyfile, keyfile_data)])
@@ -0,0 +1,92 @@
+"""
+A click Group which defers importing subcommand modules until they
+are dispatched to.
+"""
+
+from importlib import import_module
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional
+
+from click import Command, Context, Group, HelpFormatter
+from click.utils import make_default_short_help
+
+
+class LazyCommand(NamedTuple):
+    """
+    Manifest entry for a lazily loaded subcommand.  `module` and
+    `attribute` locate the click Command object.  `short_help` is used
+    in the parent group's help listing, so that listing commands does
+    not require importing them.
+    """
+
+    module: str
+    attribute: str
+    short_help: str
+
+
+class LazyGroup(Group):
+    """
+    Group whose subcommands are described by a static manifest of
+    LazyCommand entries.  The module holding a subcommand (and
+    therefore web3, autonity.py, contract ABIs, etc) is only imported
+    when that subcommand is resolved, keeping the startup cost of any
+    single command low.
+    """
+
+    lazy_commands: Mapping[str, LazyCommand]
+
+    def __init__(
+        self,
+        *args: Any,
+        lazy_commands: Optional[Mapping[str, LazyCommand]] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+        self._loaded: Dict[str, Command] = {}
+
+    def list_commands(self, ctx: Context) -> List[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx: Context, cmd_name: str) -> Optional[Command]:
+        if cmd_name in self.commands:
+            return self.commands[cmd_name]
+
+        if cmd_name in self._loaded:
+            return self._loaded[cmd_name]
+
+        entry = self.lazy_commands.get(cmd_name)
+        if entry is None:
+            return None
+
+        cmd = getattr(import_module(entry.module), entry.attribute)
+        if not isinstance(cmd, Command):
+            raise ValueError(f"{entry.module}.{entry.attribute} is not a command")
+
+        self._loaded[cmd_name] = cmd
+        return cmd
+
+    def format_commands(self, ctx: Context, formatter: HelpFormatter) -> None:
+        """
+        Write the command listing from the manifest, without importing
+        any subcommand modules.
+        """
+
+        names = [
+            name
+            for name in self.list_commands(ctx)
+            if name in self.lazy_commands or not self.commands[name].hidden
+        ]
+        if not names:
+            return
+
+        limit = formatter.width - 6 - max(len(name) for name in names)
+        rows = []
+        for name in names:
+            entry = self.lazy_commands.get(name)
+            if entry is not None and name not in self.commands:
+                rows.append((name, make_default_short_help(entry.short_help, limit)))
+            else:
+                rows.append((name, self.commands[name].get_short_help_str(limit)))
+
+        with formatter.section("Commands"):
+            formatter.write_dl(rows)
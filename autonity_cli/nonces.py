@@ -0,0 +1,208 @@
+"""
+Local nonce management.  When enabled (see `config.get_local_nonces`),
+nonces for new transactions are allocated from a persistent per-chain
+store, rather than by querying the account's transaction count for
+every transaction.  This allows many transactions to be created back
+to back (by separate processes, or offline) without reusing nonces.
+
+The store must be reconciled with the node (see `get_nonce_status`)
+if transactions are sent from the same account by other means, or if
+allocated nonces are never used.
+"""
+
+import os
+import os.path
+import sqlite3
+from typing import Callable, Optional, TypedDict
+
+from web3 import Web3
+from web3.types import ChecksumAddress, Nonce
+
+from .config import get_nonce_directory
+from .logging import log
+from .rpc_batch import RPCBatch
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nonces (
+    address TEXT PRIMARY KEY,
+    next_nonce INTEGER NOT NULL
+);
+"""
+
+STUCK_BLOCKS = 10
+"""
+Pending transactions are considered to be stuck if the mined
+transaction count of the account has not increased over this many
+blocks.
+"""
+
+
+class NonceStatus(TypedDict):
+    """
+    The locally allocated and on-chain nonce state of an account.
+    """
+
+    address: ChecksumAddress
+    next_nonce: Optional[int]
+    mined: int
+    pending: int
+    gap: Optional[range]
+    stuck: bool
+
+
+class NonceStore:
+    """
+    Next nonce to allocate for each account on a single chain, held in
+    an sqlite database so that allocation is atomic across processes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def allocate(
+        self,
+        address: ChecksumAddress,
+        get_pending_count: Callable[[], int],
+        count: int = 1,
+        min_nonce: int = 0,
+    ) -> Nonce:
+        """
+        Allocate `count` consecutive nonces for `address`, returning
+        the first.  The first allocation for an account starts from its
+        pending transaction count, given by `get_pending_count`.  No
+        nonce below `min_nonce` is allocated.
+        """
+        conn = self._connect()
+        with conn:
+            # Take the write lock before reading, so that concurrent
+            # processes never allocate the same nonce.
+            conn.execute("BEGIN IMMEDIATE")
+            next_nonce = self._get_next(conn, address)
+            if next_nonce is None:
+                next_nonce = get_pending_count()
+            next_nonce = max(next_nonce, min_nonce)
+            conn.execute(
+                "INSERT INTO nonces (address, next_nonce) VALUES (?, ?) "
+                "ON CONFLICT (address) DO UPDATE SET next_nonce = excluded.next_nonce",
+                (address, next_nonce + count),
+            )
+
+        log(f"allocated nonce {next_nonce} (count {count}) for {address}")
+        return Nonce(next_nonce)
+
+    def get(self, address: ChecksumAddress) -> Optional[int]:
+        """
+        The next nonce to be allocated for `address`, if known.
+        """
+        return self._get_next(self._connect(), address)
+
+    def set(self, address: ChecksumAddress, next_nonce: int) -> None:
+        """
+        Set the next nonce to be allocated for `address`.
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO nonces (address, next_nonce) VALUES (?, ?) "
+                "ON CONFLICT (address) DO UPDATE SET next_nonce = excluded.next_nonce",
+                (address, next_nonce),
+            )
+
+    def reconcile(
+        self,
+        address: ChecksumAddress,
+        mined: int,
+        pending: int,
+        reset: bool = False,
+        mined_before: Optional[int] = None,
+    ) -> NonceStatus:
+        """
+        Reconcile the local state for `address` with its mined and
+        pending transaction counts.  If transactions have been sent by
+        other means (the pending count is beyond the next local nonce),
+        or `reset` is True, the next nonce is set to the pending count.
+        Reports any gap (nonces which have been allocated but are not
+        known to the node), and whether pending transactions appear to
+        be stuck, given the mined count STUCK_BLOCKS blocks earlier
+        (`mined_before`, if known).
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            next_nonce = self._get_next(conn, address)
+            if next_nonce is not None and (reset or next_nonce < pending):
+                log(f"next nonce for {address}: {next_nonce} -> {pending}")
+                next_nonce = pending
+                conn.execute(
+                    "UPDATE nonces SET next_nonce = ? WHERE address = ?",
+                    (next_nonce, address),
+                )
+
+        return {
+            "address": address,
+            "next_nonce": next_nonce,
+            "mined": mined,
+            "pending": pending,
+            "gap": (
+                range(pending, next_nonce)
+                if next_nonce is not None and next_nonce > pending
+                else None
+            ),
+            "stuck": pending > mined and mined_before == mined,
+        }
+
+    @staticmethod
+    def _get_next(conn: sqlite3.Connection, address: ChecksumAddress) -> Optional[int]:
+        row = conn.execute(
+            "SELECT next_nonce FROM nonces WHERE address = ?", (address,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            nonce_dir = os.path.dirname(self.path)
+            if nonce_dir:
+                os.makedirs(nonce_dir, mode=0o700, exist_ok=True)
+
+            # Transactions are managed explicitly (see `allocate`).
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+
+        return self._conn
+
+
+def nonce_store(chain_id: int) -> NonceStore:
+    """
+    The nonce store for the given chain.
+    """
+    return NonceStore(os.path.join(get_nonce_directory(), f"chain-{chain_id}.sqlite"))
+
+
+def get_nonce_status(
+    w3: Web3, address: ChecksumAddress, reset: bool = False
+) -> NonceStatus:
+    """
+    Query the mined and pending transaction counts of `address`, and
+    reconcile the local nonce state with them (see
+    `NonceStore.reconcile`).  The mined count STUCK_BLOCKS blocks ago
+    is also queried (in the same batch), to detect stuck transactions.
+    If the node no longer holds the state of that block, transactions
+    are not reported as stuck.
+    """
+    block_number = w3.eth.block_number
+    batch = RPCBatch(w3)
+    batch.add("eth_chainId", [])
+    batch.add("eth_getTransactionCount", [address, block_number])
+    batch.add("eth_getTransactionCount", [address, "pending"])
+    batch.add("eth_getTransactionCount", [address, max(block_number - STUCK_BLOCKS, 0)])
+    chain_id, mined, pending, mined_before = batch.execute(raise_errors=False)
+    for result in (chain_id, mined, pending):
+        if isinstance(result, Exception):
+            raise result
+    if isinstance(mined_before, Exception):
+        log(f"failed to query transaction count at earlier block: {mined_before}")
+        mined_before = None
+
+    return nonce_store(chain_id).reconcile(address, mined, pending, reset, mined_before)
@@ -4,7 +4,9 @@ Command line option sets used by multiple commands.
 
 from typing import Any, Callable, TypeVar
 
-from click import Path, option
+from click import Choice, IntRange, Path, option
+
+from .fees import FEE_STRATEGIES
 
 Func = TypeVar("Func", bound=Callable[..., Any])
 
@@ -20,6 +22,35 @@ rpc_endpoint_option: Decorator = option(
 )
 
 
+# a --batch-size <n> option, for commands which batch JSON-RPC requests
+batch_size_option: Decorator = option(
+    "--batch-size",
+    type=IntRange(min=1),
+    default=100,
+    show_default=True,
+    help="maximum number of requests per JSON-RPC batch.",
+)
+
+# a --block <tag> option, for queries of state as of a given block
+block_option: Decorator = option(
+    "--block",
+    "block_str",
+    metavar="TAG",
+    help="query state as of block TAG: a block number or hash, or one of "
+    "'latest', 'earliest' or 'pending'  [default: latest]",
+)
+
+# a --concurrency <n> option, for commands which send JSON-RPC batches
+# in parallel
+concurrency_option: Decorator = option(
+    "--concurrency",
+    type=IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="maximum number of JSON-RPC batches in flight at a time.",
+)
+
+
 def keystore_option() -> Decorator:
     """
     Option: --keystore <directory>.
@@ -128,6 +159,7 @@ def tx_aux_options(fn: Callable) -> Callable:
       --max-fee-per-gas
       --max-priority-fee-per-gas
       --fee-factor,
+      --fee-strategy
       --nonce
       --chain-id
     """
@@ -154,6 +186,11 @@ def tx_aux_options(fn: Callable) -> Callable:
         type=float,
         help="set maxFeePerGas to <last-basefee> x <fee-factor> [default: 2].",
     )(fn)
+    fn = option(
+        "--fee-strategy",
+        type=Choice(list(FEE_STRATEGIES)),
+        help="set fees not otherwise given, based on the fees of recent blocks.",
+    )(fn)
     fn = option(
         "--nonce",
         "-n",
@@ -0,0 +1,249 @@
+"""
+Batched JSON-RPC requests.  Used by commands which would otherwise
+make many independent requests, one round trip at a time.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, cast
+
+from web3 import Web3
+from web3._utils.abi import get_abi_output_types, map_abi_data
+from web3._utils.method_formatters import (
+    get_request_formatters,
+    get_result_formatters,
+)
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+from web3._utils.request import make_post_request
+from web3.contract.contract import ContractFunction
+from web3.providers import HTTPProvider
+from web3.types import (
+    BlockIdentifier,
+    ChecksumAddress,
+    HexBytes,
+    RPCEndpoint,
+    RPCResponse,
+)
+
+from .logging import log
+
+DEFAULT_BATCH_SIZE = 100
+"""
+Default maximum number of requests sent in a single JSON-RPC batch.
+"""
+
+
+def supports_concurrent_requests(w3: Web3) -> bool:
+    """
+    Whether requests may be made from several threads at once.  Only
+    true for HTTP, since other providers share a single connection.
+    """
+    return isinstance(w3.provider, HTTPProvider)
+
+
+def encode_call(
+    function: ContractFunction, address: Optional[ChecksumAddress] = None
+) -> Dict[str, Any]:
+    """
+    The eth_call transaction for a contract function (optionally sent
+    to the contract at `address` instead).
+    """
+    # pylint: disable=protected-access
+    return {
+        "to": address or function.address,
+        "data": function._encode_transaction_data(),
+    }
+
+
+def decode_call_result(w3: Web3, function: ContractFunction, result: Any) -> Any:
+    """
+    Decode the (raw) result of an eth_call in the same way as
+    `function.call()`.
+    """
+    output_types = get_abi_output_types(function.abi)
+    decoded = w3.codec.decode(output_types, HexBytes(result))
+    normalized = map_abi_data(BASE_RETURN_NORMALIZERS, output_types, decoded)
+    return normalized[0] if len(normalized) == 1 else normalized
+
+
+def is_execution_reverted(err: BaseException) -> bool:
+    """
+    Whether an error returned by `RPCBatch.execute` (with `raise_errors`
+    unset) is an eth_call which reverted, as opposed to a failure of the
+    node or the connection.
+    """
+    error = err.args[0] if isinstance(err, ValueError) and err.args else None
+    if not isinstance(error, dict):
+        return False
+    return error.get("code") == 3 or "execution reverted" in str(
+        error.get("message", "")
+    )
+
+
+class _Request(NamedTuple):
+    method: RPCEndpoint
+    params: Sequence[Any]
+    formatter: Callable[[Any], Any]
+
+
+class RPCBatch:
+    """
+    Collects JSON-RPC requests, to be sent together by `execute`, in
+    JSON-RPC batches of at most `batch_size` requests.  Requests take
+    the same (python) parameters as the corresponding Web3 methods, and
+    results are formatted in the same way.
+
+    Up to `max_workers` batches are in flight at any time.  For
+    providers other than HTTP, the requests are sent one by one.
+    """
+
+    def __init__(
+        self, w3: Web3, batch_size: int = DEFAULT_BATCH_SIZE, max_workers: int = 1
+    ):
+        if batch_size < 1:
+            raise ValueError("batch size must be positive")
+        if max_workers < 1:
+            raise ValueError("number of workers must be positive")
+
+        self.w3 = w3
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self._requests: List[_Request] = []
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def add(
+        self,
+        method: str,
+        params: Sequence[Any],
+        formatter: Optional[Callable[[Any], Any]] = None,
+    ) -> int:
+        """
+        Queue a request.  Returns the index of the result in the list
+        returned by `execute`.  By default, results are formatted as
+        Web3 would for the given method.
+        """
+        # (The formatter getters are annotated as returning dicts, but
+        # return callables.)
+        rpc_method = RPCEndpoint(method)
+        request_formatter = cast(Callable, get_request_formatters(rpc_method))
+        if formatter is None:
+            formatter = cast(Callable, get_result_formatters(rpc_method, self.w3.eth))
+
+        self._requests.append(
+            _Request(rpc_method, request_formatter(tuple(params)), formatter)
+        )
+        return len(self._requests) - 1
+
+    def add_call(
+        self,
+        function: ContractFunction,
+        block_identifier: Optional[BlockIdentifier] = None,
+        address: Optional[ChecksumAddress] = None,
+    ) -> int:
+        """
+        Queue an eth_call for a contract function.  The result is
+        decoded in the same way as `function.call()`.  If `address` is
+        given, the function is called on the contract at that address
+        (with the same ABI) instead, allowing a single ContractFunction
+        to be used to query many instances of a contract.
+        """
+
+        def decode(result: Any) -> Any:
+            return decode_call_result(self.w3, function, result)
+
+        block = "latest" if block_identifier is None else block_identifier
+        return self.add("eth_call", [encode_call(function, address), block], decode)
+
+    def execute(self, raise_errors: bool = True) -> List[Any]:
+        """
+        Send all queued requests, and return their results in the order
+        they were added.  Raises ValueError if any request failed (in
+        line with the behaviour of Web3).  If `raise_errors` is False,
+        the result of each failed request is instead the exception
+        describing the failure.
+        """
+
+        requests, self._requests = self._requests, []
+        batches = [
+            requests[start : start + self.batch_size]
+            for start in range(0, len(requests), self.batch_size)
+        ]
+
+        def send(batch: Sequence[_Request]) -> List[Any]:
+            return self._send(batch, raise_errors)
+
+        if (
+            self.max_workers > 1
+            and len(batches) > 1
+            and supports_concurrent_requests(self.w3)
+        ):
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                batch_results = list(executor.map(send, batches))
+        else:
+            batch_results = [send(batch) for batch in batches]
+
+        return [result for results in batch_results for result in results]
+
+    def _send(self, requests: Sequence[_Request], raise_errors: bool) -> List[Any]:
+        provider = self.w3.provider
+        try:
+            if isinstance(provider, HTTPProvider):
+                responses = self._send_http_batch(provider, requests)
+            else:
+                responses = [
+                    provider.make_request(request.method, request.params)
+                    for request in requests
+                ]
+        except Exception as err:  # pylint: disable=broad-except
+            if raise_errors:
+                raise
+            return [err] * len(requests)
+
+        results: List[Any] = []
+        for request, response in zip(requests, responses):
+            if "error" in response:
+                if raise_errors:
+                    raise ValueError(response["error"])
+                results.append(ValueError(response["error"]))
+                continue
+            result = response.get("result")
+            try:
+                results.append(None if result is None else request.formatter(result))
+            except Exception as err:  # pylint: disable=broad-except
+                # (For example, call results which cannot be decoded.)
+                if raise_errors:
+                    raise
+                results.append(err)
+
+        return results
+
+    @staticmethod
+    def _send_http_batch(
+        provider: HTTPProvider, requests: Sequence[_Request]
+    ) -> List[RPCResponse]:
+        endpoint_uri = provider.endpoint_uri
+        assert endpoint_uri is not None
+        log(f"sending batch of {len(requests)} requests to {provider.endpoint_uri}")
+        payload = [
+            {"jsonrpc": "2.0", "method": req.method, "params": req.params, "id": idx}
+            for idx, req in enumerate(requests)
+        ]
+        raw_response = make_post_request(
+            endpoint_uri,
+            Web3.to_json(payload).encode("utf8"),  # type: ignore
+            **provider.get_request_kwargs(),
+        )
+        response = json.loads(raw_response)
+
+        # Some nodes reply with a single error object if the batch
+        # itself is rejected.
+        if not isinstance(response, list):
+            raise ValueError(response.get("error", response))
+
+        responses_by_id = {resp.get("id"): cast(RPCResponse, resp) for resp in response}
+        try:
+            return [responses_by_id[idx] for idx in range(len(requests))]
+        except KeyError as err:
+            raise ValueError(f"missing response for batch request {err}") from err
@@ -0,0 +1,299 @@
+"""
+Notification of new blocks.  For WebSocket and IPC endpoints, a
+`newHeads` subscription is used.  For HTTP endpoints (or if the
+subscription cannot be created), the block number is polled at an
+interval adapted to the observed block period.
+"""
+
+import asyncio
+import json
+import queue
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Generator,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from web3 import Web3
+from web3.providers import IPCProvider, WebsocketProvider
+
+from .logging import log
+
+MIN_POLL_INTERVAL = 0.1
+MAX_POLL_INTERVAL = 2.0
+SUBSCRIBE_TIMEOUT = 10.0
+
+# Large enough for any header notification.
+_MAX_MESSAGE_SIZE = 2**24
+
+_SUBSCRIBED = object()
+
+_Connection = Tuple[Callable[[str], Awaitable[None]], Callable[[], Awaitable[str]]]
+
+BlockNumbers = Generator[int, Optional[float], None]
+"""
+Generator of block numbers, which accepts a new timeout (see
+`new_blocks`).
+"""
+
+
+@asynccontextmanager
+async def _ipc_connection(ipc_path: str) -> AsyncIterator[_Connection]:
+    reader, writer = await asyncio.open_unix_connection(
+        ipc_path, limit=_MAX_MESSAGE_SIZE
+    )
+
+    async def send(msg: str) -> None:
+        writer.write(msg.encode("utf8") + b"\n")
+        await writer.drain()
+
+    async def recv() -> str:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("connection closed")
+        return line.decode("utf8")
+
+    try:
+        yield send, recv
+    finally:
+        writer.close()
+
+
+@asynccontextmanager
+async def _ws_connection(endpoint_uri: str) -> AsyncIterator[_Connection]:
+    import websockets  # pylint: disable=import-outside-toplevel
+
+    async with websockets.connect(endpoint_uri, max_size=_MAX_MESSAGE_SIZE) as conn:
+
+        async def recv() -> str:
+            msg = await conn.recv()
+            return msg if isinstance(msg, str) else msg.decode("utf8")
+
+        yield conn.send, recv
+
+
+class NewHeadsSubscription:
+    """
+    A `newHeads` subscription over a dedicated connection, received on
+    a background thread between calls to `start` and `close`.
+    """
+
+    def __init__(self, endpoint: str, ipc: bool):
+        self._endpoint = endpoint
+        self._ipc = ipc
+        self._queue: "queue.Queue[Union[object, int, BaseException]]" = queue.Queue()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        """
+        Connect and subscribe, raising an exception on failure.
+        """
+        self._thread.start()
+        try:
+            item = self._queue.get(timeout=SUBSCRIBE_TIMEOUT)
+        except queue.Empty as err:
+            self.close()
+            raise TimeoutError("timed out creating subscription") from err
+
+        if isinstance(item, BaseException):
+            raise item
+
+    def wait(self, timeout: Optional[float]) -> Optional[int]:
+        """
+        Wait for the next new block, and return its number (or the
+        highest number, if several blocks have arrived).  Returns None
+        if no block arrives within `timeout` seconds.
+        """
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+        while True:
+            if isinstance(item, BaseException):
+                raise item
+            assert isinstance(item, int)
+            number = item
+
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return number
+
+            if isinstance(item, int):
+                item = max(item, number)
+
+    def close(self) -> None:
+        """
+        Stop the background thread and close the connection.
+        """
+        if self._loop is not None and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join(timeout=1.0)
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        try:
+            self._task = loop.create_task(self._receive())
+            self._loop = loop
+            loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as err:  # pylint: disable=broad-except
+            self._queue.put(err)
+        finally:
+            loop.close()
+
+    async def _receive(self) -> None:
+        connection = (
+            _ipc_connection(self._endpoint)
+            if self._ipc
+            else _ws_connection(self._endpoint)
+        )
+        async with connection as (send, recv):
+            await send(
+                json.dumps(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                        "method": "eth_subscribe",
+                        "params": ["newHeads"],
+                    }
+                )
+            )
+            response = json.loads(await recv())
+            if "error" in response:
+                raise ValueError(response["error"])
+
+            subscription_id = response["result"]
+            self._queue.put(_SUBSCRIBED)
+
+            while True:
+                msg = json.loads(await recv())
+                params = msg.get("params") or {}
+                if (
+                    msg.get("method") == "eth_subscription"
+                    and params.get("subscription") == subscription_id
+                ):
+                    self._queue.put(int(params["result"]["number"], 16))
+
+
+def subscribe_new_heads(w3: Web3) -> Optional[NewHeadsSubscription]:
+    """
+    A (not yet started) `newHeads` subscription to the endpoint of `w3`,
+    or None for HTTP endpoints.
+    """
+    provider = w3.provider
+    if isinstance(provider, WebsocketProvider):
+        return NewHeadsSubscription(str(provider.endpoint_uri), ipc=False)
+    if isinstance(provider, IPCProvider):
+        return NewHeadsSubscription(
+            str(provider.ipc_path), ipc=True  # type: ignore[has-type]
+        )
+
+    return None
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    if deadline is None:
+        return None
+
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError()
+
+    return remaining
+
+
+def _deadline(timeout: Optional[float]) -> Optional[float]:
+    return None if timeout is None else time.monotonic() + timeout
+
+
+def _poll_new_blocks(w3: Web3, deadline: Optional[float]) -> BlockNumbers:
+    """
+    Poll the block number.  Shortly before the next block is expected
+    (based on the observed block period) poll at MIN_POLL_INTERVAL,
+    backing off to MAX_POLL_INTERVAL.
+    """
+
+    last_number = w3.eth.block_number
+    last_time = time.monotonic()
+    timeout = yield last_number
+    if timeout is not None:
+        deadline = _deadline(timeout)
+
+    delay = backoff = MIN_POLL_INTERVAL
+    while True:
+        remaining = _remaining(deadline)
+        time.sleep(delay if remaining is None else min(delay, remaining))
+        _remaining(deadline)
+
+        number = w3.eth.block_number
+        now = time.monotonic()
+        if number > last_number:
+            period = (now - last_time) / (number - last_number)
+            last_number, last_time = number, now
+            timeout = yield number
+            if timeout is not None:
+                deadline = _deadline(timeout)
+            delay = max(MIN_POLL_INTERVAL, 0.8 * period)
+            backoff = MIN_POLL_INTERVAL
+        else:
+            delay = backoff
+            backoff = min(MAX_POLL_INTERVAL, backoff * 1.5)
+
+
+def new_blocks(w3: Web3, timeout: Optional[float] = None) -> BlockNumbers:
+    """
+    Yield the current block number, and then the number of each new
+    block as it arrives (when several blocks arrive at once, only the
+    highest number is yielded).  Raises TimeoutError once `timeout`
+    seconds have passed.  A new timeout, counted from the time it is
+    given, can be set by sending it to the generator.  If the
+    subscription fails (at the start, or later if the connection is
+    lost), the block number is polled instead.
+    """
+
+    deadline = _deadline(timeout)
+    subscription = subscribe_new_heads(w3)
+    if subscription is not None:
+        try:
+            subscription.start()
+        except Exception as err:  # pylint: disable=broad-except
+            log(f"failed to subscribe to new blocks ({err}). falling back to polling")
+            subscription = None
+
+    if subscription is None:
+        yield from _poll_new_blocks(w3, deadline)
+        return
+
+    try:
+        # Query the head only once subscribed, so no block is missed.
+        number: int = w3.eth.block_number
+        while True:
+            timeout = yield number
+            if timeout is not None:
+                deadline = _deadline(timeout)
+
+            remaining = _remaining(deadline)
+            try:
+                wait_number = subscription.wait(remaining)
+            except Exception as err:  # pylint: disable=broad-except
+                log(f"new block subscription failed ({err}). falling back to polling")
+                break
+            if wait_number is None:
+                raise TimeoutError()
+            number = wait_number
+    finally:
+        subscription.close()
+
+    yield from _poll_new_blocks(w3, deadline)
@@ -8,19 +8,63 @@ If aut implements an ipyothon 'console mode', perhaps these are the
 functions meant to be called in that.
 """
 
-from typing import List, Optional, TypedDict
+import json
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypedDict,
+    Union,
+    cast,
+)
 
 from autonity import Autonity
+from autonity.abi_manager import ABIManager
+from autonity.autonity import committee_member_from_tuple, config_from_tuple
+from autonity.erc20 import ERC20
 from autonity.utils.denominations import (
     format_auton_quantity,
     format_newton_quantity,
 )
+from autonity.validator import (
+    NodeAddress,
+    OracleAddress,
+    ValidatorDescriptor,
+    validator_descriptor_from_tuple,
+)
+from eth_abi.exceptions import DecodingError
 from web3 import Web3
+from web3.contract.contract import ContractFunction
 from web3.types import (
     BlockData,
     BlockIdentifier,
     ChecksumAddress,
+    HexBytes,
+    RPCEndpoint,
+    TxData,
+    TxParams,
+    TxReceipt,
+)
+
+from .cache import ChainCache, chain_cache
+from .logging import log
+from .rpc_batch import (
+    DEFAULT_BATCH_SIZE,
+    RPCBatch,
+    decode_call_result,
+    encode_call,
+    is_execution_reverted,
+    supports_concurrent_requests,
 )
+from .subscription import new_blocks
 
 
 class AccountStats(TypedDict):
@@ -34,26 +78,74 @@ class AccountStats(TypedDict):
     ntn_balance: str
 
 
+class ValidatorAddresses(TypedDict):
+    """
+    The addresses associated with a validator at registration, which do
+    not subsequently change.
+    """
+
+    node_address: NodeAddress
+    treasury: ChecksumAddress
+    oracle_address: OracleAddress
+    liquid_contract: ChecksumAddress
+
+
+class ValidatorOverview(ValidatorDescriptor):
+    """
+    A validator descriptor, with the voting power of the validator if
+    it is a member of the current committee (None otherwise).
+    """
+
+    voting_power: Optional[int]
+
+
+class TokenMetadata(TypedDict):
+    """
+    Immutable properties of an ERC20 token.  Name and symbol are None
+    if not implemented by the token.
+    """
+
+    name: Optional[str]
+    symbol: Optional[str]
+    decimals: int
+
+
+TOKEN_METADATA_NAMESPACE = "token-metadata"
+
+
 def get_account_stats(
-    w3: Web3, accounts: List[ChecksumAddress], tag: Optional[BlockIdentifier] = None
+    w3: Web3,
+    accounts: List[ChecksumAddress],
+    tag: Optional[BlockIdentifier] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
 ) -> List[AccountStats]:
     """
     For a list of accounts, return a dictionary with accounts as keys
     and list of transaction count and balance (in that order) as
     values. Tag is one of None, 'latest', 'earliest', 'pending' or a
     block number, and the values are as of block described by the
-    tag. The underlying RPC methods are eth_getBalance and
-    eth_getTransactionCount.
+    tag. The underlying RPC methods are eth_getBalance,
+    eth_getTransactionCount and eth_call (for the NTN balance), sent
+    as JSON-RPC batches of at most `batch_size` requests.
     """
-    stats: List[AccountStats] = []
+
+    # Pin 'latest' to a specific block, so that all values are
+    # consistent even if they are spread over several batches.
+    if tag is None or tag == "latest":
+        tag = w3.eth.block_number
+
     autonity = Autonity(w3)
+    batch = RPCBatch(w3, batch_size)
     for acct in accounts:
-        txcount = w3.eth.get_transaction_count(acct)
-        if tag is None:
-            balance = w3.eth.get_balance(acct)
-        else:
-            balance = w3.eth.get_balance(acct, tag)
-        ntn_balance = autonity.balance_of(acct)
+        batch.add("eth_getTransactionCount", [acct, tag])
+        batch.add("eth_getBalance", [acct, tag])
+        batch.add_call(autonity.contract.functions.balanceOf(acct), tag)
+
+    results = batch.execute()
+
+    stats: List[AccountStats] = []
+    for idx, acct in enumerate(accounts):
+        txcount, balance, ntn_balance = results[3 * idx : 3 * idx + 3]
         stats.append(
             {
                 "account": acct,
@@ -66,13 +158,755 @@ def get_account_stats(
     return stats
 
 
+CALL_RESULTS_NAMESPACE = "call-results"
+
+
+def _call_result_key(call: Dict[str, Any], tag: BlockIdentifier) -> Optional[str]:
+    if isinstance(tag, int):
+        block = str(tag)
+    elif isinstance(tag, bytes):
+        block = HexBytes(tag).hex()
+    else:
+        return None
+
+    return f"{call['to']}/{call['data']}@{block}"
+
+
+def call_functions(
+    w3: Web3,
+    functions: Sequence[ContractFunction],
+    tag: Optional[BlockIdentifier] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = 1,
+    raise_errors: bool = True,
+) -> List[Any]:
+    """
+    Call the given contract functions as of the block described by
+    `tag`, using JSON-RPC batches, and return the decoded results in
+    the same order.  If `raise_errors` is False, the result of each
+    failed call is instead the exception describing the failure.
+
+    Blocks are final once produced, so the results of calls at a
+    specific block (given by number or hash) never change.  These are
+    held in the persistent cache, keyed by contract address, calldata
+    and block, so that only calls not already seen are sent.
+    """
+
+    block: BlockIdentifier = "latest" if tag is None else tag
+    calls = [encode_call(function) for function in functions]
+    keys = [_call_result_key(call, block) for call in calls]
+
+    raw_results: Dict[int, Any] = {}
+    cache = chain_cache(w3) if any(keys) else None
+    if cache:
+        cached = cache.get_many(CALL_RESULTS_NAMESPACE, [key for key in keys if key])
+        for idx, key in enumerate(keys):
+            if key in cached:
+                raw_results[idx] = cached[key]
+
+    uncalled = [idx for idx in range(len(calls)) if idx not in raw_results]
+    if uncalled:
+        batch = RPCBatch(w3, batch_size, max_workers)
+        for idx in uncalled:
+            batch.add("eth_call", [calls[idx], block], lambda result: result)
+
+        fetched: Dict[str, Any] = {}
+        for idx, result in zip(uncalled, batch.execute(raise_errors)):
+            raw_results[idx] = result
+            key = keys[idx]
+            if key and not isinstance(result, Exception):
+                fetched[key] = result
+
+        if cache:
+            cache.set_many(CALL_RESULTS_NAMESPACE, fetched)
+
+    results: List[Any] = []
+    for idx, function in enumerate(functions):
+        result = raw_results[idx]
+        if not isinstance(result, Exception):
+            try:
+                result = decode_call_result(w3, function, result)
+            except Exception as err:  # pylint: disable=broad-except
+                if raise_errors:
+                    raise
+                result = err
+        results.append(result)
+
+    return results
+
+
+def get_validator_descriptors(
+    w3: Web3,
+    validator_addrs: Sequence[ChecksumAddress],
+    tag: Optional[BlockIdentifier] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = 1,
+) -> List[ValidatorDescriptor]:
+    """
+    Return the descriptors of the given validators (in the same order)
+    as of the block described by `tag`.  The getValidator calls are
+    sent as JSON-RPC batches, with at most `max_workers` batches in
+    flight at a time (see `call_functions`).
+    """
+
+    autonity = Autonity(w3)
+    functions = [autonity.contract.functions.getValidator(v) for v in validator_addrs]
+    return [
+        validator_descriptor_from_tuple(value)
+        for value in call_functions(w3, functions, tag, batch_size, max_workers)
+    ]
+
+
+def get_validator_addresses(
+    w3: Web3,
+    validator_addrs: Sequence[NodeAddress],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = 1,
+) -> Dict[NodeAddress, ValidatorAddresses]:
+    """
+    Return the addresses associated with each of the given validators.
+    These are held in the persistent cache (keyed by chain and
+    Autonity contract address), so that only validators not already
+    seen are queried.  Addresses which are not registered validators
+    are omitted from the result.
+    """
+
+    autonity = Autonity(w3)
+    cache = chain_cache(w3)
+    namespace = f"validator-addresses/{autonity.contract.address}"
+    addresses: Dict[NodeAddress, ValidatorAddresses] = (
+        cache.get_many(namespace, validator_addrs) if cache else {}  # type: ignore
+    )
+
+    unknown = [vaddr for vaddr in validator_addrs if vaddr not in addresses]
+    if unknown:
+        log(f"fetching addresses of {len(unknown)} validators")
+        fetched: Dict[NodeAddress, ValidatorAddresses] = {}
+        descriptors = get_validator_descriptors(
+            w3, unknown, None, batch_size, max_workers
+        )
+        for vaddr, vdesc in zip(unknown, descriptors):
+            # Unregistered validators have an empty descriptor.
+            if vdesc["node_address"] != vaddr:
+                continue
+
+            fetched[vaddr] = {
+                "node_address": vdesc["node_address"],
+                "treasury": vdesc["treasury"],
+                "oracle_address": vdesc["oracle_address"],
+                "liquid_contract": vdesc["liquid_contract"],
+            }
+
+        if cache:
+            cache.set_many(namespace, cast(Dict[str, Any], fetched))
+        addresses.update(fetched)
+
+    return addresses
+
+
+def get_lntn_balances(
+    w3: Web3,
+    accounts: Sequence[ChecksumAddress],
+    validators: Sequence[ValidatorAddresses],
+    tag: Optional[BlockIdentifier] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = 1,
+) -> Dict[ChecksumAddress, Dict[NodeAddress, int]]:
+    """
+    For each account, return the non-zero Liquid Newton balances held
+    with each of the given validators, as of the block described by
+    `tag`.  All balanceOf calls (one per account and validator) are
+    sent as JSON-RPC batches, with at most `max_workers` batches in
+    flight at a time.
+    """
+
+    # A single contract object is used to encode the balanceOf call
+    # for each account, which is then sent to every Liquid Newton
+    # contract.
+    erc20 = w3.eth.contract(abi=ABIManager.load_abi("IERC20"))
+    batch = RPCBatch(w3, batch_size, max_workers)
+    for acct in accounts:
+        balance_of = erc20.functions.balanceOf(acct)
+        for validator in validators:
+            batch.add_call(balance_of, tag, validator["liquid_contract"])
+
+    results = iter(batch.execute())
+    balances: Dict[ChecksumAddress, Dict[NodeAddress, int]] = {}
+    for acct in accounts:
+        acct_balances = balances.setdefault(acct, {})
+        for validator in validators:
+            bal = next(results)
+            if bal:
+                acct_balances[validator["node_address"]] = bal
+
+    return balances
+
+
+PROTOCOL_GETTERS: Dict[str, Tuple[str, Optional[Callable[[Any], Any]]]] = {
+    "atn_total_redistributed": ("atnTotalRedistributed", None),
+    "block_period": ("getBlockPeriod", None),
+    "commission_rate_precision": ("COMMISSION_RATE_PRECISION", None),
+    "committee": (
+        "getCommittee",
+        lambda members: [committee_member_from_tuple(m) for m in members],
+    ),
+    "committee_enodes": ("getCommitteeEnodes", None),
+    "config": ("config", config_from_tuple),
+    "deployer": ("deployer", None),
+    "epoch_id": ("epochID", None),
+    "epoch_period": ("getEpochPeriod", None),
+    "epoch_reward": ("epochReward", None),
+    "epoch_total_bonded_stake": ("epochTotalBondedStake", None),
+    "inflation_reserve": ("inflationReserve", None),
+    "last_epoch_block": ("getLastEpochBlock", None),
+    "last_epoch_time": ("lastEpochTime", None),
+    "max_bond_applied_gas": ("maxBondAppliedGas", None),
+    "max_committee_size": ("getMaxCommitteeSize", None),
+    "max_rewards_distribution_gas": ("maxRewardsDistributionGas", None),
+    "max_unbond_applied_gas": ("maxUnbondAppliedGas", None),
+    "max_unbond_released_gas": ("maxUnbondReleasedGas", None),
+    "minimum_base_fee": ("getMinimumBaseFee", None),
+    "operator": ("getOperator", None),
+    "staking_gas_price": ("stakingGasPrice", None),
+    "treasury_account": ("getTreasuryAccount", None),
+    "treasury_fee": ("getTreasuryFee", None),
+    "unbonding_period": ("getUnbondingPeriod", None),
+    "validators": ("getValidators", None),
+    "version": ("getVersion", None),
+}
+"""
+The parameterless getters of the Autonity contract (named as the `aut
+protocol` commands), as the contract function name and a function
+converting the result (as the autonity.py wrapper does).
+"""
+
+
+def get_protocol_values(
+    w3: Web3,
+    getters: Sequence[str],
+    tag: Optional[BlockIdentifier] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = 1,
+    raise_errors: bool = True,
+) -> Dict[str, Any]:
+    """
+    Evaluate the given getters (see PROTOCOL_GETTERS) of the Autonity
+    contract as of the block described by `tag` (see `call_functions`).
+    If `raise_errors` is False, getters which fail (for example,
+    because they are not supported by the deployed contract) are given
+    as None.
+    """
+
+    autonity = Autonity(w3)
+    functions = [
+        getattr(autonity.contract.functions, PROTOCOL_GETTERS[getter][0])()
+        for getter in getters
+    ]
+    results = call_functions(w3, functions, tag, batch_size, max_workers, raise_errors)
+
+    values: Dict[str, Any] = {}
+    for getter, value in zip(getters, results):
+        if isinstance(value, Exception):
+            log(f"failed to evaluate {getter}: {value}")
+            values[getter] = None
+            continue
+
+        convert = PROTOCOL_GETTERS[getter][1]
+        values[getter] = convert(value) if convert else value
+
+    return values
+
+
+def get_protocol_snapshot(
+    w3: Web3,
+    getters: Sequence[str],
+    tag: Optional[BlockIdentifier] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = 1,
+) -> Dict[str, Any]:
+    """
+    Evaluate the given getters at a single block (see
+    `get_protocol_values`), returning the block along with the value
+    of each getter.  Getters which fail are given as None.
+    """
+
+    # Pin 'latest' to a specific block, so that all values are
+    # consistent even if they are spread over several batches.
+    if tag is None or tag == "latest":
+        tag = w3.eth.block_number
+
+    snapshot: Dict[str, Any] = {
+        "block": HexBytes(tag).hex() if isinstance(tag, bytes) else tag
+    }
+    snapshot.update(
+        get_protocol_values(w3, getters, tag, batch_size, max_workers, False)
+    )
+    return snapshot
+
+
+def get_validator_overview(
+    w3: Web3,
+    tag: Optional[BlockIdentifier] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = 1,
+) -> Tuple[BlockIdentifier, List[ValidatorOverview]]:
+    """
+    Return the descriptors of all registered validators, joined with
+    the committee membership, as of a single block (see
+    `get_protocol_snapshot`).  The validator list and committee are
+    fetched in one batch, then the getValidator calls are sent as
+    JSON-RPC batches with at most `max_workers` batches in flight at a
+    time.  Returns the block along with the validators, in the order
+    they are registered.
+    """
+
+    if tag is None or tag == "latest":
+        tag = w3.eth.block_number
+
+    values = get_protocol_values(
+        w3, ["validators", "committee"], tag, batch_size, max_workers
+    )
+    voting_power = {
+        member["address"]: member["voting_power"] for member in values["committee"]
+    }
+    descriptors = get_validator_descriptors(
+        w3, values["validators"], tag, batch_size, max_workers
+    )
+    overview = [
+        ValidatorOverview(**vdesc, voting_power=voting_power.get(vdesc["node_address"]))
+        for vdesc in descriptors
+    ]
+    return tag, overview
+
+
+def get_token_metadata(
+    w3: Web3, token_address: ChecksumAddress, refresh: bool = False
+) -> TokenMetadata:
+    """
+    Return the name, symbol and decimals of an ERC20 token.  These are
+    held in the persistent cache, so that only the first query (or a
+    query with `refresh` set) goes to the node.
+    """
+
+    cache = chain_cache(w3)
+    if cache and not refresh:
+        cached = cache.get(TOKEN_METADATA_NAMESPACE, token_address)
+        if cached is not None:
+            return cached
+
+    log(f"fetching metadata for token {token_address}")
+    functions = ERC20(w3, token_address).contract.functions
+    getters = [functions.name(), functions.symbol(), functions.decimals()]
+    batch = RPCBatch(w3)
+    for getter in getters:
+        batch.add("eth_call", [encode_call(getter), "latest"], lambda result: result)
+    batch.add("eth_getCode", [token_address, "latest"])
+    *results, code = batch.execute(raise_errors=False)
+    if isinstance(code, Exception):
+        raise code
+
+    # As for ERC20, getters which revert or give no valid result (for
+    # example, because they are not implemented) fall back to default
+    # values.  Any other error (of the node or connection) is raised.
+    values: List[Any] = []
+    defaulted = False
+    for getter, result, default in zip(getters, results, [None, None, 0]):
+        if isinstance(result, Exception):
+            if not is_execution_reverted(result):
+                raise result
+            values.append(default)
+            defaulted = True
+            continue
+        try:
+            values.append(decode_call_result(w3, getter, result))
+        except DecodingError:
+            values.append(default)
+            defaulted = True
+
+    metadata: TokenMetadata = {
+        "name": values[0],
+        "symbol": values[1],
+        "decimals": values[2],
+    }
+
+    # Default values (including those of addresses that do not hold a
+    # contract) are not remembered.
+    if cache and code and not defaulted:
+        cache.set(TOKEN_METADATA_NAMESPACE, token_address, metadata)
+
+    return metadata
+
+
+BLOCKS_NAMESPACE = "blocks"
+FULL_BLOCKS_NAMESPACE = "blocks-full"
+BLOCK_HASHES_NAMESPACE = "block-hashes"
+RECEIPTS_NAMESPACE = "receipts"
+
+
+def _to_cacheable(data: Any) -> Any:
+    """
+    JSON form of Web3 results (with hex strings in place of bytes).
+    """
+    return json.loads(Web3.to_json(data))
+
+
+def cache_blocks(
+    cache: ChainCache, blocks: Sequence[BlockData], full_transactions: bool = False
+) -> None:
+    """
+    Store blocks in the cache, keyed by number, along with the mapping
+    from block hash to number.
+    """
+    namespace = FULL_BLOCKS_NAMESPACE if full_transactions else BLOCKS_NAMESPACE
+    cache.set_many(
+        namespace, {str(block["number"]): _to_cacheable(block) for block in blocks}
+    )
+    cache.set_many(
+        BLOCK_HASHES_NAMESPACE,
+        {HexBytes(block["hash"]).hex(): block["number"] for block in blocks},
+    )
+
+
 # TODO: Properly typed object.
 # TODO: Move to autonity.py
-def get_block(w3: Web3, identifier: BlockIdentifier) -> BlockData:
+def get_block(
+    w3: Web3, identifier: BlockIdentifier, full_transactions: bool = False
+) -> BlockData:
     """
     Returns a dictionary of block data for the block identified by
     'identifier', which is either a block number/height or string
     representation of a 32 byte block hash.
+
+    Blocks never change once produced, and are held in the persistent
+    cache.  Blocks read from the cache hold hex strings in place of
+    bytes values.
     """
-    block_data = w3.eth.get_block(identifier)
+
+    cache = chain_cache(w3)
+    namespace = FULL_BLOCKS_NAMESPACE if full_transactions else BLOCKS_NAMESPACE
+    if cache:
+        number: Optional[int] = None
+        if isinstance(identifier, int):
+            number = identifier
+        elif isinstance(identifier, bytes) or (
+            isinstance(identifier, str) and identifier.startswith("0x")
+        ):
+            number = cache.get(BLOCK_HASHES_NAMESPACE, HexBytes(identifier).hex())
+
+        if number is not None:
+            cached = cache.get(namespace, str(number))
+            if cached is not None:
+                log(f"block {number} found in cache")
+                return cast(BlockData, cached)
+
+    block_data = w3.eth.get_block(identifier, full_transactions)
+    if cache and identifier != "pending":
+        cache_blocks(cache, [block_data], full_transactions)
+
     return block_data
+
+
+def iter_blocks(
+    w3: Web3,
+    start: int,
+    end: int,
+    full_transactions: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = 1,
+) -> Iterator[BlockData]:
+    """
+    Yield the blocks with numbers from `start` to `end` (inclusive) in
+    order.  Blocks not in the persistent cache are fetched in JSON-RPC
+    batches of `batch_size`, with up to `max_workers` batches in flight.
+    Only a bounded number of batches is held in memory at any time, so
+    that arbitrarily long ranges can be streamed.
+    """
+
+    cache = chain_cache(w3)
+    namespace = FULL_BLOCKS_NAMESPACE if full_transactions else BLOCKS_NAMESPACE
+    if not supports_concurrent_requests(w3):
+        max_workers = 1
+
+    def fetch(numbers: Sequence[int]) -> List[BlockData]:
+        batch = RPCBatch(w3, batch_size)
+        for number in numbers:
+            batch.add("eth_getBlockByNumber", [number, full_transactions])
+        return batch.execute()
+
+    # Each chunk of the range is a list of cached blocks (or None), the
+    # numbers of any missing blocks, and a future fetching them.  At
+    # most 2 * max_workers chunks are pending.
+    chunks: Deque[Tuple[List[Optional[BlockData]], List[int], Future]] = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        chunk_starts = iter(range(start, end + 1, batch_size))
+        while True:
+            while len(chunks) < 2 * max_workers:
+                chunk_start = next(chunk_starts, None)
+                if chunk_start is None:
+                    break
+
+                numbers = range(chunk_start, min(chunk_start + batch_size, end + 1))
+                cached = (
+                    cache.get_many(namespace, [str(n) for n in numbers])
+                    if cache
+                    else {}
+                )
+                missing = [n for n in numbers if str(n) not in cached]
+                chunks.append(
+                    (
+                        [cached.get(str(n)) for n in numbers],
+                        missing,
+                        executor.submit(fetch, missing),
+                    )
+                )
+
+            if not chunks:
+                break
+
+            blocks, missing, future = chunks.popleft()
+            fetched = future.result()
+            for number, block in zip(missing, fetched):
+                if block is None:
+                    raise ValueError(f"block {number} not found")
+
+            if fetched:
+                log(f"fetched {len(fetched)} blocks from {missing[0]}")
+                if cache:
+                    cache_blocks(cache, fetched, full_transactions)
+
+            fetched_iter = iter(fetched)
+            for block in blocks:
+                yield block if block is not None else next(fetched_iter)
+
+
+DEFAULT_TX_WAIT_TIMEOUT = 120.0
+"""
+Default time to wait for a receipt, as used by Web3.
+"""
+
+
+def fetch_receipts(
+    w3: Web3,
+    tx_hashes: Sequence[HexBytes],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = 1,
+) -> Dict[str, TxReceipt]:
+    """
+    Query the receipts of transactions using batched requests, returning
+    the available receipts (which are added to the cache) by hex hash.
+    """
+
+    batch = RPCBatch(w3, batch_size, max_workers)
+    for tx_hash in tx_hashes:
+        batch.add("eth_getTransactionReceipt", [tx_hash])
+
+    landed = {h.hex(): r for h, r in zip(tx_hashes, batch.execute()) if r is not None}
+    cache = chain_cache(w3) if landed else None
+    if cache:
+        cache.set_many(
+            RECEIPTS_NAMESPACE, {h: _to_cacheable(r) for h, r in landed.items()}
+        )
+
+    return landed
+
+
+def wait_for_receipts(
+    w3: Web3,
+    tx_hashes: Sequence[HexBytes],
+    timeout: Optional[float] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = 1,
+) -> Iterator[Tuple[HexBytes, TxReceipt]]:
+    """
+    Wait for transactions to be included in blocks, yielding each
+    (hash, receipt) pair as the receipt becomes available.  Receipts of
+    all outstanding transactions are queried as JSON-RPC batches each
+    time a new block arrives (see `subscription.new_blocks`).  Stops
+    once all receipts have been yielded, or after `timeout` seconds
+    (default DEFAULT_TX_WAIT_TIMEOUT).
+
+    Receipts are final once available, and are held in the persistent
+    cache.  Receipts read from the cache hold hex strings in place of
+    bytes values.
+    """
+
+    pending = list(dict.fromkeys(tx_hashes))
+    cache = chain_cache(w3)
+    if cache:
+        cached = cache.get_many(RECEIPTS_NAMESPACE, [h.hex() for h in pending])
+        for tx_hash in pending:
+            if tx_hash.hex() in cached:
+                log(f"receipt for {tx_hash.hex()} found in cache")
+                yield tx_hash, cast(TxReceipt, cached[tx_hash.hex()])
+        pending = [h for h in pending if h.hex() not in cached]
+
+    if timeout is None:
+        timeout = DEFAULT_TX_WAIT_TIMEOUT
+
+    try:
+        for block_number in new_blocks(w3, timeout):
+            if not pending:
+                break
+
+            log(f"checking for {len(pending)} receipts at block {block_number}")
+            landed = fetch_receipts(w3, pending, batch_size, max_workers)
+            yield from ((h, landed[h.hex()]) for h in pending if h.hex() in landed)
+            pending = [h for h in pending if h.hex() not in landed]
+
+    except TimeoutError:
+        log(f"timed out waiting for {len(pending)} receipts")
+
+
+def wait_for_receipt(
+    w3: Web3, tx_hash: HexBytes, timeout: Optional[float] = None
+) -> TxReceipt:
+    """
+    Wait for a single transaction (see `wait_for_receipts`).  Raises
+    TimeoutError if no receipt is available after `timeout` seconds.
+    """
+
+    for _, tx_receipt in wait_for_receipts(w3, [tx_hash], timeout):
+        return tx_receipt
+
+    raise TimeoutError()
+
+
+def send_raw_transactions(
+    w3: Web3,
+    raw_txs: Sequence[HexBytes],
+    senders: Optional[Sequence[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = 1,
+) -> List[Union[HexBytes, Exception]]:
+    """
+    Submit signed transactions with eth_sendRawTransaction, as JSON-RPC
+    batches, returning the hash (or the error) for each transaction.
+
+    If the sender of each transaction is given, transactions are split
+    into up to `max_workers` lanes, by sender, which are submitted
+    concurrently.  Within each lane (and hence for each sender),
+    transactions are submitted in the given order, so that nonces
+    arrive in sequence.  Otherwise, all transactions are submitted in
+    order, one batch at a time.
+    """
+
+    num_lanes = max_workers if senders and supports_concurrent_requests(w3) else 1
+    lanes: List[List[int]] = [[] for _ in range(num_lanes)]
+    lane_by_sender: Dict[str, int] = {}
+    for idx in range(len(raw_txs)):
+        lane_idx = 0
+        if senders:
+            lane_idx = lane_by_sender.setdefault(
+                senders[idx].lower(), len(lane_by_sender) % num_lanes
+            )
+        lanes[lane_idx].append(idx)
+
+    def send_lane(lane: List[int]) -> List[Any]:
+        batch = RPCBatch(w3, batch_size)
+        for idx in lane:
+            batch.add("eth_sendRawTransaction", [raw_txs[idx]])
+        return batch.execute(raise_errors=False)
+
+    lanes = [lane for lane in lanes if lane]
+    with ThreadPoolExecutor(max_workers=max(1, len(lanes))) as executor:
+        lane_results = list(executor.map(send_lane, lanes))
+
+    results: List[Union[HexBytes, Exception]] = [HexBytes(b"")] * len(raw_txs)
+    for lane, lane_result in zip(lanes, lane_results):
+        for idx, result in zip(lane, lane_result):
+            results[idx] = result
+
+    return results
+
+
+def estimate_gas_many(
+    w3: Web3,
+    txs: Sequence[TxParams],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = 1,
+) -> List[Union[int, Exception]]:
+    """
+    Estimate the gas of several transactions using batched
+    eth_estimateGas requests, returning the estimate (or the error) for
+    each transaction.
+    """
+
+    batch = RPCBatch(w3, batch_size, max_workers)
+    for tx in txs:
+        batch.add("eth_estimateGas", [tx])
+
+    return batch.execute(raise_errors=False)
+
+
+def get_pending_transaction_hashes(
+    w3: Web3, address: ChecksumAddress
+) -> List[HexBytes]:
+    """
+    Hashes of the pending transactions sent by `address`, in nonce
+    order, according to the node's transaction pool (using the
+    `txpool_contentFrom` method).
+    """
+
+    response = w3.provider.make_request(RPCEndpoint("txpool_contentFrom"), [address])
+    if "error" in response:
+        raise ValueError(response["error"])
+
+    pending = response["result"].get("pending") or {}
+    return [HexBytes(pending[nonce]["hash"]) for nonce in sorted(pending, key=int)]
+
+
+def get_transactions(
+    w3: Web3,
+    tx_hashes: Sequence[HexBytes],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_workers: int = 1,
+) -> List[Optional[TxData]]:
+    """
+    Fetch several transactions using batched eth_getTransactionByHash
+    requests.  Unknown transactions are returned as None.
+    """
+
+    batch = RPCBatch(w3, batch_size, max_workers)
+    for tx_hash in tx_hashes:
+        batch.add("eth_getTransactionByHash", [tx_hash])
+
+    return batch.execute()
+
+
+GAS_ESTIMATES_NAMESPACE = "gas-estimates"
+
+
+def get_gas_estimate(w3: Web3, tx: TxParams, margin: float, ttl: float) -> int:
+    """
+    Estimate the gas of a transaction, using the cache where possible.
+    Estimates are cached (for `ttl` seconds) by sender, target address,
+    function selector, calldata length and whether value is sent, so
+    that repeated calls of a contract function do not require an
+    estimate.  Cached estimates are increased by `margin` percent, to
+    allow for differences between calls.
+    """
+
+    data = HexBytes(tx.get("data") or b"")
+    value = tx.get("value") or 0
+    sends_value = (int(value, 16) if isinstance(value, str) else value) > 0
+    key = ":".join(
+        [
+            str(tx.get("from", "")).lower(),
+            str(tx.get("to", "")).lower(),
+            data[:4].hex(),
+            str(len(data)),
+            "value" if sends_value else "",
+        ]
+    )
+    cache = chain_cache(w3)
+    if cache:
+        cached = cache.get(GAS_ESTIMATES_NAMESPACE, key)
+        if cached is not None:
+            log(f"gas estimate for {key} found in cache")
+            return int(cached * (100 + margin) / 100)
+
+    estimate = w3.eth.estimate_gas(tx)
+    if cache:
+        cache.set(GAS_ESTIMATES_NAMESPACE, key, estimate, ttl=ttl)
+
+    return estimate
@@ -8,7 +8,18 @@ import sys
 from datetime import datetime, timezone
 from decimal import Decimal
 from getpass import getpass
-from typing import Any, Dict, Mapping, Optional, Sequence, Tuple, TypeVar, Union, cast
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
 
 from autonity import Autonity
 from autonity.abi_manager import ABIManager
@@ -35,7 +46,12 @@ from web3.types import (
 
 from . import config
 from .constants import AutonDenoms
+from .daemon import require_terminal
+from .fees import estimate_fees, get_latest_base_fee
+from .keystore_index import KeystoreIndex
 from .logging import log
+from .nonces import nonce_store
+from .user import get_gas_estimate
 
 # pylint: disable=too-many-arguments
 # pylint: disable=too-many-locals
@@ -44,6 +60,11 @@ from .logging import log
 # Intended to represent "value" types
 V = TypeVar("V")
 
+# Web3 objects already created in this process, by endpoint.  Re-used
+# so that long-running processes (see `aut serve`) keep their
+# connections open.
+_WEB3_CACHE: Dict[str, Web3] = {}
+
 
 def web3_from_endpoint_arg(w3: Optional[Web3], endpoint_arg: Optional[str]) -> Web3:
     """
@@ -63,11 +84,13 @@ def web3_from_endpoint_arg(w3: Optional[Web3], endpoint_arg: Optional[str]) -> W
     """
 
     if w3 is None:
-        # TODO: For now, ignore the chain ID by default.  Later, this
-        # check should be enabled and controllable by a flag.
-        return create_web3_for_endpoint(
-            config.get_rpc_endpoint(endpoint_arg), ignore_chain_id=True
-        )
+        endpoint = config.get_rpc_endpoint(endpoint_arg)
+        w3 = _WEB3_CACHE.get(endpoint)
+        if w3 is None:
+            # TODO: For now, ignore the chain ID by default.  Later, this
+            # check should be enabled and controllable by a flag.
+            w3 = create_web3_for_endpoint(endpoint, ignore_chain_id=True)
+            _WEB3_CACHE[endpoint] = w3
 
     return w3
 
@@ -123,6 +146,38 @@ def from_address_from_argument(
     raise ClickException("from address or keyfile required")
 
 
+def fees_from_args(
+    w3: Web3,
+    max_fee_per_gas: Optional[str],
+    max_priority_fee_per_gas: Optional[str],
+    fee_factor: Optional[float],
+    fee_strategy: Optional[str],
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Apply the --fee-factor and --fee-strategy options (see `fees.py`) to
+    the --max-fee-per-gas and --max-priority-fee-per-gas values.
+    --fee-factor determines maxFeePerGas from the latest base fee.
+    --fee-strategy sets any fee not otherwise given.
+    """
+
+    max_fee: Optional[int] = None
+    priority_fee: Optional[int] = None
+    if fee_strategy:
+        max_fee, priority_fee = estimate_fees(w3, fee_strategy)
+    if fee_factor:
+        max_fee = int(get_latest_base_fee(w3) * fee_factor)
+        max_fee_per_gas = None
+
+    if max_fee_per_gas is None and max_fee is not None:
+        max_fee_per_gas = f"{max_fee}wei"
+        if priority_fee is not None:
+            priority_fee = min(priority_fee, max_fee)
+    if max_priority_fee_per_gas is None and priority_fee is not None:
+        max_priority_fee_per_gas = f"{priority_fee}wei"
+
+    return max_fee_per_gas, max_priority_fee_per_gas
+
+
 def create_tx_from_args(
     w3: Optional[Web3],
     rpc_endpoint: Optional[str],
@@ -135,6 +190,7 @@ def create_tx_from_args(
     max_fee_per_gas: Optional[str] = None,
     max_priority_fee_per_gas: Optional[str] = None,
     fee_factor: Optional[float] = None,
+    fee_strategy: Optional[str] = None,
     nonce: Optional[int] = None,
     chain_id: Optional[int] = None,
 ) -> Tuple[TxParams, Optional[Web3]]:
@@ -143,39 +199,40 @@ def create_tx_from_args(
     command-line parameters.
     """
 
-    if fee_factor:
+    if fee_factor or fee_strategy:
         w3 = web3_from_endpoint_arg(w3, rpc_endpoint)
-        block_number = w3.eth.block_number
-        block_data = w3.eth.get_block(block_number)
-        max_fee_per_gas = str(Wei(int(float(block_data["baseFeePerGas"]) * fee_factor)))
+        max_fee_per_gas, max_priority_fee_per_gas = fees_from_args(
+            w3, max_fee_per_gas, max_priority_fee_per_gas, fee_factor, fee_strategy
+        )
 
     try:
-        return (
-            create_transaction(
-                from_addr=from_addr,
-                to_addr=to_addr,
-                value=parse_wei_representation(value) if value else None,
-                data=HexBytes(data) if data else None,
-                gas=parse_wei_representation(gas) if gas else None,
-                gas_price=parse_wei_representation(gas_price) if gas_price else None,
-                max_fee_per_gas=(
-                    parse_wei_representation(max_fee_per_gas)
-                    if max_fee_per_gas
-                    else None
-                ),
-                max_priority_fee_per_gas=(
-                    parse_wei_representation(max_priority_fee_per_gas)
-                    if max_priority_fee_per_gas
-                    else None
-                ),
-                nonce=Nonce(nonce) if nonce else None,
-                chain_id=chain_id,
+        tx = create_transaction(
+            from_addr=from_addr,
+            to_addr=to_addr,
+            value=parse_wei_representation(value) if value else None,
+            data=HexBytes(data) if data else None,
+            gas=parse_wei_representation(gas) if gas else None,
+            gas_price=parse_wei_representation(gas_price) if gas_price else None,
+            max_fee_per_gas=(
+                parse_wei_representation(max_fee_per_gas) if max_fee_per_gas else None
+            ),
+            max_priority_fee_per_gas=(
+                parse_wei_representation(max_priority_fee_per_gas)
+                if max_priority_fee_per_gas
+                else None
             ),
-            w3,
+            nonce=Nonce(nonce) if nonce else None,
+            chain_id=chain_id,
         )
     except ValueError as err:
         raise ClickException(err.args[0]) from err
 
+    # (create_transaction ignores a nonce of 0)
+    if nonce is not None:
+        tx["nonce"] = Nonce(nonce)
+
+    return tx, w3
+
 
 def finalize_tx_from_args(
     w3: Optional[Web3],
@@ -191,9 +248,57 @@ def finalize_tx_from_args(
     def create_w3() -> Web3:
         return web3_from_endpoint_arg(w3, rpc_endpoint)
 
+    if "gas" not in tx and config.get_gas_cache():
+        w3 = create_w3()
+        fill_gas_estimate(w3, tx)
+
+    if from_addr and "nonce" not in tx and config.get_local_nonces():
+        w3 = create_w3()
+        allocate_local_nonce(w3, tx, from_addr)
+
     return finalize_transaction(create_w3, tx, from_addr)
 
 
+def fill_gas_estimate(w3: Web3, tx: TxParams) -> None:
+    """
+    If `tx` has no gas limit, set it from a gas estimate, using the gas
+    estimate cache if it is enabled (see `user.get_gas_estimate`).
+    """
+
+    if "gas" in tx:
+        return
+
+    if config.get_gas_cache():
+        tx["gas"] = get_gas_estimate(
+            w3, tx, config.get_gas_cache_margin(), config.get_gas_cache_ttl()
+        )
+    else:
+        tx["gas"] = w3.eth.estimate_gas(tx)
+
+
+def allocate_local_nonce(
+    w3: Web3, tx: TxParams, from_addr: Optional[ChecksumAddress]
+) -> None:
+    """
+    If local nonce management is enabled (see `nonces.py`) and `tx`
+    has no nonce, allocate one from the local store.  The gas estimate
+    (which may fail) is made first, so that nonces are not allocated to
+    transactions which cannot be created.
+    """
+
+    if not from_addr or "nonce" in tx or not config.get_local_nonces():
+        return
+
+    fill_gas_estimate(w3, tx)
+
+    if "chainId" not in tx:
+        tx["chainId"] = w3.eth.chain_id
+
+    tx["nonce"] = nonce_store(tx["chainId"]).allocate(
+        from_addr, lambda: w3.eth.get_transaction_count(from_addr, "pending")
+    )
+
+
 def create_contract_tx_from_args(
     function: ContractFunction,
     from_addr: ChecksumAddress,
@@ -203,6 +308,7 @@ def create_contract_tx_from_args(
     max_fee_per_gas: Optional[str] = None,
     max_priority_fee_per_gas: Optional[str] = None,
     fee_factor: Optional[float] = None,
+    fee_strategy: Optional[str] = None,
     nonce: Optional[int] = None,
     chain_id: Optional[int] = None,
 ) -> TxParams:
@@ -212,18 +318,13 @@ def create_contract_tx_from_args(
     `finalize_tx_from_args` on the result of this function.
     """
 
-    # TODO: abstract this calculation out
-
-    if fee_factor:
-        w3 = function.w3
-        block_number = w3.eth.block_number
-        block_data = w3.eth.get_block(block_number)
-        # Note, keep this in units of whole Auton.  It will be
-        # converted to Wei below.
-        max_fee_per_gas = str(
-            Decimal(block_data["baseFeePerGas"])
-            * Decimal(fee_factor)
-            / Decimal(pow(10, 18))
+    if fee_factor or fee_strategy:
+        max_fee_per_gas, max_priority_fee_per_gas = fees_from_args(
+            function.w3,
+            max_fee_per_gas,
+            max_priority_fee_per_gas,
+            fee_factor,
+            fee_strategy,
         )
 
     try:
@@ -244,6 +345,12 @@ def create_contract_tx_from_args(
             nonce=Nonce(nonce) if nonce else None,
             chain_id=chain_id,
         )
+        if nonce is not None:
+            tx["nonce"] = Nonce(nonce)
+
+        if config.get_gas_cache():
+            fill_gas_estimate(function.w3, tx)
+        allocate_local_nonce(function.w3, tx, from_addr)
         return finalize_transaction(lambda: function.w3, tx, from_addr)
 
     except ValueError as err:
@@ -310,21 +417,11 @@ def address_keyfile_dict(keystore_dir: str) -> Dict[ChecksumAddress, str]:
     """
     For directory 'keystore' that contains one or more keyfiles,
     return a dictionary with EIP55 checksum addresses as keys and
-    keyfile path as value. If 'degenerate_addr', keys are addresses
-    are all lower case and without the '0x' prefix.
+    keyfile path as value.  Uses the keystore index (see
+    `keystore_index.py`), so that only new or modified keyfiles are
+    parsed.
     """
-    addr_keyfile_dict: Dict[ChecksumAddress, str] = {}
-    keyfile_list = os.listdir(keystore_dir)
-    for fn in keyfile_list:
-        keyfile_path = keystore_dir + "/" + fn
-        try:
-            keyfile = load_keyfile(keyfile_path)
-        except json.JSONDecodeError:
-            continue
-        addr_lower = keyfile["address"]
-        addr_keyfile_dict[Web3.to_checksum_address("0x" + addr_lower)] = keyfile_path
-
-    return addr_keyfile_dict
+    return KeystoreIndex(keystore_dir).keyfiles()
 
 
 def to_checksum_address(address: str) -> ChecksumAddress:
@@ -401,6 +498,14 @@ def validate_block_identifier(block_id: Union[str, int]) -> BlockIdentifier:
     raise ClickException(f"failed parsing block identifier: {block_id}")
 
 
+def block_from_option(block_str: Optional[str]) -> Optional[BlockIdentifier]:
+    """
+    Parse the value of a --block option (see `options.block_option`),
+    which may not be given.
+    """
+    return validate_block_identifier(block_str) if block_str else None
+
+
 def load_from_file_or_stdin(filename: str) -> str:
     """
     Open a file and return the stream, where '-' represents stdin.
@@ -425,6 +530,21 @@ def load_from_file_or_stdin_line(filename: str) -> str:
         return in_f.read()
 
 
+def iter_lines_from_file_or_stdin(filename: str) -> Iterator[str]:
+    """
+    Yield the non-empty lines (stripped of whitespace) of a file, where
+    '-' represents stdin.  Lines are yielded as they are read, so that
+    streams can be processed incrementally.
+    """
+
+    if filename == "-":
+        yield from (line.strip() for line in sys.stdin if line.strip())
+        return
+
+    with open(filename, "r", encoding="utf8") as in_f:
+        yield from (line.strip() for line in in_f if line.strip())
+
+
 def newton_or_token_to_address(
     ntn: bool, token: Optional[str]
 ) -> Optional[ChecksumAddress]:
@@ -471,6 +591,7 @@ def prompt_for_new_password(show_password: bool) -> str:
     """
     prompt = "Password for new account: "
     prompt_2 = "Confirm account password: "
+    require_terminal()
     if show_password:
         password = input(prompt)
         password_2 = input(prompt_2)
@@ -0,0 +1,77 @@
+"""
+Test the account commands
+"""
+
+import json
+import os.path
+from typing import Any, Dict, List, cast
+from unittest import TestCase
+
+from autonity.utils.keyfile import (
+    decrypt_keyfile,
+    get_address_from_keyfile,
+    load_keyfile,
+)
+from autonity.utils.tx import sign_tx_with_private_key
+from eth_account import Account
+from web3.types import TxParams
+
+from autonity_cli.commands.account import _generate_keyfiles, _sign_tx_stream
+from autonity_cli.utils import to_json
+
+ALICE_KEYFILE = os.path.join(os.path.dirname(__file__), "data", "alice.key")
+
+
+class TestSignTxStream(TestCase):
+    """
+    Test signing of transaction streams.
+    """
+
+    def test_sign_tx_stream(self) -> None:
+        """
+        Signed transactions are produced in order, with or without a
+        process pool.
+        """
+
+        private_key = decrypt_keyfile(load_keyfile(ALICE_KEYFILE), "alice")
+        txs: List[Dict[str, Any]] = [
+            {
+                "chainId": 1,
+                "nonce": nonce,
+                "to": "0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf",
+                "value": 1,
+                "gas": 21000,
+                "maxFeePerGas": 10,
+                "maxPriorityFeePerGas": 1,
+            }
+            for nonce in range(5)
+        ]
+        expect = [
+            to_json(sign_tx_with_private_key(cast(TxParams, tx), private_key)._asdict())
+            for tx in txs
+        ]
+
+        lines = [json.dumps(tx) for tx in txs]
+        self.assertEqual(expect, list(_sign_tx_stream(lines, private_key, 1)))
+        self.assertEqual(expect, list(_sign_tx_stream(lines, private_key, 2)))
+
+
+class TestGenerateKeyfiles(TestCase):
+    """
+    Test bulk key generation.
+    """
+
+    def test_generate_keyfiles(self) -> None:
+        """
+        Distinct keys are created, encrypted with the given password.
+        """
+
+        keyfiles = list(_generate_keyfiles(3, "", "bulk", 2))
+        addresses = {get_address_from_keyfile(keyfile) for keyfile in keyfiles}
+        self.assertEqual(3, len(addresses))
+
+        private_key = decrypt_keyfile(keyfiles[0], "bulk")
+        self.assertEqual(
+            get_address_from_keyfile(keyfiles[0]),
+            Account.from_key(private_key).address,
+        )
@@ -0,0 +1,86 @@
+"""
+Test the key agent
+"""
+
+import json
+import os.path
+import tempfile
+import threading
+from unittest import TestCase
+
+from autonity_cli.agent import AgentError, AgentKeyNotHeld, agent_request, run_agent
+
+ALICE_KEYFILE = os.path.join(os.path.dirname(__file__), "data", "alice.key")
+
+
+class TestKeyAgent(TestCase):
+    """
+    Test the agent, running in a background thread.
+    """
+
+    def setUp(self) -> None:
+        # pylint: disable=consider-using-with
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp_dir.name, "agent.sock")
+        self.thread = threading.Thread(
+            target=run_agent, args=(self.socket_path, 10.0), daemon=True
+        )
+        self.thread.start()
+        for _ in range(100):
+            if os.path.exists(self.socket_path):
+                break
+            self.thread.join(0.01)
+
+    def tearDown(self) -> None:
+        agent_request({"op": "stop"}, self.socket_path)
+        self.thread.join(5.0)
+        self.assertFalse(os.path.exists(self.socket_path))
+        self.tmp_dir.cleanup()
+
+    def test_agent(self) -> None:
+        """
+        Keys can be added, used for signing and dropped.
+        """
+
+        with open(ALICE_KEYFILE, encoding="ascii") as key_f:
+            keyfile = json.load(key_f)
+
+        with self.assertRaises(AgentError):
+            agent_request(
+                {"op": "add", "keyfile": keyfile, "password": "wrong"},
+                self.socket_path,
+            )
+
+        address = agent_request(
+            {"op": "add", "keyfile": keyfile, "password": "alice"}, self.socket_path
+        )["address"]
+        self.assertEqual(
+            {"addresses": [address]}, agent_request({"op": "list"}, self.socket_path)
+        )
+
+        signature = agent_request(
+            {"op": "sign_message", "address": address, "message": "hello"},
+            self.socket_path,
+        )["signature"]
+        self.assertEqual(132, len(signature))
+
+        tx = {
+            "chainId": 1,
+            "nonce": 0,
+            "to": address,
+            "value": 1,
+            "gas": 21000,
+            "maxFeePerGas": 10,
+            "maxPriorityFeePerGas": 1,
+        }
+        signed_tx = agent_request(
+            {"op": "sign_tx", "address": address, "tx": tx}, self.socket_path
+        )["signed_tx"]
+        self.assertIn("rawTransaction", signed_tx)
+
+        agent_request({"op": "lock"}, self.socket_path)
+        with self.assertRaises(AgentKeyNotHeld):
+            agent_request(
+                {"op": "sign_message", "address": address, "message": "hello"},
+                self.socket_path,
+            )
@@ -0,0 +1,177 @@
+"""
+Test the persistent chain data cache
+"""
+
+import os
+import os.path
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from web3.types import HexStr, TxParams, Wei
+
+from autonity_cli.cache import ENDPOINT_CHAIN_ID_TTL, ChainCache, chain_cache
+from autonity_cli.user import get_gas_estimate
+
+
+class TestChainCache(TestCase):
+    """
+    Test ChainCache
+    """
+
+    def setUp(self) -> None:
+        # pylint: disable=consider-using-with
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ChainCache(os.path.join(self.tmp_dir.name, "cache", "db.sqlite"))
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_get_set(self) -> None:
+        """
+        Values are stored per namespace, and persist across instances.
+        """
+
+        self.assertIsNone(self.cache.get("ns", "a"))
+        self.cache.set_many("ns", {"a": {"x": 1}, "b": [2]})
+        self.cache.set("other", "a", "other")
+
+        reopened = ChainCache(self.cache.path)
+        self.assertEqual({"x": 1}, reopened.get("ns", "a"))
+        self.assertEqual({"a": {"x": 1}}, reopened.get_many("ns", ["a", "c"]))
+        self.assertEqual("other", reopened.get("other", "a"))
+
+        reopened.clear("ns")
+        self.assertEqual({}, reopened.get_many("ns", ["a", "b"]))
+        self.assertEqual("other", reopened.get("other", "a"))
+
+    def test_ttl(self) -> None:
+        """
+        Entries with a time-to-live expire.
+        """
+
+        with patch("time.time", return_value=1000.0):
+            self.cache.set("ns", "a", 1, ttl=10)
+            self.cache.set("ns", "b", 2)
+
+        with patch("time.time", return_value=1005.0):
+            self.assertEqual(1, self.cache.get("ns", "a"))
+
+        with patch("time.time", return_value=1011.0):
+            self.assertEqual({"b": 2}, self.cache.get_many("ns", ["a", "b"]))
+
+    def test_eviction(self) -> None:
+        """
+        Least recently used entries are evicted once the maximum size
+        is exceeded.
+        """
+
+        cache = ChainCache(self.cache.path, max_size=1000)
+        value = "x" * 2000  # compresses to ~30 bytes
+        with patch("time.time", return_value=1000.0):
+            cache.set_many("ns", {str(i): f"{i}{value}" for i in range(20)})
+        with patch("time.time", return_value=1001.0):
+            self.assertIsNotNone(cache.get("ns", "0"))
+        with patch("time.time", return_value=1002.0):
+            cache.set_many("ns", {str(i): f"{i}{value}" for i in range(20, 40)})
+
+        remaining = cache.get_many("ns", [str(i) for i in range(40)])
+        self.assertIn("0", remaining)
+        self.assertIn("39", remaining)
+        self.assertNotIn("1", remaining)
+
+    def test_corrupt(self) -> None:
+        """
+        Failure to read or write the database is not fatal.
+        """
+
+        os.makedirs(os.path.dirname(self.cache.path))
+        with open(self.cache.path, "wb") as cache_f:
+            cache_f.write(b"not a database" * 100)
+
+        self.assertIsNone(self.cache.get("ns", "a"))
+        self.cache.set("ns", "a", 1)
+        self.cache.remove("ns", "a")
+        self.cache.clear("ns")
+        self.cache.clear()
+
+
+class TestChainCacheLookup(TestCase):
+    """
+    Test chain_cache
+    """
+
+    def test_endpoint_chain_key(self) -> None:
+        """
+        Caches are identified by chain id and genesis hash, which are
+        recorded for each endpoint, so that other processes do not
+        query them until the record expires.
+        """
+
+        def _w3() -> MagicMock:
+            w3 = MagicMock()
+            w3.provider.endpoint_uri = "http://127.0.0.1:8545"
+            return w3
+
+        with tempfile.TemporaryDirectory() as tmp_dir, patch.dict(
+            os.environ, {"AUT_CACHE_DIR": tmp_dir}
+        ), patch(
+            "autonity_cli.cache._fetch_chain_key", return_value="42-0123456789abcdef"
+        ) as fetch_chain_key:
+            with patch("time.time", return_value=1000.0):
+                cache = chain_cache(_w3())
+            assert cache is not None
+            self.assertEqual(
+                os.path.join(tmp_dir, "chain-42-0123456789abcdef.sqlite"), cache.path
+            )
+            self.assertEqual(1, fetch_chain_key.call_count)
+
+            with patch("time.time", return_value=1001.0), patch.dict(
+                "autonity_cli.cache._CACHES", clear=True
+            ):
+                reopened = chain_cache(_w3())
+            assert reopened is not None
+            self.assertEqual(cache.path, reopened.path)
+            self.assertEqual(1, fetch_chain_key.call_count)
+
+            # A reset chain (with the same chain id) has a new cache.
+            fetch_chain_key.return_value = "42-fedcba9876543210"
+            with patch("time.time", return_value=1001.0 + ENDPOINT_CHAIN_ID_TTL):
+                reset = chain_cache(_w3())
+            assert reset is not None
+            self.assertNotEqual(cache.path, reset.path)
+            self.assertEqual(2, fetch_chain_key.call_count)
+
+
+class TestGasEstimateCache(TestCase):
+    """
+    Test cached gas estimates
+    """
+
+    def test_get_gas_estimate(self) -> None:
+        """
+        Estimates are shared by calls with the same sender, target,
+        selector, calldata length and (zero or non-zero) value, and
+        increased by the margin.
+        """
+
+        w3 = MagicMock()
+        w3.eth.estimate_gas.return_value = 1000
+        to_addr = "0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf"
+        with tempfile.TemporaryDirectory() as tmp_dir, patch.dict(
+            os.environ, {"AUT_CACHE_DIR": tmp_dir}
+        ), patch.dict("autonity_cli.cache._CHAIN_KEYS", {w3: "1"}):
+            tx: TxParams = {"to": to_addr, "data": HexStr("0x12345678" + "00" * 32)}
+            self.assertEqual(1000, get_gas_estimate(w3, tx, 20, 60))
+            tx["data"] = HexStr("0x12345678" + "11" * 32)
+            self.assertEqual(1200, get_gas_estimate(w3, tx, 20, 60))
+            tx["data"] = HexStr("0x12345678" + "11" * 64)
+            self.assertEqual(1000, get_gas_estimate(w3, tx, 20, 60))
+            tx["value"] = Wei(1)
+            self.assertEqual(1000, get_gas_estimate(w3, tx, 20, 60))
+            tx["from"] = to_addr
+            self.assertEqual(1000, get_gas_estimate(w3, tx, 20, 60))
+            tx["value"] = Wei(2)
+            self.assertEqual(1200, get_gas_estimate(w3, tx, 20, 60))
+
+        self.assertEqual(4, w3.eth.estimate_gas.call_count)
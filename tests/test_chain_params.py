@@ -0,0 +1,116 @@
+"""
+Test chain parameters for offline transaction creation
+"""
+
+import json
+import os.path
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from click import ClickException
+from click.testing import CliRunner
+
+from autonity_cli.chain_params import (
+    ChainParams,
+    load_chain_params,
+    offline_web3,
+    save_chain_params,
+)
+from autonity_cli.commands.tx import make
+
+ALICE = "0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf"
+BOB = "0x2B5AD5c4795c026514f8317c7a215E218DcCD6cF"
+TOKEN = "0x6813Eb9362372EEF6200f3b1dbC3f819671cBA69"
+
+
+def _params(chain_id: int) -> ChainParams:
+    return {
+        "chain_id": chain_id,
+        "synced_at_block": 100,
+        "max_fee_per_gas": 2000,
+        "max_priority_fee_per_gas": 100,
+        "tokens": {},
+        "nonces": {ALICE: 3},
+    }
+
+
+class TestChainParams(TestCase):
+    """
+    Test loading and saving chain parameters
+    """
+
+    def setUp(self) -> None:
+        # pylint: disable=consider-using-with
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp_dir.name, "params", "chain-params.json")
+        self.env = patch.dict(
+            os.environ,
+            {
+                "AUT_CHAIN_PARAMS": path,
+                "AUT_NONCE_DIR": os.path.join(self.tmp_dir.name, "nonces"),
+            },
+        )
+        self.env.start()
+
+    def tearDown(self) -> None:
+        self.env.stop()
+        self.tmp_dir.cleanup()
+
+    def test_load_save(self) -> None:
+        """
+        Parameters are stored per chain, and the chain id may be omitted
+        only if a single chain is known.
+        """
+
+        with self.assertRaises(ClickException):
+            load_chain_params()
+
+        save_chain_params(_params(42))
+        self.assertEqual(_params(42), load_chain_params())
+        self.assertEqual(_params(42), load_chain_params(42))
+
+        save_chain_params(_params(43))
+        self.assertEqual(_params(43), load_chain_params(43))
+        with self.assertRaises(ClickException):
+            load_chain_params()
+        with self.assertRaises(ClickException):
+            load_chain_params(44)
+
+    def test_offline_web3(self) -> None:
+        """
+        The offline Web3 refuses all requests.
+        """
+
+        w3 = offline_web3()
+        with self.assertRaises(ClickException):
+            _ = w3.eth.chain_id
+
+    def test_offline_make(self) -> None:
+        """
+        Nonces are allocated from the recorded nonce, and only to
+        transactions which are created.
+        """
+
+        params = _params(42)
+        params["tokens"] = {TOKEN: {"decimals": 18}}
+        save_chain_params(params)
+
+        def make_tx(*args: str) -> int:
+            result = CliRunner(mix_stderr=False).invoke(
+                make, ["--offline", "--from", ALICE, "--to", BOB, *args]
+            )
+            if result.exit_code:
+                return -1
+            return json.loads(result.stdout)["nonce"]
+
+        self.assertEqual(-1, make_tx())
+        self.assertEqual(-1, make_tx("--value", "nonsense"))
+        self.assertEqual(-1, make_tx("--token", TOKEN, "--value", "1"))
+        self.assertEqual(3, make_tx("--value", "1"))
+        self.assertEqual(4, make_tx("--token", TOKEN, "--value", "1", "--gas", "1"))
+
+        # A newer recorded nonce takes precedence.
+        params["nonces"][ALICE] = 10
+        save_chain_params(params)
+        self.assertEqual(10, make_tx("--value", "1"))
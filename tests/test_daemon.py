@@ -0,0 +1,97 @@
+"""
+Test the `aut serve` daemon
+"""
+
+import os
+import os.path
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict
+from unittest import TestCase
+
+from autonity_cli.daemon import stop_daemon
+
+
+def _wait_for(path: str, exists: bool = True) -> None:
+    for _ in range(500):
+        if os.path.exists(path) == exists:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"timed out waiting for {path}")
+
+
+class TestDaemon(TestCase):
+    """
+    Test forwarding of commands to a daemon running in a subprocess.
+    """
+
+    def setUp(self) -> None:
+        # pylint: disable=consider-using-with
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp_dir.name, "aut.sock")
+        self.env = dict(os.environ)
+        self.env.pop("AUT_NO_DAEMON", None)
+        self.env["AUT_DAEMON_SOCKET"] = self.socket_path
+        self.daemon = subprocess.Popen(
+            [sys.executable, "-m", "autonity_cli", "serve", "--idle-timeout", "30"],
+            env=self.env,
+        )
+        _wait_for(self.socket_path)
+
+    def tearDown(self) -> None:
+        stop_daemon(self.socket_path)
+        self.daemon.wait(10)
+        self.tmp_dir.cleanup()
+
+    def _aut(self, *args: str, **kwargs: Any) -> "subprocess.Popen[str]":
+        popen_kwargs: Dict[str, Any] = {
+            "env": self.env,
+            "stdin": subprocess.DEVNULL,
+            "stdout": subprocess.PIPE,
+            "stderr": subprocess.PIPE,
+            "text": True,
+        }
+        popen_kwargs.update(kwargs)
+        # pylint: disable=consider-using-with
+        return subprocess.Popen(
+            [sys.executable, "-m", "autonity_cli", *args], **popen_kwargs
+        )
+
+    def test_concurrent_and_interrupt(self) -> None:
+        """
+        A long-running command does not hold up others, and is
+        interrupted when its client is.
+        """
+
+        agent_socket = os.path.join(self.tmp_dir.name, "agent.sock")
+        agent = self._aut("account", "agent", "--socket", agent_socket)
+        _wait_for(agent_socket)
+
+        keystore = os.path.join(self.tmp_dir.name, "keystore")
+        os.mkdir(keystore)
+        listing = self._aut("account", "list", "--keystore", keystore)
+        listing.communicate(timeout=20)
+        self.assertEqual(0, listing.returncode)
+
+        agent.send_signal(signal.SIGINT)
+        agent.communicate(timeout=10)
+        _wait_for(agent_socket, exists=False)
+
+    def test_fallback_replays_stdin(self) -> None:
+        """
+        Piped stdin forwarded to the daemon is still available when the
+        command is handed back to the client.
+        """
+
+        keyfile = os.path.join(self.tmp_dir.name, "new.key")
+        new = self._aut(
+            "account", "new", "--extra-entropy", "-", "--show-password",
+            "--keyfile", keyfile, stdin=subprocess.PIPE,
+        )  # fmt: skip
+        stdout, stderr = new.communicate("entropy\npassword\npassword\n", timeout=60)
+        self.assertEqual(0, new.returncode, stderr)
+        self.assertIn("Random string", stdout)
+        self.assertTrue(os.path.exists(keyfile))
@@ -0,0 +1,66 @@
+"""
+Test fee estimation
+"""
+
+import os
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from autonity_cli.fees import estimate_fees, get_latest_base_fee, replacement_fees
+from autonity_cli.utils import fees_from_args
+
+
+class TestFees(TestCase):
+    """
+    Test fee estimation from (mocked) fee history.
+    """
+
+    def setUp(self) -> None:
+        self.w3 = MagicMock()
+        self.w3.eth.fee_history.return_value = {
+            "baseFeePerGas": [100, 110, 120, 130],
+            "reward": [[1, 5, 9], [2, 6, 10], [3, 7, 11]],
+        }
+        self.env = patch.dict(os.environ, {"AUT_NO_CACHE": "1"})
+        self.env.start()
+
+    def tearDown(self) -> None:
+        self.env.stop()
+
+    def test_estimate_fees(self) -> None:
+        """
+        Fees are based on the next base fee and the median of the
+        selected priority fee percentile.
+        """
+
+        self.assertEqual(120, get_latest_base_fee(self.w3))
+        self.assertEqual((int(130 * 1.25) + 2, 2), estimate_fees(self.w3, "slow"))
+        self.assertEqual((260 + 6, 6), estimate_fees(self.w3, "normal"))
+        self.assertEqual((390 + 10, 10), estimate_fees(self.w3, "fast"))
+
+    def test_fees_from_args(self) -> None:
+        """
+        Explicit fees take precedence over the strategy, and
+        --fee-factor determines the max fee.
+        """
+
+        self.assertEqual(
+            ("266wei", "6wei"), fees_from_args(self.w3, None, None, None, "normal")
+        )
+        self.assertEqual(
+            ("1gwei", "6wei"), fees_from_args(self.w3, "1gwei", None, None, "normal")
+        )
+        self.assertEqual(
+            ("360wei", "6wei"), fees_from_args(self.w3, "1gwei", None, 3, "normal")
+        )
+        self.assertEqual(("240wei", None), fees_from_args(self.w3, None, None, 2, None))
+
+    def test_replacement_fees(self) -> None:
+        """
+        Replacement fees are bumped, and cover the next base fee.
+        """
+
+        self.assertEqual((1100, 110), replacement_fees(1000, 100, 500))
+        self.assertEqual((2110, 110), replacement_fees(1000, 100, 2000))
+        self.assertEqual((1200, 1), replacement_fees(1000, 0, 1000, price_bump=20))
+        self.assertEqual((None, 2000), replacement_fees(None, 1000, 2000))
@@ -0,0 +1,105 @@
+"""
+Test the keystore index
+"""
+
+import json
+import os
+import os.path
+import tempfile
+from typing import Any, Dict, cast
+from unittest import TestCase
+from unittest.mock import patch
+
+from autonity.utils.keyfile import EncryptedKeyData
+from web3 import Web3
+
+from autonity_cli.keystore_index import INDEX_FILE_NAME, KeystoreIndex
+
+ALICE = Web3.to_checksum_address("0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf")
+BOB = Web3.to_checksum_address("0x2B5AD5c4795c026514f8317c7a215E218DcCD6cF")
+CAROL = Web3.to_checksum_address("0x6813Eb9362372EEF6200f3b1dbC3f819671cBA69")
+
+
+def _keyfile_data(address: str) -> Dict[str, Any]:
+    return {"address": address.lower()[2:], "crypto": {}, "version": 3}
+
+
+class TestKeystoreIndex(TestCase):
+    """
+    Test KeystoreIndex
+    """
+
+    def setUp(self) -> None:
+        # pylint: disable=consider-using-with
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.keystore = self.tmp_dir.name
+        self._write("UTC--1--alice", _keyfile_data(ALICE))
+        self._write("UTC--2--bob", _keyfile_data(BOB))
+        self._write("notes.txt", "not a keyfile")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _write(self, name: str, data: Any) -> None:
+        with open(os.path.join(self.keystore, name), "w", encoding="utf8") as f:
+            json.dump(data, f)
+
+    def test_keyfiles(self) -> None:
+        """
+        Keyfiles are listed, and are not parsed again while they are
+        unchanged.
+        """
+
+        expect = {
+            ALICE: os.path.join(self.keystore, "UTC--1--alice"),
+            BOB: os.path.join(self.keystore, "UTC--2--bob"),
+        }
+        self.assertEqual(expect, KeystoreIndex(self.keystore).keyfiles())
+        self.assertTrue(os.path.exists(os.path.join(self.keystore, INDEX_FILE_NAME)))
+
+        with patch("autonity_cli.keystore_index._read_address") as read_address:
+            self.assertEqual(expect, KeystoreIndex(self.keystore).keyfiles())
+            read_address.assert_not_called()
+
+            # Only new files are parsed when the directory changes.
+            read_address.return_value = CAROL
+            self._write("UTC--3--carol", _keyfile_data(CAROL))
+            self.assertEqual(
+                os.path.join(self.keystore, "UTC--3--carol"),
+                KeystoreIndex(self.keystore).keyfiles()[CAROL],
+            )
+            read_address.assert_called_once()
+
+    def test_modified_in_place(self) -> None:
+        """
+        Keyfiles rewritten in place (which does not change the directory
+        modification time) are parsed again.
+        """
+
+        os.utime(self.keystore, (1e9, 1e9))
+        KeystoreIndex(self.keystore).keyfiles()
+
+        bob_keyfile = os.path.join(self.keystore, "UTC--2--bob")
+        self._write("UTC--2--bob", _keyfile_data(CAROL))
+        os.utime(bob_keyfile, (1e9, 1e9))
+        os.utime(self.keystore, (1e9, 1e9))
+
+        keyfiles = KeystoreIndex(self.keystore).keyfiles()
+        self.assertNotIn(BOB, keyfiles)
+        self.assertEqual(bob_keyfile, keyfiles[CAROL])
+
+    def test_write_keyfile(self) -> None:
+        """
+        Written keyfiles are added to the index, and are not parsed.
+        """
+
+        KeystoreIndex(self.keystore).keyfiles()
+
+        keyfile = os.path.join(self.keystore, "UTC--3--carol")
+        KeystoreIndex(self.keystore).write_keyfiles(
+            [(keyfile, cast(EncryptedKeyData, _keyfile_data(CAROL)))]
+        )
+
+        with patch("autonity_cli.keystore_index._read_address") as read_address:
+            self.assertEqual(keyfile, KeystoreIndex(self.keystore).keyfiles()[CAROL])
+            read_address.assert_not_called()
@@ -0,0 +1,53 @@
+"""
+Test the lazily loaded root command group
+"""
+
+import subprocess
+import sys
+from importlib import import_module
+from unittest import TestCase
+
+from click import Command
+
+from autonity_cli.__main__ import COMMANDS
+
+
+class TestLazyGroup(TestCase):
+    """
+    Test the `aut` command manifest
+    """
+
+    def test_manifest_matches_commands(self) -> None:
+        """
+        Each manifest entry resolves to a command, whose help text
+        (first paragraph) matches the manifest.
+        """
+
+        for name, entry in COMMANDS.items():
+            cmd = getattr(import_module(entry.module), entry.attribute)
+            self.assertIsInstance(cmd, Command, name)
+            self.assertEqual(
+                " ".join(entry.short_help.split()),
+                " ".join((cmd.help or "").split("\n\n")[0].split()),
+                name,
+            )
+
+    def test_help_does_not_import_commands(self) -> None:
+        """
+        Listing the commands must not import any of the command modules.
+        """
+
+        script = (
+            "import sys\n"
+            "from autonity_cli.__main__ import aut\n"
+            "try:\n"
+            "    aut(['--help'])\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "loaded = [\n"
+            "    m for m in sys.modules if m.startswith('autonity_cli.commands.')\n"
+            "]\n"
+            "assert not loaded, loaded\n"
+            "assert 'web3' not in sys.modules\n"
+        )
+        subprocess.run([sys.executable, "-c", script], check=True, capture_output=True)
@@ -0,0 +1,73 @@
+"""
+Test local nonce management
+"""
+
+import os.path
+import tempfile
+from unittest import TestCase
+
+from web3 import Web3
+
+from autonity_cli.nonces import NonceStore
+
+ALICE = Web3.to_checksum_address("0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf")
+
+
+class TestNonceStore(TestCase):
+    """
+    Test NonceStore
+    """
+
+    def setUp(self) -> None:
+        # pylint: disable=consider-using-with
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = NonceStore(os.path.join(self.tmp_dir.name, "nonces.sqlite"))
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_allocate(self) -> None:
+        """
+        The first allocation starts from the pending count, and later
+        allocations (from any instance) do not query it.
+        """
+
+        self.assertEqual(5, self.store.allocate(ALICE, lambda: 5))
+        self.assertEqual(6, self.store.allocate(ALICE, lambda: 5, count=3))
+
+        other = NonceStore(self.store.path)
+        self.assertEqual(9, other.allocate(ALICE, self.fail))
+        self.assertEqual(10, other.get(ALICE))
+
+        # A minimum (e.g. a newly synced nonce) overrides a stale store.
+        self.assertEqual(20, other.allocate(ALICE, self.fail, min_nonce=20))
+        self.assertEqual(21, other.allocate(ALICE, self.fail, min_nonce=20))
+
+    def test_reconcile(self) -> None:
+        """
+        Gaps and stuck transactions are reported, and the next nonce
+        follows transactions sent by other means.
+        """
+
+        self.store.set(ALICE, 10)
+        status = self.store.reconcile(ALICE, mined=6, pending=8, mined_before=5)
+        self.assertEqual(range(8, 10), status["gap"])
+        self.assertFalse(status["stuck"])
+
+        status = self.store.reconcile(ALICE, mined=6, pending=8, mined_before=6)
+        self.assertTrue(status["stuck"])
+
+        # Accounts with no local state are also checked.
+        bob = Web3.to_checksum_address("0x2B5AD5c4795c026514f8317c7a215E218DcCD6cF")
+        status = self.store.reconcile(bob, mined=3, pending=4, mined_before=3)
+        self.assertIsNone(status["next_nonce"])
+        self.assertTrue(status["stuck"])
+
+        status = self.store.reconcile(ALICE, mined=7, pending=12)
+        self.assertEqual(12, status["next_nonce"])
+        self.assertIsNone(status["gap"])
+        self.assertFalse(status["stuck"])
+
+        self.store.set(ALICE, 20)
+        self.store.reconcile(ALICE, mined=12, pending=12, reset=True)
+        self.assertEqual(12, self.store.get(ALICE))
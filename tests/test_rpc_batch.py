@@ -0,0 +1,362 @@
+"""
+Test batched JSON-RPC requests
+"""
+
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, List
+from unittest import TestCase
+from unittest.mock import patch
+
+from autonity import Autonity
+from eth_abi import encode
+from hexbytes import HexBytes
+from web3 import Web3
+
+from autonity_cli.rpc_batch import RPCBatch
+from autonity_cli.user import (
+    call_functions,
+    get_protocol_snapshot,
+    get_token_metadata,
+    get_validator_overview,
+    iter_blocks,
+    send_raw_transactions,
+    wait_for_receipts,
+)
+
+ALICE = Web3.to_checksum_address("0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf")
+
+# Contracts whose calls revert, or fail with a node error.
+REVERTING = Web3.to_checksum_address("0x6813Eb9362372EEF6200f3b1dbC3f819671cBA69")
+FAILING = Web3.to_checksum_address("0x1efF47bc3a10a45D4B230B5d10E37751FE6AA718")
+
+NAME_SELECTORS = ("0x06fdde03", "0x95d89b41")  # name(), symbol()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    Minimal JSON-RPC server.  Records every batch received, and the
+    method of every request (batched or not).
+    """
+
+    batches: List[List[Dict[str, Any]]] = []
+    methods: List[str] = []
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """
+        Respond to a single request, or a batch of requests (in reverse
+        order).
+        """
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if isinstance(body, list):
+            self.batches.append(body)
+            self.methods.extend(req["method"] for req in body)
+            response: Any = [self._respond(req) for req in reversed(body)]
+        else:
+            self.methods.append(body["method"])
+            response = self._respond(body)
+
+        data = json.dumps(response).encode("utf8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    @staticmethod
+    def _respond(req: Dict[str, Any]) -> Dict[str, Any]:
+        method = req["method"]
+        if method == "eth_getBalance":
+            result: Any = hex(1000 + int(req["params"][1], 16))
+        elif method == "eth_call":
+            call = req["params"][0]
+            if call["to"] == REVERTING:
+                error = {"code": 3, "message": "execution reverted"}
+                return {"jsonrpc": "2.0", "id": req["id"], "error": error}
+            if call["to"] == FAILING:
+                error = {"code": -32005, "message": "limit exceeded"}
+                return {"jsonrpc": "2.0", "id": req["id"], "error": error}
+            if call["data"].startswith(NAME_SELECTORS):
+                result = "0x" + encode(["string"], ["NTN"]).hex()
+            else:
+                result = "0x" + (7).to_bytes(32, "big").hex()
+        elif method == "eth_blockNumber":
+            result = "0x10"
+        elif method == "eth_chainId":
+            result = "0x2a"
+        elif method == "eth_getCode":
+            result = "0x6000" if req["params"][0] in (ALICE, REVERTING) else "0x"
+        elif method == "eth_getTransactionReceipt":
+            tx_hash = req["params"][0]
+            result = None
+            if int(tx_hash, 16) % 2:
+                result = {"transactionHash": tx_hash, "status": "0x1"}
+        elif method == "eth_getBlockByNumber":
+            number = int(req["params"][0], 16)
+            result = {"number": hex(number), "hash": "0x" + f"{number:064x}"}
+        elif method == "eth_sendRawTransaction":
+            raw_tx = req["params"][0]
+            if raw_tx.endswith("ff"):
+                return {"jsonrpc": "2.0", "id": req["id"], "error": {"code": -32000}}
+            result = "0x" + raw_tx[2:].rjust(64, "0")
+        else:
+            return {"jsonrpc": "2.0", "id": req["id"], "error": {"code": -32601}}
+
+        return {"jsonrpc": "2.0", "id": req["id"], "result": result}
+
+    def log_message(self, *_: Any) -> None:
+        pass
+
+
+class TestRPCBatch(TestCase):
+    """
+    Test RPCBatch against a local JSON-RPC server
+    """
+
+    def setUp(self) -> None:
+        _Handler.batches = []
+        _Handler.methods = []
+        self.server = HTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.w3 = Web3(Web3.HTTPProvider(f"http://127.0.0.1:{self.server.server_port}"))
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_batches_and_ordering(self) -> None:
+        """
+        Requests are split into batches, and results returned in order
+        and formatted.
+        """
+
+        batch = RPCBatch(self.w3, batch_size=2)
+        for block in range(5):
+            batch.add("eth_getBalance", [ALICE, block])
+
+        self.assertEqual([1000, 1001, 1002, 1003, 1004], batch.execute())
+        self.assertEqual([2, 2, 1], [len(b) for b in _Handler.batches])
+        self.assertEqual(
+            ["0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf", "0x3"],
+            _Handler.batches[1][1]["params"],
+        )
+
+    def test_contract_call(self) -> None:
+        """
+        Contract calls are decoded.
+        """
+
+        batch = RPCBatch(self.w3)
+        batch.add_call(Autonity(self.w3).contract.functions.balanceOf(ALICE), 12)
+        self.assertEqual([7], batch.execute())
+        self.assertEqual("0xc", _Handler.batches[0][0]["params"][1])
+
+    def test_contract_call_address(self) -> None:
+        """
+        Contract calls can be redirected to another contract address.
+        """
+
+        batch = RPCBatch(self.w3)
+        balance_of = Autonity(self.w3).contract.functions.balanceOf(ALICE)
+        batch.add_call(balance_of, address=ALICE)
+        self.assertEqual([7], batch.execute())
+        self.assertEqual(ALICE, _Handler.batches[0][0]["params"][0]["to"])
+
+    def test_concurrent(self) -> None:
+        """
+        Batches sent concurrently are returned in order.
+        """
+
+        batch = RPCBatch(self.w3, batch_size=1, max_workers=3)
+        for block in range(5):
+            batch.add("eth_getBalance", [ALICE, block])
+
+        self.assertEqual([1000, 1001, 1002, 1003, 1004], batch.execute())
+        self.assertEqual(5, len(_Handler.batches))
+
+    def test_error(self) -> None:
+        """
+        Errors raise ValueError.
+        """
+
+        batch = RPCBatch(self.w3)
+        batch.add("eth_getBalance", [ALICE, 1])
+        batch.add("eth_unsupported", [])
+        with self.assertRaises(ValueError):
+            batch.execute()
+
+    def test_iter_blocks(self) -> None:
+        """
+        Block ranges are fetched concurrently, and yielded in order.
+        """
+
+        with patch.dict(os.environ, {"AUT_NO_CACHE": "1"}):
+            blocks = iter_blocks(self.w3, 3, 12, batch_size=3, max_workers=2)
+            self.assertEqual(list(range(3, 13)), [b["number"] for b in blocks])
+
+        self.assertEqual(
+            [3, 3, 3, 1], sorted((len(b) for b in _Handler.batches), reverse=True)
+        )
+
+    def test_wait_for_receipts(self) -> None:
+        """
+        Available receipts are returned, and waiting stops at the
+        timeout.
+        """
+
+        hashes = [HexBytes(i.to_bytes(32, "big")) for i in range(1, 6)]
+        with patch.dict(os.environ, {"AUT_NO_CACHE": "1"}):
+            receipts = list(wait_for_receipts(self.w3, hashes, timeout=0.3))
+
+        self.assertEqual([hashes[0], hashes[2], hashes[4]], [r[0] for r in receipts])
+        self.assertEqual([1, 1, 1], [r[1]["status"] for r in receipts])
+
+    def test_send_raw_transactions(self) -> None:
+        """
+        Transactions are submitted in order per sender, and errors are
+        returned in place of hashes.
+        """
+
+        raw_txs = [HexBytes(bytes([i])) for i in [1, 2, 3, 255, 5]]
+        senders = ["0xa", "0xb", "0xA", "0xb", "0xa"]
+        results = send_raw_transactions(
+            self.w3, raw_txs, senders, batch_size=2, max_workers=2
+        )
+
+        self.assertEqual(HexBytes((1).to_bytes(32, "big")), results[0])
+        self.assertEqual(HexBytes((5).to_bytes(32, "big")), results[4])
+        self.assertIsInstance(results[3], ValueError)
+        self.assertEqual(
+            [["0x01", "0x03"], ["0x02", "0xff"], ["0x05"]],
+            sorted([req["params"][0] for req in b] for b in _Handler.batches),
+        )
+
+    def test_protocol_snapshot(self) -> None:
+        """
+        Getters are evaluated at a single block, in one batch, and
+        values which cannot be decoded are given as None.
+        """
+
+        with patch.dict(os.environ, {"AUT_NO_CACHE": "1"}):
+            snapshot = get_protocol_snapshot(self.w3, ["epoch_id", "config", "version"])
+        self.assertEqual(
+            {"block": 16, "epoch_id": 7, "config": None, "version": 7}, snapshot
+        )
+        self.assertEqual(1, len(_Handler.batches))
+        self.assertEqual(
+            ["0x10"], list({req["params"][1] for req in _Handler.batches[0]})
+        )
+
+    def test_call_functions_cache(self) -> None:
+        """
+        Results of calls at a specific block are cached, but calls at
+        'latest' are always sent.
+        """
+
+        balance_of = Autonity(self.w3).contract.functions.balanceOf(ALICE)
+        with tempfile.TemporaryDirectory() as tmp_dir, patch.dict(
+            os.environ, {"AUT_CACHE_DIR": tmp_dir}
+        ), patch.dict("autonity_cli.cache._CHAIN_KEYS", {self.w3: "42"}):
+            self.assertEqual([7], call_functions(self.w3, [balance_of], 12))
+            self.assertEqual([7], call_functions(self.w3, [balance_of], 12))
+            self.assertEqual(1, len(_Handler.batches))
+
+            self.assertEqual([7, 7], call_functions(self.w3, [balance_of, balance_of]))
+            self.assertEqual(2, len(_Handler.batches))
+
+    def test_call_functions_cache_requests(self) -> None:
+        """
+        Once the chain id and genesis hash of the endpoint are recorded,
+        repeated calls at a specific block (from a new process) send no
+        requests at all.
+        """
+
+        uri = f"http://127.0.0.1:{self.server.server_port}"
+        balance_of = Autonity(self.w3).contract.functions.balanceOf(ALICE)
+        with tempfile.TemporaryDirectory() as tmp_dir, patch.dict(
+            os.environ, {"AUT_CACHE_DIR": tmp_dir}
+        ):
+            self.assertEqual([7], call_functions(self.w3, [balance_of], 12))
+            self.assertEqual(
+                ["eth_chainId", "eth_getBlockByNumber", "eth_call"], _Handler.methods
+            )
+
+            # A new process has no in-memory state.
+            w3 = Web3(Web3.HTTPProvider(uri))
+            balance_of = Autonity(w3).contract.functions.balanceOf(ALICE)
+            with patch.dict("autonity_cli.cache._CHAIN_KEYS", clear=True), patch.dict(
+                "autonity_cli.cache._CACHES", clear=True
+            ):
+                self.assertEqual([7], call_functions(w3, [balance_of], 12))
+            self.assertEqual(
+                ["eth_chainId", "eth_getBlockByNumber", "eth_call"], _Handler.methods
+            )
+
+    def test_token_metadata(self) -> None:
+        """
+        Token metadata is fetched in a single batch, and cached only for
+        contracts whose getters all succeed.  Getters which revert or
+        give invalid results fall back to default values, but other
+        errors are raised.
+        """
+
+        bob = Web3.to_checksum_address("0x2B5AD5c4795c026514f8317c7a215E218DcCD6cF")
+        with tempfile.TemporaryDirectory() as tmp_dir, patch.dict(
+            os.environ, {"AUT_CACHE_DIR": tmp_dir}
+        ), patch.dict("autonity_cli.cache._CHAIN_KEYS", {self.w3: "42"}):
+            expect = {"name": "NTN", "symbol": "NTN", "decimals": 7}
+            self.assertEqual(expect, get_token_metadata(self.w3, ALICE))
+            self.assertEqual(expect, get_token_metadata(self.w3, ALICE))
+            self.assertEqual(1, len(_Handler.batches))
+            self.assertEqual(4, len(_Handler.batches[0]))
+
+            # No contract
+            get_token_metadata(self.w3, bob)
+            get_token_metadata(self.w3, bob)
+            self.assertEqual(3, len(_Handler.batches))
+
+            expect = {"name": None, "symbol": None, "decimals": 0}
+            self.assertEqual(expect, get_token_metadata(self.w3, REVERTING))
+            self.assertEqual(expect, get_token_metadata(self.w3, REVERTING))
+            self.assertEqual(5, len(_Handler.batches))
+
+            with self.assertRaises(ValueError):
+                get_token_metadata(self.w3, FAILING)
+
+    def test_validator_overview(self) -> None:
+        """
+        Validators are queried at a pinned block, and joined with the
+        committee by node address.
+        """
+
+        bob = Web3.to_checksum_address("0x2B5AD5c4795c026514f8317c7a215E218DcCD6cF")
+        values = {
+            "validators": [ALICE, bob],
+            "committee": [
+                {"address": bob, "voting_power": 5, "consensus_key": "0x"},
+            ],
+        }
+        descriptors = [
+            {"node_address": ALICE, "bonded_stake": 1},
+            {"node_address": bob, "bonded_stake": 2},
+        ]
+        with patch(
+            "autonity_cli.user.get_protocol_values", return_value=values
+        ) as get_values, patch(
+            "autonity_cli.user.get_validator_descriptors", return_value=descriptors
+        ) as get_descriptors:
+            block, overview = get_validator_overview(self.w3)
+
+        self.assertEqual(16, block)
+        self.assertEqual(16, get_values.call_args.args[2])
+        self.assertEqual(([ALICE, bob], 16), get_descriptors.call_args.args[1:3])
+        self.assertEqual(
+            [
+                {"node_address": ALICE, "bonded_stake": 1, "voting_power": None},
+                {"node_address": bob, "bonded_stake": 2, "voting_power": 5},
+            ],
+            overview,
+        )
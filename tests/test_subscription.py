@@ -0,0 +1,117 @@
+"""
+Test new block notifications
+"""
+
+import json
+import os.path
+import socket
+import tempfile
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from autonity_cli.subscription import NewHeadsSubscription, new_blocks
+
+
+def _serve_new_heads(server: socket.socket, numbers: list) -> None:
+    conn, _ = server.accept()
+    with conn, conn.makefile("rwb") as conn_f:
+        request = json.loads(conn_f.readline())
+        assert request["method"] == "eth_subscribe"
+        responses = [{"jsonrpc": "2.0", "id": request["id"], "result": "0xabc"}]
+        for number in numbers:
+            responses.append(
+                {
+                    "jsonrpc": "2.0",
+                    "method": "eth_subscription",
+                    "params": {"subscription": "0xabc", "result": {"number": number}},
+                }
+            )
+
+        for response in responses:
+            conn_f.write(json.dumps(response).encode() + b"\n")
+            conn_f.flush()
+
+        # Wait for the client to disconnect
+        conn_f.readline()
+
+
+class TestSubscription(TestCase):
+    """
+    Test NewHeadsSubscription against a local IPC server
+    """
+
+    def test_ipc_new_heads(self) -> None:
+        """
+        Block numbers are received from notifications.
+        """
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ipc_path = os.path.join(tmp_dir, "node.ipc")
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+                server.bind(ipc_path)
+                server.listen()
+                thread = threading.Thread(
+                    target=_serve_new_heads, args=(server, ["0x5", "0x6", "0x7"])
+                )
+                thread.start()
+
+                subscription = NewHeadsSubscription(ipc_path, ipc=True)
+                subscription.start()
+                try:
+                    number = subscription.wait(5.0)
+                    while number is not None and number < 7:
+                        number = subscription.wait(5.0)
+                    self.assertEqual(7, number)
+                    self.assertIsNone(subscription.wait(0.1))
+                finally:
+                    subscription.close()
+
+                thread.join()
+
+    def test_new_blocks_timeout(self) -> None:
+        """
+        Polling stops at the deadline if no new block arrives, and the
+        timeout can be reset while iterating.
+        """
+
+        w3 = MagicMock()
+        w3.eth.block_number = 5
+        blocks = new_blocks(w3, 0.2)
+        self.assertEqual(5, next(blocks))
+
+        # The original deadline has passed, but a new timeout is given.
+        time.sleep(0.3)
+        w3.eth.block_number = 6
+        self.assertEqual(6, blocks.send(0.5))
+
+        start = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            blocks.send(0.3)
+        self.assertLess(time.monotonic() - start, 2.0)
+
+    def test_new_blocks_subscription_lost(self) -> None:
+        """
+        If the subscription fails after it has started, the block number
+        is polled instead.
+        """
+
+        w3 = MagicMock()
+        w3.eth.block_number = 5
+        subscription = MagicMock()
+        subscription.wait.side_effect = [6, ConnectionError("connection lost")]
+        with patch(
+            "autonity_cli.subscription.subscribe_new_heads", return_value=subscription
+        ):
+            blocks = new_blocks(w3, 5.0)
+            self.assertEqual(5, next(blocks))
+            self.assertEqual(6, blocks.send(None))
+
+            w3.eth.block_number = 7
+            self.assertEqual(7, blocks.send(None))
+            subscription.close.assert_called_once()
+
+            w3.eth.block_number = 8
+            self.assertEqual(8, next(blocks))
+            blocks.close()
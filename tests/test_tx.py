@@ -0,0 +1,100 @@
+"""
+Test the tx commands
+"""
+
+from typing import cast
+from unittest import TestCase
+
+from hexbytes import HexBytes
+from web3.types import TxData
+
+from autonity_cli.commands.tx import (
+    _latency_summary,
+    _parse_batch_row,
+    _replacement_tx,
+)
+
+ALICE = "0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf"
+
+
+class TestBatchRows(TestCase):
+    """
+    Test parsing of `tx batch` rows.
+    """
+
+    def test_parse_batch_row(self) -> None:
+        """
+        Rows may be CSV or JSON, with an optional token.
+        """
+
+        self.assertEqual(("0xa", "1aut", None), _parse_batch_row("0xa, 1aut"))
+        self.assertEqual(("0xa", "2", "ntn"), _parse_batch_row("0xa,2,ntn"))
+        self.assertEqual(
+            ("0xa", "3", None), _parse_batch_row('{"to": "0xa", "value": 3}')
+        )
+        with self.assertRaises(ValueError):
+            _parse_batch_row("0xa")
+
+
+class TestLatencySummary(TestCase):
+    """
+    Test the `tx pipeline` latency summary.
+    """
+
+    def test_latency_summary(self) -> None:
+        """
+        Percentiles are taken from the sorted latencies.
+        """
+
+        self.assertEqual({}, _latency_summary([]))
+        summary = _latency_summary([float(i) for i in range(10, 0, -1)])
+        self.assertEqual({"mean": 5.5, "p50": 6.0, "p90": 10.0, "max": 10.0}, summary)
+
+
+class TestReplacementTx(TestCase):
+    """
+    Test the `tx bump` replacement transactions.
+    """
+
+    def test_replacement_tx(self) -> None:
+        """
+        Replacements copy the original transaction (including any
+        access list), with increased fees.
+        """
+
+        tx = {
+            "from": ALICE,
+            "to": ALICE,
+            "nonce": 3,
+            "gas": 30000,
+            "value": 1,
+            "input": HexBytes("0x1234"),
+            "maxFeePerGas": 1000,
+            "maxPriorityFeePerGas": 100,
+            "accessList": [
+                {"address": ALICE, "storageKeys": [HexBytes("0x" + "00" * 31 + "01")]}
+            ],
+        }
+        replacement = _replacement_tx(cast(TxData, tx), 100, 10)
+        self.assertEqual(
+            {
+                "from": ALICE,
+                "to": ALICE,
+                "nonce": 3,
+                "gas": 30000,
+                "value": 1,
+                "data": "0x1234",
+                "accessList": [
+                    {"address": ALICE, "storageKeys": ["0x" + "00" * 31 + "01"]}
+                ],
+                "maxFeePerGas": 1100,
+                "maxPriorityFeePerGas": 110,
+            },
+            replacement,
+        )
+
+        del tx["accessList"], tx["maxFeePerGas"], tx["maxPriorityFeePerGas"]
+        tx["gasPrice"] = 1000
+        replacement = _replacement_tx(cast(TxData, tx), 100, 10)
+        self.assertNotIn("accessList", replacement)
+        self.assertEqual(1100, replacement["gasPrice"])